@@ -0,0 +1,113 @@
+"""
+Адаптивная выборка точек для графиков функций.
+
+Вместо равномерной сетки интервал рекурсивно делится пополам там, где кривая отклоняется
+от хорды больше чем на заданное число пикселей. Все интервалы одного уровня обрабатываются
+одним векторизованным вызовом функции. Интервалы, которые не сошлись к максимальной глубине
+и содержат скачок больше высоты окна (полюс) или нечисловые значения, разрываются NaN,
+чтобы matplotlib не соединял ветви вертикальной линией.
+"""
+
+import numpy as np
+
+
+def _deviation_px(x_left, y_left, x_mid, y_mid, x_right, y_right, y_scale):
+    # Вертикальное отклонение (в пикселях) средней точки от хорды. Перпендикулярное расстояние
+    # здесь не подходит: у полюса хорда почти вертикальна и средняя точка лежит рядом с ней
+    t = (x_mid - x_left) / (x_right - x_left)
+    chord = y_left + t * (y_right - y_left)
+    return np.abs(y_mid - chord) * y_scale
+
+
+def robust_y_range(y):
+    """Диапазон значений без выбросов у полюсов: используется, если ylim не задан"""
+    finite = y[np.isfinite(y)]
+    if finite.size == 0:
+        return -1.0, 1.0
+    low, high = np.percentile(finite, [2, 98])
+    if high <= low:
+        low, high = low - 1.0, high + 1.0
+    return low, high
+
+
+def adaptive_sample(func, x_range, width_px, height_px, y_range=None, tolerance_px=0.5,
+                    initial_points=65, max_depth=16, max_points=200000):
+    """
+    func - векторизованная функция x -> y (массив той же формы)
+    width_px, height_px - размер области графика в пикселях
+    y_range - видимый диапазон по y (None - оценивается по начальной сетке)
+    Возвращает (x, y, число вычислений функции)
+    """
+    x = np.linspace(x_range[0], x_range[1], initial_points)
+    y = func(x)
+    n_evals = x.size
+
+    if y_range is None:
+        y_range = robust_y_range(y)
+    x_scale = width_px / abs(x_range[1] - x_range[0])
+    y_range = (min(y_range), max(y_range))
+    y_scale = height_px / abs(y_range[1] - y_range[0])
+    # Интервал уже меньше сотой доли пикселя - дальше делить бессмысленно
+    min_width = 0.01 / x_scale
+
+    xs, ys = [x], [y]
+    left_x, left_y = x[:-1], y[:-1]
+    right_x, right_y = x[1:], y[1:]
+    breaks = []
+
+    for depth in range(max_depth + 1):
+        if left_x.size == 0 or n_evals >= max_points:
+            break
+
+        mid_x = 0.5 * (left_x + right_x)
+        mid_y = func(mid_x)
+        n_evals += mid_x.size
+        xs.append(mid_x)
+        ys.append(mid_y)
+
+        finite_count = np.isfinite(left_y).astype(int) + np.isfinite(mid_y) + np.isfinite(right_y)
+        finite = finite_count == 3
+        with np.errstate(invalid='ignore'):
+            deviation = _deviation_px(left_x, left_y, mid_x, mid_y, right_x, right_y, y_scale)
+            # Все три точки за одной границей окна - форма кривой там не видна
+            hidden = (((left_y > y_range[1]) & (mid_y > y_range[1]) & (right_y > y_range[1])) |
+                      ((left_y < y_range[0]) & (mid_y < y_range[0]) & (right_y < y_range[0])))
+        # Интервалы на границе области определения тоже делим, чтобы ее локализовать
+        boundary = (finite_count > 0) & ~finite
+        wants = boundary | (finite & (deviation > tolerance_px) & ~hidden)
+        refine = wants & ((right_x - left_x) > 2 * min_width)
+
+        last_level = depth == max_depth or n_evals + 2 * np.count_nonzero(refine) > max_points
+        stuck = wants if last_level else wants & ~refine
+
+        # Не сошедшиеся интервалы со скачком больше высоты окна считаем полюсами;
+        # разрыв ставим в ту половину интервала, где скачок больше
+        if np.any(stuck):
+            jump_left = np.abs(mid_y - left_y) * y_scale
+            jump_right = np.abs(right_y - mid_y) * y_scale
+            with np.errstate(invalid='ignore'):
+                pole = stuck & (~finite | (np.maximum(jump_left, jump_right) > height_px))
+                in_left = jump_left >= jump_right
+            break_x = np.where(in_left, 0.5 * (left_x + mid_x), 0.5 * (mid_x + right_x))
+            breaks.append(break_x[pole])
+
+        if last_level:
+            break
+
+        left_x = np.concatenate([left_x[refine], mid_x[refine]])
+        left_y = np.concatenate([left_y[refine], mid_y[refine]])
+        right_x, right_y = (np.concatenate([mid_x[refine], right_x[refine]]),
+                            np.concatenate([mid_y[refine], right_y[refine]]))
+
+    x = np.concatenate(xs)
+    y = np.concatenate(ys).astype(float)
+
+    # Разрывы: нечисловые значения и полюса превращаем в NaN, на которых обрывается линия
+    y[~np.isfinite(y)] = np.nan
+    if breaks:
+        pole_x = np.concatenate(breaks)
+        x = np.concatenate([x, pole_x])
+        y = np.concatenate([y, np.full(pole_x.size, np.nan)])
+
+    order = np.argsort(x, kind='stable')
+    return x[order], y[order], n_evals
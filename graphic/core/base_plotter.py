@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt  # как будет видно ниже, очень удобно использовать сокращение переменных.
 import numpy as np               # тоже сократим для красоты
+from utils.memory_profile import memory_stage
 
 
 # На всякий случай комментарий:
@@ -118,12 +119,13 @@ class GraphPlotter:
         import os
         ext = os.path.splitext(filename)[1].lower()
 
-        if ext == '.png':
-            # Для PNG используем высокое разрешение (dpi=300)
-            self.fig.savefig(filename, format='png', dpi=300, bbox_inches='tight')
-        else:
-            # По умолчанию SVG
-            self.fig.savefig(filename, format='svg', bbox_inches='tight')
+        with memory_stage('savefig'):
+            if ext == '.png':
+                # Для PNG используем высокое разрешение (dpi=300)
+                self.fig.savefig(filename, format='png', dpi=300, bbox_inches='tight')
+            else:
+                # По умолчанию SVG
+                self.fig.savefig(filename, format='svg', bbox_inches='tight')
 
         plt.close(self.fig)
         #поямнения к формуле выше:
@@ -0,0 +1,167 @@
+"""
+Карта областей притяжения: куда приходит траектория из каждого начального условия (x₀, y₀).
+
+Сетка начальных условий интегрируется пакетно (core/batch_integrator.py). Конечная точка каждой
+траектории сравнивается с известными равновесиями: номер ближайшего равновесия в пределах радиуса
+захвата, DIVERGED - решение ушло на бесконечность (или за порог blowup), UNDETERMINED - за время
+интегрирования не пришло ни к одному равновесию (цикл, медленная сходимость).
+
+Сетка уточняется только вдоль границ областей: сначала грубая решетка base × base, затем на каждом
+уровне блоки, у которых метка отличается от соседнего блока, делятся на четыре и для новых узлов
+считаются траектории. Внутри однородных областей метки наследуются от грубой решетки, поэтому
+число траекторий растет как длина границы, а не как площадь растра.
+Результат кэшируется на диске (basin_cache_dir).
+"""
+
+import os
+import hashlib
+import numpy as np
+
+from core.batch_integrator import integrate_batch, NONFINITE
+
+
+DIVERGED = -1
+UNDETERMINED = -2
+
+
+def _cache_path(cache_dir, system, param_values, var_indices, base_state, settings):
+    params = tuple(sorted((str(p), float(v)) for p, v in zip(system.params, param_values)))
+    # Проекция (var_indices) и значения неотображаемых переменных (base_state) тоже определяют растр
+    key = (tuple(system.equations_latex), tuple(system.variable_names), params,
+           tuple(int(i) for i in var_indices), tuple(float(v) for v in base_state), repr(sorted(settings.items())))
+    return os.path.join(cache_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.npz')
+
+
+class BasinClassifier:
+    def __init__(self, system, param_values, var_indices, base_state, equilibria, settings):
+        self.system = system
+        self.param_values = param_values
+        self.var_indices = var_indices
+        self.base_state = np.asarray(base_state, dtype=float)
+        self.equilibria = np.asarray([e['point'] for e in equilibria], dtype=float).reshape(-1, 2)
+        self.stable = np.array([e['kind'].startswith('stable') for e in equilibria], dtype=bool)
+        # Расстояния считаются в долях размеров окна, чтобы переменные разного масштаба (s ~ 100, w ~ 1) были равноправны
+        self.scale = np.array([settings['xlim'][1] - settings['xlim'][0], settings['ylim'][1] - settings['ylim'][0]])
+        self.settings = settings
+        self.n_trajectories = 0
+
+        if system.generic_compiled is None:
+            system.compile_generic()
+
+    def _rhs(self, t, Y):
+        result = self.system.generic_compiled(t, *Y, *self.param_values)
+        return np.array([np.broadcast_to(np.asarray(r, dtype=float), t.shape) for r in result])
+
+    def _distances(self, points):
+        # points: (2, m) -> (число равновесий, m)
+        diff = (points[np.newaxis, :, :] - self.equilibria[:, :, np.newaxis]) / self.scale[np.newaxis, :, np.newaxis]
+        return np.sqrt(np.sum(diff ** 2, axis=1))
+
+    def _stop(self, t, Y):
+        # Досрочно останавливаем траектории, попавшие к устойчивому равновесию или ушедшие за порог
+        stop = np.any(np.abs(Y) > self.settings['blowup'], axis=0)
+        if np.any(self.stable):
+            d = self._distances(Y[self.var_indices])[self.stable]
+            stop |= np.min(d, axis=0) < 0.1 * self.settings['capture_radius']
+        return stop
+
+    def classify(self, x0, y0):
+        """Метки для начальных условий (x0[k], y0[k])"""
+        i, j = self.var_indices
+        Y0 = np.repeat(self.base_state[:, np.newaxis], x0.size, axis=1)
+        Y0[i] = x0
+        Y0[j] = y0
+        self.n_trajectories += x0.size
+
+        _, Y, status = integrate_batch(self._rhs, self.settings['t_span'], Y0, rtol=self.settings['rtol'],
+                                       atol=self.settings['atol'], stop=self._stop,
+                                       max_steps=self.settings['max_steps'])
+
+        labels = np.full(x0.size, UNDETERMINED)
+        if self.equilibria.size:
+            d = self._distances(Y[self.var_indices])
+            nearest = np.argmin(d, axis=0)
+            captured = d[nearest, np.arange(x0.size)] < self.settings['capture_radius']
+            labels[captured] = nearest[captured]
+        diverged = ((status == NONFINITE) | np.any(np.abs(Y) > self.settings['blowup'], axis=0) |
+                    ~np.all(np.isfinite(Y), axis=0))
+        labels[diverged] = DIVERGED
+        return labels
+
+
+def _block_boundaries(blocks):
+    """Блоки, у которых метка отличается хотя бы от одного из четырех соседей"""
+    boundary = np.zeros(blocks.shape, dtype=bool)
+    differs_x = blocks[:, 1:] != blocks[:, :-1]
+    differs_y = blocks[1:, :] != blocks[:-1, :]
+    boundary[:, 1:] |= differs_x
+    boundary[:, :-1] |= differs_x
+    boundary[1:, :] |= differs_y
+    boundary[:-1, :] |= differs_y
+    return boundary
+
+
+def refine_labels(classify, x, y, levels):
+    """
+    Растр меток на узлах x × y (строка - y, столбец - x) с уточнением вдоль границ.
+    classify(xs, ys) - векторизованная классификация точек; len(x) и len(y) кратны 2^levels.
+    Узлы могут быть неравномерными (например, логарифмическая шкала параметра)
+    """
+    step = 2 ** levels
+    rows, cols = np.meshgrid(np.arange(0, len(y), step), np.arange(0, len(x), step), indexing='ij')
+    labels = np.asarray(classify(x[cols.ravel()], y[rows.ravel()])).reshape(rows.shape)
+    raster = np.repeat(np.repeat(labels, step, axis=0), step, axis=1)
+
+    while step > 1:
+        half = step // 2
+        boundary = _block_boundaries(raster[::step, ::step])
+        block_rows, block_cols = np.nonzero(boundary)
+        if block_rows.size == 0:
+            break
+
+        # Три новых узла в каждом делимом блоке (левый нижний уже посчитан)
+        offsets = [(0, half), (half, 0), (half, half)]
+        new_rows = np.concatenate([block_rows * step + dr for dr, _ in offsets])
+        new_cols = np.concatenate([block_cols * step + dc for _, dc in offsets])
+        new_labels = classify(x[new_cols], y[new_rows])
+
+        # Каждый новый узел задает метку своего подблока half × half
+        for dr in range(half):
+            for dc in range(half):
+                raster[new_rows + dr, new_cols + dc] = new_labels
+        step = half
+
+    return raster
+
+
+def compute_basin_map(classifier, xlim, ylim, base=64, levels=3):
+    """
+    Растр меток размера (base·2^levels)², строка - y, столбец - x (origin='lower').
+    Узлы растра - центры пикселей
+    """
+    size = base * 2 ** levels
+    x = xlim[0] + (np.arange(size) + 0.5) * (xlim[1] - xlim[0]) / size
+    y = ylim[0] + (np.arange(size) + 0.5) * (ylim[1] - ylim[0]) / size
+    return x, y, refine_labels(classifier.classify, x, y, levels)
+
+
+def basin_map(system, param_values, var_indices, base_state, equilibria, settings, cache_dir=None):
+    """
+    Карта с кэшем на диске. settings: xlim, ylim, base, levels, t_span, rtol, atol,
+    capture_radius, blowup, max_steps. Возвращает (x, y, raster, число посчитанных траекторий)
+    """
+    path = None
+    if cache_dir:
+        cached_settings = dict(settings, equilibria=[tuple(np.round(e['point'], 12)) for e in equilibria])
+        path = _cache_path(cache_dir, system, param_values, var_indices, base_state, cached_settings)
+        if os.path.exists(path):
+            data = np.load(path)
+            return data['x'], data['y'], data['raster'], 0
+
+    classifier = BasinClassifier(system, param_values, var_indices, base_state, equilibria, settings)
+    x, y, raster = compute_basin_map(classifier, settings['xlim'], settings['ylim'], settings['base'],
+                                     settings['levels'])
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez_compressed(path, x=x, y=y, raster=raster)
+    return x, y, raster, classifier.n_trajectories
@@ -0,0 +1,179 @@
+"""
+Пакетное интегрирование множества траекторий одной системы.
+
+Вместо одного вызова solve_ivp на траекторию все траектории шагают одновременно: состояния лежат
+в массиве (число переменных, число траекторий), правая часть (параметро-общая компиляция ODESystem)
+вычисляется одним векторизованным вызовом на шаг. Метод - Дорманд-Принс 5(4) (те же коэффициенты,
+что у RK45 в scipy) с собственным шагом и контролем ошибки у каждой траектории. Закончившие
+траектории исключаются из вычислений.
+"""
+
+import numpy as np
+
+
+# Коэффициенты Дорманда-Принса 5(4)
+C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+A = [
+    [],
+    [1 / 5],
+    [3 / 40, 9 / 40],
+    [44 / 45, -56 / 15, 32 / 9],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656],
+]
+B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+# Разность решений 5-го и 4-го порядка (для оценки ошибки), 7-я стадия - производная в новой точке
+E = np.array([71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+# Плотный вывод 4-го порядка внутри шага (тот же, что у RK45 в scipy):
+# y(t + x·h) = y + h · Σ_s K_s · (P[s] · [x, x², x³, x⁴])
+P = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10.0
+
+# Коды завершения траектории
+REACHED_END = 0
+STOPPED = 1
+NONFINITE = -1
+MAX_STEPS = -2
+
+
+def _norm(x, scale):
+    return np.sqrt(np.mean((x / scale) ** 2, axis=0))
+
+
+def _initial_step(rhs, t0, y0, f0, t1, rtol, atol):
+    # Векторизованный вариант выбора начального шага из scipy (Hairer, Norsett, Wanner)
+    scale = atol + np.abs(y0) * rtol
+    d0 = _norm(y0, scale)
+    d1 = _norm(f0, scale)
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    h0 = np.minimum(h0, abs(t1 - t0))
+    with np.errstate(invalid='ignore', over='ignore'):
+        f1 = rhs(t0 + h0, y0 + h0 * f0)
+        d2 = _norm(f1 - f0, scale) / h0
+    d = np.maximum(d1, d2)
+    h1 = np.where(d <= 1e-15, np.maximum(1e-6, h0 * 1e-3), (0.01 / np.maximum(d, 1e-300)) ** (1 / 5))
+    h = np.minimum(100 * h0, h1)
+    return np.where(np.isfinite(h) & (h > 0), h, 1e-6)
+
+
+def integrate_batch(rhs, t_span, Y0, rtol=1e-6, atol=1e-9, stop=None, max_steps=20000, args=None, t_eval=None):
+    """
+    rhs(t, Y) - правая часть для массива t (число траекторий) и Y (число переменных, число траекторий)
+    Y0 - начальные состояния той же формы
+    stop(t, Y) - необязательное условие досрочной остановки, маска для переданных траекторий
+    args - необязательные значения параметров по траекториям (массивы длины числа траекторий):
+    тогда правая часть вызывается как rhs(t, Y, *args) со значениями для переданных траекторий
+    t_eval - необязательная возрастающая сетка вывода: значения в ее узлах берутся из плотного вывода шага,
+    поэтому густая сетка не уменьшает шаг
+    Возвращает (t, Y, status): время и состояние в момент завершения и код завершения каждой траектории;
+    с t_eval - еще массив (число переменных, число траекторий, len(t_eval)), NaN после сбоя траектории
+    """
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    Y = np.array(Y0, dtype=float)
+    n_vars, n = Y.shape
+    t = np.full(n, t0)
+    status = np.full(n, MAX_STEPS)
+    args = [np.broadcast_to(np.asarray(a, dtype=float), (n,)) for a in (args or [])]
+
+    def f(t, Y, idx):
+        return rhs(t, Y, *[a[idx] for a in args]) if args else rhs(t, Y)
+
+    all_idx = np.arange(n)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        F = f(t, Y, all_idx)
+    h = _initial_step(lambda t, Y: f(t, Y, all_idx), t, Y, F, t1, rtol, atol)
+
+    out = None
+    if t_eval is not None:
+        t_eval = np.asarray(t_eval, dtype=float)
+        out = np.full((n_vars, n, len(t_eval)), np.nan)
+        # Узлы сетки в начальной точке
+        next_out = np.full(n, np.searchsorted(t_eval, t0, side='right'))
+        out[:, :, t_eval <= t0] = Y[:, :, np.newaxis]
+
+    active = np.all(np.isfinite(Y), axis=0) & np.all(np.isfinite(F), axis=0)
+    status[~active] = NONFINITE
+    steps = np.zeros(n, dtype=int)
+
+    while np.any(active):
+        idx = np.flatnonzero(active)
+        ti, yi, fi = t[idx], Y[:, idx], F[:, idx]
+        hi = np.minimum(h[idx], t1 - ti)
+
+        K = np.empty((7, n_vars, idx.size))
+        K[0] = fi
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for s in range(1, 6):
+                dy = sum(a * K[j] for j, a in enumerate(A[s]) if a != 0)
+                K[s] = f(ti + C[s] * hi, yi + hi * dy, idx)
+            y_new = yi + hi * np.tensordot(B, K[:6], axes=1)
+            K[6] = f(ti + hi, y_new, idx)
+            error = hi * np.tensordot(E, K, axes=1)
+            scale = atol + rtol * np.maximum(np.abs(yi), np.abs(y_new))
+            error_norm = _norm(error, scale)
+
+        finite = np.all(np.isfinite(y_new), axis=0) & np.all(np.isfinite(K[6]), axis=0)
+        accepted = finite & (error_norm <= 1)
+
+        # Новый шаг: увеличиваем после принятых, уменьшаем после отвергнутых
+        with np.errstate(divide='ignore'):
+            factor = SAFETY * np.where(error_norm > 0, error_norm, 1e-10) ** (-1 / 5)
+        factor = np.where(accepted, np.clip(factor, MIN_FACTOR, MAX_FACTOR),
+                          np.clip(np.where(finite, factor, MIN_FACTOR), MIN_FACTOR, 1.0))
+        h[idx] = hi * factor
+
+        acc = idx[accepted]
+        t[acc] = ti[accepted] + hi[accepted]
+        Y[:, acc] = y_new[:, accepted]
+        F[:, acc] = K[6][:, accepted]
+        steps[idx] += 1
+
+        if out is not None and acc.size:
+            # Узлы сетки вывода, пройденные принятым шагом: интерполяция плотным выводом
+            Q = np.einsum('svn,sk->vnk', K[:, :, accepted], P)
+            local = np.flatnonzero(accepted)
+            while True:
+                k = next_out[acc]
+                crossed = k < len(t_eval)
+                crossed[crossed] = t_eval[k[crossed]] <= t[acc[crossed]]
+                if not np.any(crossed):
+                    break
+                x = (t_eval[k[crossed]] - ti[local[crossed]]) / hi[local[crossed]]
+                powers = np.cumprod(np.repeat(x[np.newaxis, :], 4, axis=0), axis=0)
+                out[:, acc[crossed], k[crossed]] = yi[:, local[crossed]] + hi[local[crossed]] * \
+                    np.einsum('vnk,kn->vn', Q[:, crossed], powers)
+                next_out[acc[crossed]] += 1
+
+        # Шаг стал меньше машинной точности относительно t - дальше не продвинуться
+        stalled = idx[~accepted & (hi * factor <= 10 * np.spacing(np.abs(ti) + 1))]
+        status[stalled] = NONFINITE
+        active[stalled] = False
+
+        done = acc[t[acc] >= t1]
+        status[done] = REACHED_END
+        active[done] = False
+
+        if stop is not None:
+            running = acc[active[acc]]
+            if running.size:
+                stopped = running[stop(t[running], Y[:, running])]
+                status[stopped] = STOPPED
+                active[stopped] = False
+
+        exhausted = idx[active[idx] & (steps[idx] >= max_steps)]
+        active[exhausted] = False
+
+    if out is not None:
+        return t, Y, status, out
+    return t, Y, status
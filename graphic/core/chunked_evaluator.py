@@ -0,0 +1,200 @@
+"""
+Вычисление формулы на огромной сетке x по частям (chunks) в заранее выделенный выходной массив.
+
+Обычный lambdify создает временный массив полного размера на каждое подвыражение, поэтому
+пиковая память в разы больше результата. Здесь выражение (после подстановки параметров и CSE)
+компилируется в список операций над ufunc-ами numpy с явными out=: промежуточные результаты
+живут в небольшом наборе рабочих буферов размера одного куска, которые переиспользуются и
+между операциями, и между кусками. Пиковая память ~ выходной массив + (число буферов × кусок).
+Куски можно считать в пуле потоков: ufunc-и numpy отпускают GIL, у каждого потока свои буферы.
+"""
+
+import numpy as np
+import sympy as sp
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 64K значений float64 = 512 КБ на буфер: несколько буферов помещаются в кэш L2/L3
+DEFAULT_CHUNK_SIZE = 65536
+
+UNARY_UFUNCS = {
+    sp.exp: np.exp, sp.log: np.log, sp.sin: np.sin, sp.cos: np.cos, sp.tan: np.tan,
+    sp.sinh: np.sinh, sp.cosh: np.cosh, sp.tanh: np.tanh, sp.Abs: np.abs,
+}
+
+
+class UnsupportedExpression(ValueError):
+    """В выражении есть функция, для которой нет ufunc - используется запасной путь через lambdify"""
+
+
+class ChunkedEvaluator:
+    def __init__(self, expr, x_symbol, param_values=None, dtype=np.float64):
+        """
+        expr - sympy-выражение, x_symbol - переменная сетки, param_values - {символ: число}
+        """
+        self.dtype = np.dtype(dtype)
+        self.x_symbol = x_symbol
+        expr = sp.sympify(expr)
+        if param_values:
+            expr = expr.subs(param_values)
+        extra = expr.free_symbols - {x_symbol}
+        if extra:
+            raise ValueError(f"No values for symbols {sorted(map(str, extra))}")
+
+        self.instructions = []   # (ufunc, операнды, номер выходного буфера)
+        self.n_buffers = 0
+        self._free = []
+        self._compile(expr)
+
+    # --- компиляция в список операций ---
+
+    def _new_buffer(self):
+        if self._free:
+            return self._free.pop()
+        self.n_buffers += 1
+        return self.n_buffers - 1
+
+    def _release(self, operand):
+        if operand[0] == 'tmp':
+            self._free.append(operand[1])
+
+    def _emit(self, ufunc, operands):
+        # Результат пишем на место временного операнда (in-place), иначе - в свободный буфер
+        target = next((op[1] for op in operands if op[0] == 'tmp'), None)
+        if target is None:
+            target = self._new_buffer()
+        for op in operands:
+            if op[0] == 'tmp' and op[1] != target:
+                self._release(op)
+        self.instructions.append((ufunc, operands, target))
+        # Буфер общего подвыражения освобождается, только когда выпущены все читающие его операции:
+        # иначе еще не выпущенная операция (например, внешнее умножение) прочитала бы перезаписанный буфер
+        for op in operands:
+            if op[0] == 'buf':
+                self._remaining_uses[op[2]] -= 1
+                if self._remaining_uses[op[2]] == 0:
+                    self._free.append(op[1])
+        return ('tmp', target)
+
+    def _compile(self, expr):
+        replacements, reduced = sp.cse([expr])
+
+        # Сколько раз используется каждое общее подвыражение - чтобы освободить его буфер после последнего
+        self._remaining_uses = {}
+        for node in [value for _, value in replacements] + list(reduced):
+            for sym in sp.preorder_traversal(node):
+                if sym.is_Symbol:
+                    self._remaining_uses[sym] = self._remaining_uses.get(sym, 0) + 1
+        self._named = {}
+
+        for symbol, value in replacements:
+            result = self._node(value)
+            if result[0] != 'tmp':
+                # Свой буфер у каждого общего подвыражения - иначе счет использований смешается
+                result = self._emit(np.positive, [result])
+            # Буфер общего подвыражения закреплен до последнего использования, в него не пишут на месте
+            self._named[symbol] = ('buf', result[1], symbol)
+
+        self.result = self._node(reduced[0])
+
+    def _operand_for_symbol(self, sym):
+        if sym == self.x_symbol:
+            return ('x',)
+        return self._named[sym]
+
+    def _node(self, node):
+        if node.is_Number or (not node.free_symbols):
+            return ('const', float(node))
+        if node.is_Symbol:
+            return self._operand_for_symbol(node)
+        if isinstance(node, sp.Add):
+            return self._fold(np.add, node.args)
+        if isinstance(node, sp.Mul):
+            return self._fold(np.multiply, node.args)
+        if isinstance(node, sp.Pow):
+            base, exponent = node.args
+            if exponent == -1:
+                return self._emit(np.divide, [('const', 1.0), self._node(base)])
+            if exponent == 2:
+                return self._emit(np.square, [self._node(base)])
+            if exponent == sp.Rational(1, 2):
+                return self._emit(np.sqrt, [self._node(base)])
+            return self._emit(np.power, [self._node(base), self._node(exponent)])
+        if node.func in UNARY_UFUNCS:
+            return self._emit(UNARY_UFUNCS[node.func], [self._node(node.args[0])])
+        raise UnsupportedExpression(f"Unsupported function {node.func}")
+
+    def _fold(self, ufunc, args):
+        # Константы сначала сворачиваем, затем слагаемые/множители по одному, с записью на место
+        constants = [a for a in args if not a.free_symbols]
+        others = [a for a in args if a.free_symbols]
+        acc = self._node(others[0])
+        for arg in others[1:]:
+            acc = self._emit(ufunc, [acc, self._node(arg)])
+        if constants:
+            acc = self._emit(ufunc, [acc, self._node(sp.Add(*constants) if ufunc is np.add else sp.Mul(*constants))])
+        return acc
+
+    # --- вычисление ---
+
+    def _run_chunk(self, x_chunk, out_chunk, scratch):
+        m = x_chunk.shape[0]
+
+        def resolve(op):
+            if op[0] == 'const':
+                return op[1]
+            if op[0] == 'x':
+                return x_chunk
+            return scratch[op[1]][:m]
+
+        for ufunc, operands, target in self.instructions:
+            ufunc(*[resolve(op) for op in operands], out=scratch[target][:m])
+
+        np.copyto(out_chunk, resolve(self.result) if self.result[0] != 'const' else self.result[1],
+                  casting='unsafe')
+
+    def evaluate(self, x=None, x_range=None, n_points=None, out=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 n_threads=1, memmap_path=None):
+        """
+        x - готовый массив, либо (x_range, n_points) - тогда x генерируется по кускам и целиком
+        не хранится. out - выходной массив (или memmap_path - файл .npy, отображенный в память)
+        """
+        if x is not None:
+            x = np.asarray(x, dtype=self.dtype)
+            n_points = x.shape[0]
+        else:
+            start, stop = x_range
+            step = (stop - start) / (n_points - 1) if n_points > 1 else 0.0
+
+        if out is None:
+            if memmap_path:
+                out = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=self.dtype, shape=(n_points,))
+            else:
+                out = np.empty(n_points, dtype=self.dtype)
+
+        bounds = [(i, min(i + chunk_size, n_points)) for i in range(0, n_points, chunk_size)]
+
+        def worker(worker_bounds):
+            # У каждого потока свои рабочие буферы, они переиспользуются для всех его кусков
+            scratch = [np.empty(chunk_size, dtype=self.dtype) for _ in range(self.n_buffers)]
+            if x is None:
+                offsets = np.arange(chunk_size, dtype=self.dtype)
+                x_buffer = np.empty(chunk_size, dtype=self.dtype)
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                for lo, hi in worker_bounds:
+                    if x is None:
+                        # x = start + (lo + k) * step, без временных массивов
+                        x_chunk = x_buffer[:hi - lo]
+                        np.multiply(offsets[:hi - lo], step, out=x_chunk)
+                        x_chunk += start + lo * step
+                    else:
+                        x_chunk = x[lo:hi]
+                    self._run_chunk(x_chunk, out[lo:hi], scratch)
+
+        if n_threads > 1 and len(bounds) > 1:
+            groups = [bounds[k::n_threads] for k in range(n_threads)]
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                list(executor.map(worker, groups))
+        else:
+            worker(bounds)
+        return out
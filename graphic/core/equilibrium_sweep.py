@@ -0,0 +1,176 @@
+"""
+Развертки равновесия степенной модели по параметру (тип конфигурации equilibrium_sweep).
+
+Графики из power_law_equilibrium.py (s*, w* от параметра, кажущаяся вязкость, кривые {s*, w*},
+дискриминант) строятся по YAML-конфигурациям. Равновесия (s*, w*) для точек (a, b, α, h, g)
+считаются тем же find_equilibrium, но:
+- результаты запоминаются в EQUILIBRIUM_CACHE на время процесса, поэтому одинаковые точки
+  разных рисунков (например, развертка по b для рис. 1, 3 и 8) решаются один раз;
+- еще не решенные точки раздаются пулу процессов; в пакетном режиме (--batch) точки всех
+  конфигураций собираются заранее и решаются одной раздачей (prefetch_equilibria).
+"""
+
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+
+from power_law_equilibrium import MATERIAL_FUNCTIONS, find_equilibrium, compute_discriminant
+
+
+# (a, b, alpha, h, g_type) -> (s*, w*)
+EQUILIBRIUM_CACHE = {}
+
+# Пул имеет смысл только для заметного числа точек: запуск процессов дороже сотни вызовов fsolve
+MIN_POINTS_FOR_POOL = 400
+
+DEFAULT_FIXED = {'a': 1, 'b': 0.01, 'alpha': 2, 'beta': 1, 'c': 0.3, 'h': 0.1}
+QUANTITIES = ['s_w', 'viscosity', 'phase_curve', 'discriminant']
+
+COLORS = ['black', 'blue', 'red']
+LINESTYLES = ['-', '--', ':']
+
+
+def parameter_values(spec):
+    """{values: [...]} / {linspace: [начало, конец, n]} / {logspace: [степень начала, степень конца, n]}"""
+    if 'values' in spec:
+        return np.asarray(spec['values'], dtype=float)
+    if 'linspace' in spec:
+        start, stop, num = spec['linspace']
+        return np.linspace(start, stop, int(num))
+    if 'logspace' in spec:
+        start, stop, num = spec['logspace']
+        return np.logspace(start, stop, int(num))
+    raise ValueError(f"Parameter '{spec.get('name')}' needs 'values', 'linspace' or 'logspace'")
+
+
+def _parameters(config):
+    parameter = config['parameter']
+    return parameter if isinstance(parameter, list) else [parameter]
+
+
+def _point_params(fixed, name, value):
+    params = dict(fixed)
+    params[name] = float(value)
+    return params
+
+
+def _key(params, g_type):
+    return (params['a'], params['b'], params['alpha'], params['h'], g_type)
+
+
+def sweep_points(config):
+    """Все точки (a, b, α, h, g), которые понадобятся для рисунка"""
+    fixed = dict(DEFAULT_FIXED, **config.get('fixed', {}))
+    keys = []
+    for parameter in _parameters(config):
+        for value in parameter_values(parameter):
+            for g_type in config.get('material_functions', ['exp', 'quadratic', 'linear']):
+                keys.append(_key(_point_params(fixed, parameter['name'], value), g_type))
+    return keys
+
+
+def _solve_chunk(keys):
+    """Выполняется в процессе-исполнителе"""
+    return [find_equilibrium(a, b, alpha, h, g_type) for a, b, alpha, h, g_type in keys]
+
+
+def prefetch_equilibria(keys, n_workers=None):
+    """Решает еще не запомненные точки (в пуле процессов, если их много) и кладет в EQUILIBRIUM_CACHE"""
+    missing = list(dict.fromkeys(key for key in keys if key not in EQUILIBRIUM_CACHE))
+    if not missing:
+        return 0
+
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers > 1 and len(missing) >= MIN_POINTS_FOR_POOL:
+        # Несколько кусков на процесс, чтобы процессы заканчивали примерно одновременно
+        n_chunks = min(len(missing), 4 * n_workers)
+        chunks = [missing[k::n_chunks] for k in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for chunk, results in zip(chunks, executor.map(_solve_chunk, chunks)):
+                EQUILIBRIUM_CACHE.update(zip(chunk, results))
+    else:
+        EQUILIBRIUM_CACHE.update(zip(missing, _solve_chunk(missing)))
+    return len(missing)
+
+
+def _equilibria(params_list, g_type):
+    s_values, w_values = [], []
+    for params in params_list:
+        s_star, w_star = EQUILIBRIUM_CACHE[_key(params, g_type)]
+        s_values.append(np.nan if s_star is None else s_star)
+        w_values.append(np.nan if w_star is None else w_star)
+    return np.array(s_values), np.array(w_values)
+
+
+def run_equilibrium_sweep(config, output_path):
+    """Строит рисунок по конфигурации equilibrium_sweep и сохраняет его в output_path"""
+    quantity = config['quantity']
+    fixed = dict(DEFAULT_FIXED, **config.get('fixed', {}))
+    g_types = config.get('material_functions', ['exp', 'quadratic', 'linear'])
+    parameters = _parameters(config)
+    for g_type in g_types:
+        if g_type not in MATERIAL_FUNCTIONS:
+            raise ValueError(f"Unknown material function: {g_type}. Valid: {list(MATERIAL_FUNCTIONS)}")
+
+    keys = sweep_points(config)
+    n_solved = prefetch_equilibria(keys, config.get('n_workers'))
+    print(f"Равновесия: {len(set(keys))} точек, решено {n_solved}, из кэша {len(set(keys)) - n_solved}")
+
+    if quantity == 's_w':
+        fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    elif quantity == 'phase_curve':
+        fig, axes = plt.subplots(1, len(parameters), figsize=(7 * len(parameters), 6), squeeze=False)
+        axes = axes[0]
+    else:
+        fig, ax = plt.subplots(figsize=(8, 6))
+        axes = [ax]
+
+    for panel, parameter in enumerate(parameters):
+        name = parameter['name']
+        values = parameter_values(parameter)
+        params_list = [_point_params(fixed, name, value) for value in values]
+
+        for idx, g_type in enumerate(g_types):
+            style = {'color': COLORS[idx % len(COLORS)], 'linestyle': LINESTYLES[idx % len(LINESTYLES)],
+                     'linewidth': 1.5, 'label': f'g={g_type}'}
+            s_values, w_values = _equilibria(params_list, g_type)
+
+            if quantity == 's_w':
+                axes[0].plot(values, s_values, **style)
+                axes[1].plot(values, w_values, **style)
+            elif quantity == 'viscosity':
+                # Кажущаяся вязкость: μ(a)/η₀ = (w*)^β
+                beta = np.array([p['beta'] for p in params_list])
+                axes[0].plot(values, w_values ** beta, **style)
+            elif quantity == 'phase_curve':
+                axes[panel].plot(s_values, w_values, **style)
+            elif quantity == 'discriminant':
+                D = [compute_discriminant(s, w, p['a'], p['b'], p['alpha'], p['beta'], p['c'], p['h'], g_type)
+                     if np.isfinite(s) else np.nan for s, w, p in zip(s_values, w_values, params_list)]
+                axes[0].plot(values, D, **style)
+
+        if quantity == 's_w':
+            for ax, label in zip(axes, ['s*', 'w*']):
+                ax.set_xlabel(name)
+                ax.set_ylabel(label)
+        elif quantity == 'phase_curve':
+            axes[panel].set_xlabel('s*')
+            axes[panel].set_ylabel('w*')
+            axes[panel].set_title(parameter.get('title', f'Кривые {{s*({name}), w*({name})}}'))
+        else:
+            axes[0].set_xlabel(name)
+            axes[0].set_ylabel('μ(a)/η₀' if quantity == 'viscosity' else 'D')
+
+    if quantity == 'discriminant':
+        # Линия D=0 (граница между узлом и фокусом)
+        axes[0].axhline(y=0, color='gray', linestyle=':', linewidth=1, alpha=0.5)
+
+    for ax in axes:
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    plt.savefig(output_path)
+    plt.close(fig)
@@ -1,21 +1,33 @@
 from core.base_plotter import GraphPlotter
 from core.function_wrapper import SymPyFunction
+from core.adaptive_sampling import adaptive_sample
 from utils.validators import merge_params
+from matplotlib.collections import LineCollection
+import matplotlib.pyplot as plt
 import numpy as np
+import os
 
 
 class FunctionPlotter(GraphPlotter):
     def __init__(self, global_params):
         super().__init__()
         self.global_params = global_params
+        self.view_ylim = None
+
+    def set_view(self, xlim=None, ylim=None):
+        """Видимая область заранее (до построения кривых) - нужна адаптивной выборке для пересчета в пиксели"""
+        if xlim:
+            self.ax.set_xlim(xlim)
+        self.view_ylim = ylim
+
+    def add_curve_from_latex(self, formula_latex, params, x_range, style, sampling=None, family=None):
+        if any(isinstance(value, (list, tuple, dict)) for value in (params or {}).values()):
+            return self.add_family_from_latex(formula_latex, params, x_range, style, family or {})
 
-    def add_curve_from_latex(self, formula_latex, params, x_range, style):
         func = SymPyFunction(formula_latex)
 
         merged_params = merge_params(self.global_params, params)
 
-        x_values = np.linspace(x_range[0], x_range[1], merged_params.get('n_points', 1000))
-
         symbol_order = [s for s in func.symbols if str(s) == 'x']
         other_symbols = [s for s in func.symbols if str(s) != 'x']
 
@@ -23,6 +35,122 @@ class FunctionPlotter(GraphPlotter):
         func.compile(all_symbols)
 
         param_values = [merged_params[str(s)] for s in other_symbols]
-        y_values = func.func_compiled(x_values, *param_values)
 
-        self.add_curve(x_values, y_values, style)
\ No newline at end of file
+        def evaluate(x):
+            # Формула без x (константа) возвращает скаляр - приводим к форме x
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                if symbol_order:
+                    y = func.func_compiled(x, *param_values)
+                else:
+                    y = func.func_compiled(*param_values)
+            return np.broadcast_to(np.asarray(y, dtype=float), x.shape).copy()
+
+        if isinstance(sampling, str):
+            sampling = {'mode': sampling}
+
+        n_points = int(merged_params.get('n_points', 1000))
+        # На сетках от миллиона точек считаем по кускам в заранее выделенный массив (chunked_threshold в params)
+        if not sampling and n_points >= merged_params.get('chunked_threshold', 1000000):
+            sampling = {'mode': 'chunked'}
+
+        # Режимы экономии памяти (выставляются --memory-budget, см. utils/memory_budget.py)
+        dtype = np.dtype(merged_params.get('plot_dtype', 'float64'))
+        memmap_path = sampling.get('memmap') if sampling else None
+        if memmap_path is None and merged_params.get('memmap_dir'):
+            memmap_path = os.path.join(merged_params['memmap_dir'], f'curve_{len(self.curves)}.npy')
+        if merged_params.get('rasterized'):
+            style = dict(style, rasterized=True)
+
+        if sampling and sampling.get('mode') == 'chunked' and symbol_order:
+            x_values = np.linspace(x_range[0], x_range[1], n_points)
+            y_values = func.evaluate_chunked(
+                symbol_order[0], dict(zip(other_symbols, param_values)), x=x_values,
+                chunk_size=sampling.get('chunk_size', 65536),
+                n_threads=sampling.get('n_threads', 1),
+                memmap_path=memmap_path,
+                dtype=dtype
+            )
+        elif sampling and sampling.get('mode') == 'adaptive':
+            # Размер области графика в пикселях при dpi фигуры
+            bbox = self.ax.get_window_extent()
+            x_values, y_values, _ = adaptive_sample(
+                evaluate, x_range, bbox.width, bbox.height,
+                y_range=self.view_ylim,
+                tolerance_px=sampling.get('tolerance_px', 0.5),
+                initial_points=sampling.get('initial_points', 65),
+                max_depth=sampling.get('max_depth', 16),
+                max_points=sampling.get('max_points', merged_params.get('n_points', 1000))
+            )
+        else:
+            x_values = np.linspace(x_range[0], x_range[1], merged_params.get('n_points', 1000))
+            y_values = func.func_compiled(x_values, *param_values)
+            if dtype != np.float64:
+                y_values = np.asarray(y_values).astype(dtype)
+
+        self.add_curve(x_values, y_values, style)
+
+    def add_family_from_latex(self, formula_latex, params, x_range, style, family):
+        """
+        Семейство кривых: параметры-массивы (списки или {linspace: [начало, конец, n]}).
+        Формула разбирается и компилируется один раз, все кривые считаются одним
+        broadcast-вызовом на сетке (n_кривых × n_x) и рисуются одной LineCollection.
+        family: {colormap: viridis} или {colors: [...]}, label: "α = {alpha}"
+        """
+        func = SymPyFunction(formula_latex)
+        merged_params = merge_params(self.global_params, params)
+
+        # Разворачиваем массивы параметров; все массивы должны быть одной длины (перебираются совместно)
+        arrays = {}
+        for name, value in params.items():
+            if isinstance(value, dict):
+                start, stop, num = value['linspace']
+                value = np.linspace(start, stop, int(num))
+            if isinstance(value, (list, tuple, np.ndarray)):
+                arrays[name] = np.asarray(value, dtype=float)
+        n_curves = len(next(iter(arrays.values())))
+        if any(len(values) != n_curves for values in arrays.values()):
+            raise ValueError(f"Family parameters must have equal lengths: { {k: len(v) for k, v in arrays.items()} }")
+
+        x_symbols = [s for s in func.symbols if str(s) == 'x']
+        other_symbols = [s for s in func.symbols if str(s) != 'x']
+        func.compile(x_symbols + other_symbols)
+
+        x_values = np.linspace(x_range[0], x_range[1], merged_params.get('n_points', 1000))
+        x_grid = x_values[np.newaxis, :]
+        param_values = [arrays[str(s)][:, np.newaxis] if str(s) in arrays else merged_params[str(s)]
+                        for s in other_symbols]
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            y_grid = func.func_compiled(*([x_grid] if x_symbols else []), *param_values)
+        y_grid = np.broadcast_to(np.asarray(y_grid, dtype=float), (n_curves, x_values.size))
+
+        # segments: массив (n_кривых, n_x, 2) без поштучного создания Line2D
+        segments = np.empty((n_curves, x_values.size, 2))
+        segments[:, :, 0] = x_values
+        segments[:, :, 1] = y_grid
+
+        if 'colors' in family:
+            colors = [family['colors'][i % len(family['colors'])] for i in range(n_curves)]
+        else:
+            cmap = plt.get_cmap(family.get('colormap', 'viridis'))
+            colors = cmap(np.linspace(0, 1, n_curves))
+
+        collection = LineCollection(
+            segments,
+            colors=colors,
+            linewidths=style.get('linewidth', 1.5),
+            linestyles=style.get('linestyle', '-'),
+            alpha=style.get('alpha'),
+            rasterized=merged_params.get('rasterized', False)
+        )
+        self.ax.add_collection(collection)
+        self.ax.autoscale_view()
+        self.curves.append(collection)
+
+        # Подписи для легенды - пустые линии-заместители, сами данные в них не дублируются
+        label_template = family.get('label')
+        if label_template:
+            for i in range(n_curves):
+                values = {name: f"{array[i]:g}" for name, array in arrays.items()}
+                self.ax.plot([], [], color=colors[i], linewidth=style.get('linewidth', 1.5),
+                             linestyle=style.get('linestyle', '-'), label=label_template.format(**values))
\ No newline at end of file
@@ -1,7 +1,8 @@
 import sympy as sp # заменяем на короткое название библиотеки чисто для удобства, используется в функции lambdify, которая переводит
 # функция, которая лежит в дереве, в готовую функцию, которую python быстро считает.
-from sympy.parsing.latex import parse_latex #преобразует латех формулу в sympy дерево для удобного хранения, в дальнейшем будет понятно, почему хранить в виде дерева удобною
+from utils.latex_parser import parse_latex #преобразует латех формулу в sympy дерево для удобного хранения (быстрый парсер для нашего подмножества LaTeX, все остальное разбирает sympy), в дальнейшем будет понятно, почему хранить в виде дерева удобною
 import numpy as np #также, чисто для удобства, заменяем библиотеку на ее сокращение np
+from core.chunked_evaluator import ChunkedEvaluator, UnsupportedExpression, DEFAULT_CHUNK_SIZE
 
 
 class SymPyFunction: # создаем базовый класс
@@ -12,7 +13,7 @@ class SymPyFunction: # создаем базовый класс
         self.func_compiled = None
 
     def compile(self, symbol_order):  # компилирует sympy дерево в функцию, на вход получает один параметр - порядок переменных в функции, первый параметр обязателен для метода класса.
-        self.func_compiled = sp.lambdify(symbol_order, self.expr, 'numpy')
+        self.func_compiled = sp.lambdify(symbol_order, self.expr, 'numpy', cse=True)  # cse=True - повторяющиеся подвыражения считаются один раз
         return self.func_compiled
 
     def evaluate(self, **kwargs): # вычисляет значение функции для заданных значений переменных, на вход получает **kwargs:dict - именованные аргументы, хранить удобно именно как именованные переменные,
@@ -23,4 +24,31 @@ class SymPyFunction: # создаем базовый класс
             self.compile(symbol_order)
 
         values = [kwargs[str(sym)] for sym in self.func_compiled.__code__.co_varnames[:len(kwargs)]]
-        return self.func_compiled(*values)
\ No newline at end of file
+        return self.func_compiled(*values)
+
+    def evaluate_chunked(self, x_symbol, param_values, x=None, x_range=None, n_points=None, out=None,
+                         chunk_size=DEFAULT_CHUNK_SIZE, n_threads=1, memmap_path=None, dtype=np.float64):
+        """
+        Вычисление на большой сетке по кускам в заранее выделенный массив (см. core/chunked_evaluator.py).
+        param_values - {символ: число}. Если в формуле есть функция без ufunc, куски считаются через lambdify
+        (временные массивы тогда размера куска, а не всей сетки)
+        """
+        try:
+            evaluator = ChunkedEvaluator(self.expr, x_symbol, param_values, dtype=dtype)
+            return evaluator.evaluate(x=x, x_range=x_range, n_points=n_points, out=out, chunk_size=chunk_size,
+                                      n_threads=n_threads, memmap_path=memmap_path)
+        except UnsupportedExpression:
+            pass
+
+        func = sp.lambdify([x_symbol], self.expr.subs(param_values), 'numpy', cse=True)
+        if x is None:
+            x = np.linspace(x_range[0], x_range[1], n_points)
+        if out is None:
+            if memmap_path:
+                out = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=dtype, shape=(len(x),))
+            else:
+                out = np.empty(len(x), dtype=dtype)
+        for lo in range(0, len(x), chunk_size):
+            hi = min(lo + chunk_size, len(x))
+            out[lo:hi] = func(x[lo:hi])
+        return out
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Поиск предельных циклов (периодических орбит) методом стрельбы по отображению Пуанкаре.
+
+Сечение - уровень y[k] = value, пересекаемый в направлении direction. Из начального приближения
+траектория интегрируется transient единиц времени (устойчивые циклы притягивают), затем до
+пересечения сечения (точка x0) и до следующего пересечения (период T0). Далее метод Ньютона по
+(x, T) для системы
+    φ(x, T) - x = 0,   x[k] = value,
+матрица которой [[M - I, f(φ)], [e_k, 0]]; M = ∂φ/∂x - матрица монодромии, получаемая вместе с
+траекторией из уравнений в вариациях dΦ/dt = J(y)·Φ, Φ(0) = I (якобиан J - символьный).
+
+Мультипликаторы Флоке - собственные значения M сошедшегося цикла; один из них (≈ 1) тривиальный,
+цикл устойчив, если остальные по модулю меньше 1. Начальные приближения обрабатываются параллельно
+в пуле процессов; совпадающие циклы (та же точка на сечении и период) объединяются.
+"""
+
+import os
+import time
+import numpy as np
+from scipy.integrate import solve_ivp
+from concurrent.futures import ProcessPoolExecutor
+
+from models.ode_system import ODESystem
+from core.poincare import next_crossing
+
+
+DEFAULT_SETTINGS = {
+    'direction': 1,
+    'transient': 0.0,
+    't_max': 100.0,
+    'max_iter': 30,
+    'tol': 1e-9,
+    'method': 'DOP853',
+    'rtol': 1e-10,
+    'atol': 1e-12,
+}
+
+# Системы внутри процесса-исполнителя; ядра компилируются с параметрами первого вызова
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations, variable_names, param_values):
+    key = (tuple(equations), tuple(variable_names), tuple(param_values))
+    if key not in _WORKER_SYSTEMS:
+        _WORKER_SYSTEMS[key] = ODESystem(equations, variable_names)
+    return _WORKER_SYSTEMS[key]
+
+
+def _flow_with_monodromy(system, param_values, x, T, settings):
+    """φ(x, T) и матрица монодромии M = ∂φ/∂x (уравнения в вариациях)"""
+    n = len(x)
+
+    def variational(t, z):
+        f, J = system.rhs_and_jacobian(t, z[:n], param_values)
+        return np.concatenate([f, (J @ z[n:].reshape(n, n)).ravel()])
+
+    z0 = np.concatenate([x, np.eye(n).ravel()])
+    sol = solve_ivp(variational, (0.0, T), z0, method=settings['method'], rtol=settings['rtol'],
+                    atol=settings['atol'])
+    if sol.status != 0 or not np.all(np.isfinite(sol.y[:, -1])):
+        return None, None
+    z = sol.y[:, -1]
+    return z[:n], z[n:].reshape(n, n)
+
+
+def shoot(task):
+    """
+    Стрельба из одного начального приближения.
+    Возвращает {'converged', 'point', 'period', 'multipliers', 'iterations'} или {'converged': False, 'reason'}
+    """
+    system = _get_system(task['equations'], task['variable_names'], task['param_values'])
+    param_values = task['param_values']
+    settings = task['settings']
+    index, value, direction = task['index'], float(settings['value']), int(settings['direction'])
+
+    def fun(t, y):
+        return system.right_hand_side(t, y, param_values)
+
+    y = np.asarray(task['guess'], dtype=float)
+    transient = float(settings['transient'])
+    if transient > 0:
+        sol = solve_ivp(fun, (0.0, transient), y, method=settings['method'], rtol=settings['rtol'],
+                        atol=settings['atol'])
+        if sol.status != 0 or not np.all(np.isfinite(sol.y[:, -1])):
+            return {'converged': False, 'reason': 'transient failed'}
+        y = sol.y[:, -1]
+
+    t_max = float(settings['t_max'])
+    crossing = next_crossing(fun, 0.0, y, t_max, index, value, direction, settings['method'],
+                             settings['rtol'], settings['atol'])
+    if crossing is None:
+        return {'converged': False, 'reason': 'no section crossing'}
+    # Точно на сечение: иначе поиск возврата сразу найдет "пересечение" на ошибке округления
+    x = crossing[1]
+    x[index] = value
+    crossing = next_crossing(fun, 0.0, x, t_max, index, value, direction, settings['method'],
+                             settings['rtol'], settings['atol'])
+    if crossing is None:
+        return {'converged': False, 'reason': 'no return to section'}
+    T = T0 = crossing[0]
+
+    n = len(x)
+    tol = float(settings['tol'])
+    phi, M = _flow_with_monodromy(system, param_values, x, T, settings)
+    if phi is None:
+        return {'converged': False, 'reason': 'integration failed'}
+    for iteration in range(1, int(settings['max_iter']) + 1):
+        residual = phi - x
+        if np.linalg.norm(residual) <= tol * (1 + np.linalg.norm(x)):
+            # Вырожденные решения φ(x, T) = x: равновесие на сечении или стянувшийся период
+            if np.linalg.norm(fun(0.0, x)) <= np.sqrt(tol) * (1 + np.linalg.norm(x)):
+                return {'converged': False, 'reason': 'equilibrium'}
+            if T < 1e-3 * T0:
+                return {'converged': False, 'reason': 'period collapsed'}
+            multipliers = np.linalg.eigvals(M)
+            return {'converged': True, 'point': x, 'period': T, 'multipliers': multipliers,
+                    'iterations': iteration}
+
+        A = np.zeros((n + 1, n + 1))
+        A[:n, :n] = M - np.eye(n)
+        A[:n, n] = fun(T, phi)
+        A[n, index] = 1.0
+        b = np.concatenate([-residual, [value - x[index]]])
+        delta = np.linalg.lstsq(A, b, rcond=None)[0]
+
+        # Шаг дробится, пока период положителен, траектория досчитывается (у неустойчивых циклов
+        # соседние траектории могут уходить на бесконечность) и невязка уменьшается
+        step = 1.0
+        while step > 1e-6:
+            x_new, T_new = x + step * delta[:n], T + step * delta[n]
+            if 0 < T_new <= t_max:
+                phi_new, M_new = _flow_with_monodromy(system, param_values, x_new, T_new, settings)
+                if phi_new is not None and np.linalg.norm(phi_new - x_new) < np.linalg.norm(residual):
+                    break
+            step /= 2
+        else:
+            return {'converged': False, 'reason': 'line search failed'}
+        x, T, phi, M = x_new, T_new, phi_new, M_new
+    return {'converged': False, 'reason': 'newton did not converge'}
+
+
+def classify_cycle(multipliers):
+    """(нетривиальные мультипликаторы, устойчив ли цикл): тривиальный - ближайший к 1"""
+    trivial = int(np.argmin(np.abs(multipliers - 1)))
+    others = np.delete(multipliers, trivial)
+    return others, bool(np.all(np.abs(others) < 1))
+
+
+def _same_cycle(a, b, tol):
+    scale = 1 + np.linalg.norm(a['point'])
+    return abs(a['period'] - b['period']) <= 1e-6 * a['period'] + tol and \
+        np.linalg.norm(a['point'] - b['point']) <= 1e-5 * scale
+
+
+def find_limit_cycles(equations, variable_names, param_values, guesses, settings):
+    """
+    Периодические орбиты по списку начальных приближений (полные векторы состояния).
+    settings: variable, value, direction, transient, t_max, max_iter, tol, method, rtol, atol, n_workers.
+    Возвращает список циклов: point (на сечении), period, multipliers, stable, guesses (сколько приближений
+    сошлось к циклу)
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    if settings.get('variable') not in variable_names:
+        raise ValueError(f"Limit cycle section variable must be one of {variable_names}")
+    index = variable_names.index(settings['variable'])
+    tasks = [{'equations': equations, 'variable_names': variable_names, 'param_values': param_values,
+              'guess': guess, 'index': index, 'settings': settings} for guess in guesses]
+
+    start = time.perf_counter()
+    n_workers = min(settings.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(shoot, tasks))
+    else:
+        results = [shoot(task) for task in tasks]
+
+    cycles = []
+    for result in results:
+        if not result['converged']:
+            continue
+        for cycle in cycles:
+            if _same_cycle(cycle, result, float(settings['tol'])):
+                cycle['guesses'] += 1
+                break
+        else:
+            _, stable = classify_cycle(result['multipliers'])
+            cycles.append(dict(result, stable=stable, guesses=1))
+
+    failed = sum(1 for result in results if not result['converged'])
+    print(f"Предельные циклы: {len(tasks)} приближений, найдено {len(cycles)} циклов, "
+          f"не сошлось {failed}, время {time.perf_counter() - start:.2f} с")
+    return cycles
@@ -0,0 +1,156 @@
+"""
+Хранилище траекторий с уровнями детализации для повторных отрисовок с разными xlim (вставки, увеличения).
+
+Решение на сетке из n_points точек хранится пирамидой:
+    уровень 0 - полные данные (t, y_1, ..., y_n);
+    уровень k - ячейки по 2^k отсчетов: минимум и максимум каждой переменной и моменты, где они достигаются.
+Уровень k строится попарным объединением ячеек уровня k-1, вся пирамида занимает ~3 объема данных.
+
+Для окна [x0, x1] шириной n_pixels выбирается самый грубый уровень, у которого в пиксель попадает
+не меньше одной ячейки; каждая ячейка дает две точки (минимум и максимум в порядке по времени), так что
+огибающая кривой на картинке та же, что у полных данных, а число точек ~ 2-4 на пиксель независимо от
+длины решения. Уровни читаются плитками по TILE_SIZE ячеек: пирамида лежит на диске (lod_cache_dir)
+в файлах .npy и открывается через memmap, прочитанные плитки запоминаются в процессе - перекрывающиеся
+окна разных рисунков читают только новые плитки, а повторный запуск не пересчитывает решение.
+"""
+
+import os
+import hashlib
+import numpy as np
+
+
+TILE_SIZE = 4096
+
+# Уровни меньше этого числа ячеек не строятся
+MIN_LEVEL_SIZE = 64
+
+
+def store_key(system, param_values, y0, t_span, method, rtol, atol, n_points):
+    params = tuple(sorted((str(p), float(v)) for p, v in zip(system.params, param_values)))
+    key = (tuple(system.equations_latex), tuple(system.variable_names), params, tuple(float(v) for v in y0),
+           tuple(float(v) for v in t_span), method, float(rtol), float(atol), int(n_points))
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def build_pyramid(t, y):
+    """
+    Уровни пирамиды: [данные (1 + n, N), уровень 1 (4, n, M1), ...];
+    у уровней k >= 1 строки - t минимума, минимум, t максимума, максимум
+    """
+    data = np.vstack([t, y])
+    levels = [data]
+    n = len(y)
+    # Уровень "0 как ячейки": минимум и максимум совпадают с отсчетом
+    current = np.stack([np.broadcast_to(t, y.shape), y, np.broadcast_to(t, y.shape), y])
+    while current.shape[2] >= 2 * MIN_LEVEL_SIZE:
+        if current.shape[2] % 2:
+            current = np.concatenate([current, current[:, :, -1:]], axis=2)
+        left, right = current[:, :, 0::2], current[:, :, 1::2]
+        take_right_min = right[1] < left[1]
+        take_right_max = right[3] > left[3]
+        current = np.stack([
+            np.where(take_right_min, right[0], left[0]),
+            np.where(take_right_min, right[1], left[1]),
+            np.where(take_right_max, right[2], left[2]),
+            np.where(take_right_max, right[3], left[3]),
+        ]).reshape(4, n, -1)
+        levels.append(current)
+    return levels
+
+
+class LODTrajectory:
+    def __init__(self, levels):
+        self.levels = levels          # массивы или memmap (см. build_pyramid)
+        self.tiles = {}               # (уровень, номер плитки) -> прочитанная плитка
+        self.tiles_read = 0
+
+    @classmethod
+    def load(cls, path):
+        n_levels = len([name for name in os.listdir(path) if name.startswith('level_')])
+        return cls([np.load(os.path.join(path, f'level_{k}.npy'), mmap_mode='r') for k in range(n_levels)])
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for k, level in enumerate(self.levels):
+            np.save(os.path.join(path, f'level_{k}.npy'), level)
+
+    @property
+    def n_samples(self):
+        return self.levels[0].shape[1]
+
+    def _tile(self, k, index):
+        key = (k, index)
+        if key not in self.tiles:
+            level = self.levels[k]
+            self.tiles[key] = np.array(level[..., index * TILE_SIZE:(index + 1) * TILE_SIZE])
+            self.tiles_read += 1
+        return self.tiles[key]
+
+    def _range(self, k, lo, hi):
+        """Ячейки [lo, hi) уровня k, собранные из плиток"""
+        first, last = lo // TILE_SIZE, (hi - 1) // TILE_SIZE
+        block = np.concatenate([self._tile(k, i) for i in range(first, last + 1)], axis=-1)
+        return block[..., lo - first * TILE_SIZE:hi - first * TILE_SIZE]
+
+    def window(self, xlim, n_pixels, index):
+        """
+        Точки переменной index для окна xlim по времени при ширине n_pixels.
+        Возвращает (t, y, номер уровня)
+        """
+        t = self.levels[0][0]
+        lo = max(int(np.searchsorted(t, xlim[0], side='right')) - 1, 0)
+        hi = min(int(np.searchsorted(t, xlim[1], side='left')) + 1, self.n_samples)
+        count = max(hi - lo, 1)
+
+        k = int(np.floor(np.log2(count / max(n_pixels, 1)))) if count > n_pixels else 0
+        k = min(max(k, 0), len(self.levels) - 1)
+        if k == 0:
+            block = self._range(0, lo, hi)
+            return block[0], block[1 + index], 0
+
+        # Граничные ячейки захватываются целиком, чтобы линия доходила до краев окна
+        size = self.levels[k].shape[2]
+        block = self._range(k, lo >> k, min(((hi - 1) >> k) + 1, size))[:, index]
+        t_min, y_min, t_max, y_max = block
+        min_first = t_min <= t_max
+        times = np.empty(2 * len(t_min))
+        values = np.empty(2 * len(t_min))
+        times[0::2] = np.where(min_first, t_min, t_max)
+        times[1::2] = np.where(min_first, t_max, t_min)
+        values[0::2] = np.where(min_first, y_min, y_max)
+        values[1::2] = np.where(min_first, y_max, y_min)
+        return times, values, k
+
+
+class LODStore:
+    """Пирамиды траекторий процесса с копией на диске"""
+    def __init__(self):
+        self.trajectories = {}
+        self.stats = {'hits': 0, 'disk': 0, 'built': 0}
+
+    def get(self, key, solve, cache_dir=None):
+        """Пирамида по ключу store_key; solve() -> (t, y) вызывается, только если ее нет ни в памяти, ни на диске"""
+        if key in self.trajectories:
+            self.stats['hits'] += 1
+            return self.trajectories[key]
+
+        path = os.path.join(cache_dir, key) if cache_dir else None
+        if path and os.path.exists(os.path.join(path, 'level_0.npy')):
+            self.stats['disk'] += 1
+            trajectory = LODTrajectory.load(path)
+        else:
+            self.stats['built'] += 1
+            t, y = solve()
+            trajectory = LODTrajectory(build_pyramid(np.asarray(t, dtype=float), np.asarray(y, dtype=float)))
+            if path:
+                trajectory.save(path)
+                # Дальше работаем через memmap - в памяти остаются только прочитанные плитки
+                trajectory = LODTrajectory.load(path)
+        self.trajectories[key] = trajectory
+        return trajectory
+
+    def clear(self):
+        self.trajectories.clear()
+
+
+LOD_STORE = LODStore()
@@ -0,0 +1,245 @@
+"""
+Показатели Ляпунова и долговременные средние (тип конфигурации lyapunov).
+
+Система интегрируется вместе с касательной динамикой dQ/dt = J(t, y)·Q, Q - k касательных векторов,
+J - символьный якобиан уравнений ODESystem (параметро-общее ядро f + J, см. compile_fused_generic).
+Через каждые renorm_interval единиц времени векторы ортонормируются QR-разложением, и логарифмы
+диагонали R прибавляются к суммам: показатели = суммы / время анализа (метод Бенеттина).
+Средние и дисперсии выражений statistics (например, напряжения или w) копятся онлайн
+(Уэлфорд, объединение выборок по Чану) по точкам с шагом sample_interval.
+Ни траектория, ни ряд значений не хранятся: память O(1) по времени; история оценок показателей
+записывается в геометрически редеющих точках (O(log t)).
+
+Развертка по параметрам: точки сетки интегрируются вместе (core/batch_integrator.py, значения
+параметров - массивы по траекториям, QR - пакетное), пакеты по batch_size раздаются пулу процессов.
+"""
+
+import os
+import time
+import numpy as np
+import sympy as sp
+from concurrent.futures import ProcessPoolExecutor
+
+from models.ode_system import ODESystem
+from utils.latex_parser import parse_latex
+from core.batch_integrator import integrate_batch, REACHED_END
+
+
+DEFAULT_SETTINGS = {
+    't_total': 1000.0,
+    'transient': 100.0,
+    'renorm_interval': 1.0,
+    'sample_interval': 0.1,
+    'n_exponents': None,        # None - все
+    'rtol': 1e-6,
+    'atol': 1e-9,
+    'max_steps': 100000,
+    'batch_size': 256,
+    'statistics': {},
+}
+
+QUANTITIES = ['exponents', 'max_exponent']
+
+# Шаг геометрической сетки записи истории оценок
+HISTORY_RATIO = 1.05
+
+# Системы и выражения статистик внутри процесса-исполнителя
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations, variable_names, statistics):
+    key = (tuple(equations), tuple(variable_names), tuple(sorted(statistics.items())))
+    if key not in _WORKER_SYSTEMS:
+        system = ODESystem(equations, variable_names)
+        system.compile_fused_generic()
+        exprs = [parse_latex(str(statistics[name])) for name in sorted(statistics)]
+        extra = set()
+        for expr in exprs:
+            extra.update(s for s in expr.free_symbols if s not in system.variables and s not in system.params
+                         and str(s) != 't')
+        if extra:
+            raise ValueError(f"Statistics use unknown symbols: {sorted(map(str, extra))}")
+        stat_fn = None
+        if exprs:
+            stat_fn = sp.lambdify([sp.Symbol('t')] + system.variables + system.params, exprs, 'numpy', cse=True)
+        _WORKER_SYSTEMS[key] = (system, stat_fn)
+    return _WORKER_SYSTEMS[key]
+
+
+class RunningStats:
+    """Среднее и дисперсия по траекториям онлайн: n, mean, M2 формы (статистики, траектории)"""
+    def __init__(self, n_stats, n_traj):
+        self.n = np.zeros((n_stats, n_traj))
+        self.mean = np.zeros((n_stats, n_traj))
+        self.m2 = np.zeros((n_stats, n_traj))
+
+    def add(self, values):
+        """values: (статистики, траектории, отсчеты); NaN пропускаются"""
+        finite = np.isfinite(values)
+        count = finite.sum(axis=-1)
+        safe = np.where(finite, values, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            batch_mean = np.where(count > 0, safe.sum(axis=-1) / count, 0.0)
+        batch_m2 = np.sum(np.where(finite, (safe - batch_mean[..., np.newaxis]) ** 2, 0.0), axis=-1)
+
+        total = self.n + count
+        delta = batch_mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+        self.mean += delta * weight
+        self.m2 += batch_m2 + delta ** 2 * self.n * weight
+        self.n = total
+
+    def variance(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+
+def _run_chunk(task):
+    """
+    Одна порция точек сетки параметров (траектории пакета).
+    Возвращает exponents (траектории, k), mean/variance (статистики, траектории), failed, history
+    """
+    settings = task['settings']
+    system, stat_fn = _get_system(task['equations'], task['variable_names'], settings['statistics'])
+    names = [str(p) for p in system.params]
+    args = [np.asarray(task['params'][name], dtype=float) * np.ones(task['size']) for name in names]
+
+    n = len(task['variable_names'])
+    k = int(settings['n_exponents'] or n)
+    size = task['size']
+
+    def rhs(t, Z, *param_values):
+        f, J = system.rhs_and_jacobian_generic(t, Z[:n], param_values)
+        Q = Z[n:].reshape(n, k, -1)
+        return np.concatenate([f, np.einsum('ijb,jkb->ikb', J, Q).reshape(n * k, -1)])
+
+    Z = np.empty((n + n * k, size))
+    Z[:n] = np.asarray(task['initial_conditions'], dtype=float)[:, np.newaxis]
+    Z[n:] = np.repeat(np.eye(n)[:, :k].reshape(n * k, 1), size, axis=1)
+
+    renorm = float(settings['renorm_interval'])
+    sample = float(settings['sample_interval'])
+    n_transient = int(np.ceil(float(settings['transient']) / renorm))
+    n_total = int(np.ceil(float(settings['t_total']) / renorm))
+    t0 = task['t0']
+    t_start = t0 + n_transient * renorm
+
+    sums = np.zeros((size, k))
+    failed = np.zeros(size, dtype=bool)
+    stats = RunningStats(len(settings['statistics']), size)
+    history = []
+    next_record = renorm
+
+    for i in range(n_transient + n_total):
+        ta, tb = t0 + i * renorm, t0 + (i + 1) * renorm
+        analysis = i >= n_transient
+        t_eval = None
+        if analysis and stat_fn is not None:
+            first = int(np.floor((ta - t_start) / sample)) + 1
+            last = int(np.floor((tb - t_start) / sample + 1e-9))
+            t_eval = t_start + sample * np.arange(first, last + 1) if last >= first else None
+
+        result = integrate_batch(rhs, (ta, tb), Z, rtol=settings['rtol'], atol=settings['atol'],
+                                 max_steps=settings['max_steps'], args=args, t_eval=t_eval)
+        Z = result[1]
+        failed |= result[2] != REACHED_END
+        Z[:, failed] = np.nan
+
+        if t_eval is not None:
+            out = result[3][:n]
+            param_grid = [a[:, np.newaxis] for a in args]
+            with np.errstate(all='ignore'):
+                values = stat_fn(t_eval, *out, *param_grid)
+            stats.add(np.array([np.broadcast_to(np.asarray(v, dtype=float), out.shape[1:]) for v in values]))
+
+        # Ортонормирование касательных векторов; разошедшиеся траектории не трогаем
+        ok = ~failed
+        Q = Z[n:, ok].reshape(n, k, -1).transpose(2, 0, 1)
+        q, r = np.linalg.qr(Q)
+        Z[n:, ok] = q.transpose(1, 2, 0).reshape(n * k, -1)
+        if analysis:
+            sums[ok] += np.log(np.abs(np.diagonal(r, axis1=1, axis2=2)))
+            elapsed = tb - t_start
+            if elapsed >= next_record - 1e-9:
+                history.append((elapsed, np.where(failed[:, np.newaxis], np.nan, sums / elapsed)))
+                next_record = max(elapsed * HISTORY_RATIO, elapsed + renorm)
+
+    exponents = sums / (n_total * renorm)
+    exponents[failed] = np.nan
+    mean = np.where(failed, np.nan, stats.mean)
+    variance = np.where(failed, np.nan, stats.variance())
+    return exponents, mean, variance, failed, history
+
+
+def lyapunov_sweep(equations, variable_names, initial_conditions, params, grid, t0, settings):
+    """
+    params - значения параметров по именам; grid - {имя параметра: массив значений} (одинаковой длины,
+    точки развертки) или пустой словарь - одна точка.
+    Возвращает словарь: exponents (точки, k), mean/std {статистика: (точки,)}, failed, history
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    settings['statistics'] = dict(settings.get('statistics') or {})
+    system, _ = _get_system(equations, variable_names, settings['statistics'])
+    point_params = dict(params)
+    size = 1
+    for name, values in grid.items():
+        if name not in [str(p) for p in system.params]:
+            raise ValueError(f"Sweep parameter '{name}' is not a parameter of the system")
+        point_params[name] = np.asarray(values, dtype=float)
+        size = len(point_params[name])
+    missing = [str(p) for p in system.params if str(p) not in point_params]
+    if missing:
+        raise ValueError(f"Missing parameters for the Lyapunov analysis: {missing}")
+
+    batch_size = int(settings['batch_size'])
+    tasks = []
+    for start in range(0, size, batch_size):
+        stop = min(start + batch_size, size)
+        chunk = {name: (value[start:stop] if np.ndim(value) else value) for name, value in point_params.items()
+                 if name in [str(p) for p in system.params]}
+        tasks.append({'equations': equations, 'variable_names': variable_names,
+                      'initial_conditions': initial_conditions, 'params': chunk, 'size': stop - start,
+                      't0': t0, 'settings': settings})
+
+    start_time = time.perf_counter()
+    n_workers = min(settings.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_run_chunk, tasks))
+    else:
+        results = [_run_chunk(task) for task in tasks]
+
+    exponents = np.concatenate([r[0] for r in results])
+    mean = np.concatenate([r[1] for r in results], axis=1)
+    variance = np.concatenate([r[2] for r in results], axis=1)
+    failed = np.concatenate([r[3] for r in results])
+    stat_names = sorted(settings['statistics'])
+
+    print(f"Ляпунов: {size} точек ({len(tasks)} пакетов), {exponents.shape[1]} показателей, "
+          f"время анализа {settings['t_total']}, не досчитано {int(failed.sum())}, "
+          f"время {time.perf_counter() - start_time:.2f} с")
+    return {
+        'exponents': exponents,
+        'mean': dict(zip(stat_names, mean)),
+        'std': dict(zip(stat_names, np.sqrt(variance))),
+        'failed': failed,
+        # История оценок - только для одной точки (первый пакет)
+        'history': results[0][4] if size == 1 else [],
+    }
+
+
+def sweep_quantity(result, quantity):
+    """
+    Величина развертки по точкам: exponents (точки, k), max_exponent, <статистика>_mean, <статистика>_std
+    """
+    if quantity == 'exponents':
+        return result['exponents']
+    if quantity == 'max_exponent':
+        return result['exponents'][:, 0]
+    for suffix in ('mean', 'std'):
+        name = quantity[:-len(suffix) - 1]
+        if quantity.endswith('_' + suffix) and name in result[suffix]:
+            return result[suffix][name]
+    valid = QUANTITIES + [f"{name}_{suffix}" for name in result['mean'] for suffix in ('mean', 'std')]
+    raise ValueError(f"Invalid Lyapunov quantity: {quantity}. Valid quantities: {valid}")
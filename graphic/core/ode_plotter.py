@@ -1,14 +1,110 @@
 from core.base_plotter import GraphPlotter
 from models.ode_system import ODESystem
+from models.mol_system import MOLSystem
 from utils.validators import merge_params
-from scipy.integrate import solve_ivp
+from utils.memory_profile import memory_stage
+from core.ode_solver import solve_ode, solve_sensitivity
+from core.solution_cache import SOLUTION_CACHE
+from core.phase_analysis import field_grid, nullclines, equilibria, classify
+from core.basin_map import basin_map, DIVERGED
+from core.uncertainty import propagate_uncertainty
+from core.sde_ensemble import simulate_ensemble
+from core.poincare import compute_sections
+from core.limit_cycles import find_limit_cycles, classify_cycle
+from core.lyapunov import lyapunov_sweep, sweep_quantity
+from core.equilibrium_sweep import parameter_values
+from core.lod_store import LOD_STORE, store_key
+from matplotlib.colors import ListedColormap, TwoSlopeNorm
 import numpy as np
+import matplotlib.pyplot as plt
+import os
+import time
+
+
+# Дисковый кэш сеток правой части (относительно рабочего каталога, как и output/)
+FIELD_GRID_CACHE_DIR = os.path.join('cache', 'field_grids')
+BASIN_CACHE_DIR = os.path.join('cache', 'basins')
+LOD_CACHE_DIR = os.path.join('cache', 'lod')
+
+
+def _field_grid_cache_dir(merged_params):
+    # Дисковый кэш сеток правой части - только по запросу: field_grid_cache: true (каталог cache/field_grids)
+    # или свой каталог field_grid_cache_dir; иначе сетки живут только в памяти процесса
+    if merged_params.get('field_grid_cache_dir'):
+        return merged_params['field_grid_cache_dir']
+    if merged_params.get('field_grid_cache', False):
+        return FIELD_GRID_CACHE_DIR
+    return None
 
 
 class ODEPlotter(GraphPlotter):
-    def __init__(self, global_params):
+    def __init__(self, global_params, trajectories=None):
         super().__init__()
         self.global_params = global_params
+        # Готовые траектории (t, y) для кривых по порядку (конвейер --pipeline, core/pipeline.py)
+        self.trajectories = list(trajectories) if trajectories is not None else None
+
+    def _solve(self, system, param_values, merged_params, t_span, initial_conditions, method, rtol, atol, t_eval):
+        # По умолчанию решения берутся из кэша с контрольными точками (см. core/solution_cache.py);
+        # solution_cache: false в параметрах отключает его
+        if merged_params.get('solution_cache', True):
+            return SOLUTION_CACHE.solve(system, param_values, t_span, initial_conditions, method, rtol, atol, t_eval)
+        return solve_ode(system, param_values, t_span, initial_conditions, method, rtol, atol, t_eval)
+
+    def _allocate(self, shape, dtype, merged_params):
+        # memmap_dir - буфер графика в файле на диске, а не в памяти процесса
+        if merged_params.get('memmap_dir'):
+            path = os.path.join(merged_params['memmap_dir'], f'trajectory_{len(self.curves)}.npy')
+            return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        return np.empty(shape, dtype=dtype)
+
+    def _trajectory(self, system, param_values, merged_params, t_span, initial_conditions, method, rtol, atol, n_points):
+        """
+        Решение на равномерной сетке из n_points точек. Возвращает (t, y).
+        Режимы экономии памяти (выставляются --memory-budget, см. utils/memory_budget.py):
+        plot_dtype - тип буфера графика, ode_chunks - интегрирование по отрезкам сетки с записью
+        в заранее выделенный буфер, memmap_dir - буфер в файле на диске.
+        Если плоттеру переданы готовые траектории, берется очередная из них
+        """
+        if self.trajectories:
+            return self.trajectories.pop(0)
+
+        dtype = np.dtype(merged_params.get('plot_dtype', 'float64'))
+        n_chunks = int(merged_params.get('ode_chunks', 1))
+        t_eval = np.linspace(t_span[0], t_span[1], n_points)
+
+        if n_chunks <= 1:
+            sol = self._solve(system, param_values, merged_params, t_span, initial_conditions, method, rtol, atol, t_eval)
+            if dtype == sol.y.dtype and not merged_params.get('memmap_dir'):
+                return sol.t, sol.y
+            y = self._allocate(sol.y.shape, dtype, merged_params)
+            y[:] = sol.y
+            return sol.t.astype(dtype), y
+
+        # Отрезки идут подряд: состояние в конце отрезка (в float64) - начальное условие следующего.
+        # Кэш решений здесь не используется: он хранит плотный вывод на всем интервале
+        y = self._allocate((len(initial_conditions), n_points), dtype, merged_params)
+        bounds = np.linspace(0, n_points, n_chunks + 1).astype(int)
+        state = np.asarray(initial_conditions, dtype=float)
+        t_start = t_eval[0]
+        filled = 0
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi <= lo:
+                continue
+            if hi - 1 == 0:
+                y[:, 0] = state
+                filled = 1
+                continue
+            sol = solve_ode(system, param_values, (t_start, t_eval[hi - 1]), state, method, rtol, atol, t_eval[lo:hi])
+            # 'auto' выбирает метод один раз, дальше используется выбранный
+            method = getattr(sol, 'method', method)
+            y[:, lo:lo + sol.y.shape[1]] = sol.y
+            filled = lo + sol.y.shape[1]
+            if not sol.success or sol.y.shape[1] != hi - lo:
+                break
+            state = sol.y[:, -1]
+            t_start = t_eval[hi - 1]
+        return t_eval[:filled].astype(dtype), y[:, :filled]
 
     def solve_and_plot_time(self, equations_latex, variable_names, initial_conditions, params, t_span, style_list, solver_method=None):
         system = ODESystem(equations_latex, variable_names)
@@ -23,28 +119,58 @@ class ODEPlotter(GraphPlotter):
         n_points = merged_params.get('n_points', 1000)
         method = solver_method or merged_params.get('default_solver_method', 'DOP853')
 
-        t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
+        if merged_params.get('lod'):
+            self._plot_time_lod(system, param_values, merged_params, t_span_use, initial_conditions, method, rtol,
+                                atol, n_points, style_list)
+            return
 
-        sol = solve_ivp(
-            lambda t, y: system.right_hand_side(t, y, param_values),
-            t_span_use,
-            initial_conditions,
-            method=method,
-            rtol=rtol,
-            atol=atol,
-            t_eval=t_eval
-        )
+        with memory_stage('solve'):
+            t, y = self._trajectory(system, param_values, merged_params, t_span_use, initial_conditions, method, rtol,
+                                    atol, n_points)
 
+        with memory_stage('plot'):
+            for i, style in enumerate(style_list):
+                # Проверяем, нужно ли рисовать на правой оси
+                if isinstance(style, dict):
+                    use_right_axis = style.get('use_right_axis', False)
+                    # Создаем копию стиля без параметра use_right_axis (он не нужен для plot)
+                    plot_style = {k: v for k, v in style.items() if k != 'use_right_axis'}
+                else:
+                    use_right_axis = False
+                    plot_style = style
+                if merged_params.get('rasterized'):
+                    plot_style = dict(plot_style, rasterized=True)
+                self.add_curve(t, y[i], plot_style, use_right_axis=use_right_axis)
+
+    def _visible_pixels(self, merged_params):
+        """Ширина области осей в пикселях при разрешении сохранения (lod_dpi, как у PNG - 300)"""
+        width = self.ax.get_position().width * self.fig.get_figwidth()
+        return int(width * merged_params.get('lod_dpi', 300))
+
+    def _plot_time_lod(self, system, param_values, merged_params, t_span, initial_conditions, method, rtol, atol,
+                       n_points, style_list):
+        """
+        Кривые по пирамиде детализации (core/lod_store.py): берется только видимое окно xlim
+        (заданное до добавления кривых) на уровне, соответствующем ширине в пикселях
+        """
+        key = store_key(system, param_values, initial_conditions, t_span, method, rtol, atol, n_points)
+        trajectory = LOD_STORE.get(
+            key, lambda: self._trajectory(system, param_values, merged_params, t_span, initial_conditions, method,
+                                          rtol, atol, n_points),
+            cache_dir=merged_params.get('lod_cache_dir', LOD_CACHE_DIR))
+        xlim = t_span if self.ax.get_autoscalex_on() else self.ax.get_xlim()
+        n_pixels = self._visible_pixels(merged_params)
+
+        tiles_before = trajectory.tiles_read
+        n_drawn = 0
         for i, style in enumerate(style_list):
-            # Проверяем, нужно ли рисовать на правой оси
-            if isinstance(style, dict):
-                use_right_axis = style.get('use_right_axis', False)
-                # Создаем копию стиля без параметра use_right_axis (он не нужен для plot)
-                plot_style = {k: v for k, v in style.items() if k != 'use_right_axis'}
-            else:
-                use_right_axis = False
-                plot_style = style
-            self.add_curve(sol.t, sol.y[i], plot_style, use_right_axis=use_right_axis)
+            use_right_axis = isinstance(style, dict) and style.get('use_right_axis', False)
+            plot_style = {k: v for k, v in style.items() if k != 'use_right_axis'} if isinstance(style, dict) else style
+            t, y, level = trajectory.window(xlim, n_pixels, i)
+            n_drawn += len(t)
+            self.add_curve(t, y, plot_style, use_right_axis=use_right_axis)
+        print(f"LOD: {trajectory.n_samples} отсчетов, окно [{xlim[0]:g}, {xlim[1]:g}] на {n_pixels} пикс., "
+              f"уровень {level}, прочитано плиток {trajectory.tiles_read - tiles_before}, точек {n_drawn}")
 
     def solve_and_plot_phase(self, equations_latex, variable_names, initial_conditions, params, t_span, var_indices,
                              style, solver_method=None):
@@ -60,55 +186,172 @@ class ODEPlotter(GraphPlotter):
         n_points = merged_params.get('n_points', 1000)
         method = solver_method or merged_params.get('default_solver_method', 'DOP853')
 
-        t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
+        with memory_stage('solve'):
+            t, y = self._trajectory(system, param_values, merged_params, t_span_use, initial_conditions, method, rtol,
+                                    atol, n_points)
 
-        sol = solve_ivp(
-            lambda t, y: system.right_hand_side(t, y, param_values),
-            t_span_use,
-            initial_conditions,
-            method=method,
-            rtol=rtol,
-            atol=atol,
-            t_eval=t_eval
-        )
+        x_var = y[var_indices[0]]
+        y_var = y[var_indices[1]]
+
+        if merged_params.get('rasterized'):
+            style = dict(style, rasterized=True)
+        with memory_stage('plot'):
+            self.add_curve(x_var, y_var, style)
 
-        x_var = sol.y[var_indices[0]]
-        y_var = sol.y[var_indices[1]]
+    def solve_and_plot_section(self, equations_latex, variable_names, initial_conditions, params, t_span,
+                               var_indices, style, section, solver_method=None):
+        """
+        Точки сечения Пуанкаре / стробоскопического отображения (см. core/poincare.py).
+        initial_conditions - одно начальное условие или список; точки каждого рисуются своим цветом
+        (section.colors или палитра section.cmap)
+        """
+        system = ODESystem(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+        param_values = [merged_params[str(p)] for p in system.params]
+
+        t_span_use = merged_params.get('t_span', t_span)
+        rtol = merged_params.get('rtol', 1e-9)
+        atol = merged_params.get('atol', 1e-12)
+        method = solver_method or merged_params.get('default_solver_method', 'DOP853')
 
-        self.add_curve(x_var, y_var, style)
+        initial_list = initial_conditions if isinstance(initial_conditions[0], (list, tuple)) else [initial_conditions]
+        sections = compute_sections(equations_latex, variable_names, initial_list, param_values, merged_params,
+                                    t_span_use, method, rtol, atol, section)
 
-    def add_vector_field(self, equations_latex, variable_names, params, var_indices, field_config):
-        from models.ode_system import ODESystem
-        import numpy as np
+        cmap = plt.get_cmap(section.get('cmap', 'viridis'))
+        colors = section.get('colors') or [cmap(k / max(len(sections) - 1, 1)) for k in range(len(sections))]
+        base_style = dict({'linestyle': 'none', 'marker': '.', 'markersize': 1}, **style)
+        for k, points in enumerate(sections):
+            point_style = dict(base_style, color=colors[k % len(colors)])
+            if k > 0:
+                point_style.pop('label', None)
+            self.add_curve(points[:, 1 + var_indices[0]], points[:, 1 + var_indices[1]], point_style)
 
+    def solve_sensitivity(self, equations_latex, variable_names, initial_conditions, params, t_span,
+                          sensitivity_params, solver_method=None):
+        """
+        Решает систему вместе с уравнениями чувствительности.
+        Возвращает (t, y, S), S[i, k, :] = dy_i/dp_k
+        """
         system = ODESystem(equations_latex, variable_names)
 
         merged_params = merge_params(self.global_params, params)
+
         param_values = [merged_params[str(p)] for p in system.params]
 
-        # Получить пределы осей
-        xlim = self.ax.get_xlim()
-        ylim = self.ax.get_ylim()
+        t_span_use = merged_params.get('t_span', t_span)
+        rtol = merged_params.get('rtol', 1e-9)
+        atol = merged_params.get('atol', 1e-12)
+        n_points = merged_params.get('n_points', 1000)
+        method = solver_method or merged_params.get('default_solver_method', 'DOP853')
+
+        t_eval = np.linspace(t_span_use[0], t_span_use[1], n_points)
 
-        # Создать сетку точек
-        density = field_config.get('density', 20)
-        x_grid = np.linspace(xlim[0], xlim[1], density)
-        y_grid = np.linspace(ylim[0], ylim[1], density)
-        X, Y = np.meshgrid(x_grid, y_grid)
+        sol, S = solve_sensitivity(system, param_values, sensitivity_params, t_span_use, initial_conditions,
+                                   method, rtol, atol, t_eval)
+        return sol.t, sol.y, S
+
+    def solve_and_plot_sensitivity(self, equations_latex, variable_names, initial_conditions, params, t_span,
+                                   sensitivity_params, style_list=None, normalize=False, solver_method=None):
+        """
+        Рисует кривые чувствительности dy_i/dp_k(t).
+        normalize=True - относительная чувствительность (p / y_i) * dy_i/dp_k
+        Каждый стиль содержит ключи variable и param, по умолчанию рисуются все пары
+        """
+        t, y, S = self.solve_sensitivity(equations_latex, variable_names, initial_conditions, params, t_span,
+                                         sensitivity_params, solver_method)
+        merged_params = merge_params(self.global_params, params)
+
+        if not style_list:
+            style_list = [{'variable': var, 'param': p, 'label': f'∂{var}/∂{p}'}
+                          for var in variable_names for p in sensitivity_params]
+
+        for style in style_list:
+            i = variable_names.index(style['variable'])
+            k = list(sensitivity_params).index(style['param'])
+            curve = S[i, k]
+            if normalize:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    curve = merged_params[style['param']] * curve / y[i]
+
+            use_right_axis = style.get('use_right_axis', False)
+            plot_style = {key: v for key, v in style.items() if key not in ('variable', 'param', 'use_right_axis')}
+            self.add_curve(t, curve, plot_style, use_right_axis=use_right_axis)
+
+    def solve_and_plot_uncertainty(self, equations_latex, variable_names, initial_conditions, params, t_span,
+                                   style_list, uncertainty):
+        """
+        Полосы процентилей и медиана по реализациям со случайными параметрами (см. core/uncertainty.py).
+        Стиль i-й переменной задает цвет полос и линию медианы
+        """
+        merged_params = merge_params(self.global_params, params)
+        t_span_use = merged_params.get('t_span', t_span)
+        n_points = merged_params.get('n_points', 1000)
+
+        result = propagate_uncertainty(equations_latex, variable_names, initial_conditions, merged_params,
+                                       t_span_use, n_points, uncertainty)
+        self._plot_bands(result, style_list, result['median'])
+
+    def solve_and_plot_sde(self, equations_latex, variable_names, initial_conditions, params, t_span,
+                           style_list, noise):
+        """
+        Ансамбль траекторий СДУ (см. core/sde_ensemble.py): полосы процентилей, несколько траекторий
+        ансамбля тонкими линиями (path_alpha) и среднее (noise.center: mean) или медиана линией стиля
+        """
+        merged_params = merge_params(self.global_params, params)
+        t_span_use = merged_params.get('t_span', t_span)
+        n_points = merged_params.get('n_points', 1000)
+
+        result = simulate_ensemble(equations_latex, variable_names, initial_conditions, merged_params,
+                                   t_span_use, n_points, noise)
+        center = result['median'] if noise.get('center', 'mean') == 'median' else result['mean']
+        self._plot_bands(result, style_list, center, result['paths'])
+
+    def _plot_bands(self, result, style_list, center, paths=None):
+        """Полосы процентилей и центральная линия по переменным; band_alpha - прозрачность полос
+        (по одной на полосу, по умолчанию внутренние полосы темнее)"""
+        t = result['t']
+        for i, style in enumerate(style_list):
+            use_right_axis = style.get('use_right_axis', False)
+            plot_style = {k: v for k, v in style.items() if k not in ('use_right_axis', 'band_alpha', 'path_alpha')}
+            ax = self.ax2 if use_right_axis and self.ax2 is not None else self.ax
+            color = plot_style.get('color', f'C{i}')
+            alphas = style.get('band_alpha', [0.15 + 0.15 * k for k in range(len(result['bands']))])
+            for (_, _, lower, upper), alpha in zip(result['bands'], alphas):
+                ax.fill_between(t, lower[i], upper[i], color=color, alpha=alpha, linewidth=0)
+            if paths is not None:
+                for path in paths[i]:
+                    ax.plot(t, path, color=color, linewidth=0.5, alpha=style.get('path_alpha', 0.5))
+            self.add_curve(t, center[i], plot_style, use_right_axis=use_right_axis)
 
-        # Вычислить векторы направлений
-        U = np.zeros_like(X)
-        V = np.zeros_like(Y)
+    def field_grid(self, equations_latex, variable_names, params, var_indices, resolution):
+        """
+        Правая часть на сетке по текущим пределам осей (см. core/phase_analysis.py).
+        Сетка общая для векторного поля и изоклин и кэшируется по фактическим пределам осей
+        """
+        system = ODESystem(equations_latex, variable_names)
+
+        merged_params = merge_params(self.global_params, params)
+        param_values = [merged_params[str(p)] for p in system.params]
+
+        # Остальные переменные (если их больше двух) фиксируются нулями
+        base_state = [0.0] * len(variable_names)
+        grid = field_grid(system, param_values, var_indices, base_state, self.ax.get_xlim(), self.ax.get_ylim(),
+                          resolution, cache_dir=_field_grid_cache_dir(merged_params))
+        return system, param_values, base_state, grid
 
-        for i in range(density):
-            for j in range(density):
-                state = [0] * len(variable_names)
-                state[var_indices[0]] = X[i, j]
-                state[var_indices[1]] = Y[i, j]
+    def add_vector_field(self, equations_latex, variable_names, params, var_indices, field_config, resolution=None):
+        """resolution - разрешение общей сетки с изоклинами (стрелки берутся из нее с шагом)"""
+        density = field_config.get('density', 20)
+        grid = None
+        if resolution:
+            _, _, _, fine = self.field_grid(equations_latex, variable_names, params, var_indices, resolution)
+            grid = fine.subsample(density)
+        if grid is None:
+            _, _, _, grid = self.field_grid(equations_latex, variable_names, params, var_indices, density)
 
-                derivatives = system.right_hand_side(0, state, param_values)
-                U[i, j] = derivatives[var_indices[0]]
-                V[i, j] = derivatives[var_indices[1]]
+        X, Y = np.meshgrid(grid.x, grid.y)
+        U, V = grid.U, grid.V
 
         # Простая нормализация - все стрелки одинаковой длины
         magnitude = np.sqrt(U ** 2 + V ** 2)
@@ -125,4 +368,272 @@ class ODEPlotter(GraphPlotter):
             width=field_config.get('width', 0.003),
             headwidth=3,
             headlength=4
-        )
\ No newline at end of file
+        )
+
+    def add_nullclines(self, equations_latex, variable_names, params, var_indices, nullcline_config, resolution):
+        """
+        Нуль-изоклины обеих компонент и положения равновесия (их пересечения, уточненные Ньютоном).
+        nullcline_config: styles - два стиля линий, equilibria - {enabled, color, markersize}
+        """
+        system, param_values, base_state, grid = self.field_grid(equations_latex, variable_names, params,
+                                                                 var_indices, resolution)
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+
+        names = [variable_names[var_indices[0]], variable_names[var_indices[1]]]
+        default_styles = [
+            {'color': 'darkorange', 'linestyle': '--', 'linewidth': 1.2, 'label': f"{names[0]}' = 0"},
+            {'color': 'purple', 'linestyle': '--', 'linewidth': 1.2, 'label': f"{names[1]}' = 0"},
+        ]
+        styles = nullcline_config.get('styles') or default_styles
+        for component in (0, 1):
+            style = dict(styles[component])
+            for k, line in enumerate(nullclines(grid, component)):
+                # Подпись только у первого куска линии, чтобы легенда не повторялась
+                self.ax.plot(line[:, 0], line[:, 1], **(style if k == 0 else
+                                                        {key: v for key, v in style.items() if key != 'label'}))
+
+        equilibria_config = nullcline_config.get('equilibria', {'enabled': True})
+        if equilibria_config.get('enabled', True):
+            points = equilibria(system, param_values, var_indices, base_state, grid)
+            for point in points:
+                print(f"Равновесие: {names[0]}={point['point'][0]:.6g}, {names[1]}={point['point'][1]:.6g}, "
+                      f"{point['kind']}, λ={np.round(point['eigenvalues'], 6)}")
+                # Устойчивые - закрашенные, неустойчивые - пустые, седла - наполовину
+                stable = point['kind'].startswith('stable')
+                fill = 'full' if stable else ('left' if point['kind'] == 'saddle' else 'none')
+                self.ax.plot(*point['point'], marker='o', fillstyle=fill, linestyle='none',
+                             color=equilibria_config.get('color', 'black'),
+                             markerfacecoloralt='white',
+                             markersize=equilibria_config.get('markersize', 8), zorder=5)
+
+        # Линии изоклин не должны менять пределы осей
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+
+    def add_limit_cycles(self, equations_latex, variable_names, params, var_indices, cycle_config):
+        """
+        Предельные циклы (см. core/limit_cycles.py) поверх фазового портрета.
+        Начальные приближения: cycle_config['guesses'] - список состояний или grid: [nx, ny] - сетка
+        в пределах осей (остальные переменные - base_state). Устойчивые циклы рисуются style,
+        неустойчивые - unstable_style. Возвращает список циклов
+        """
+        system = ODESystem(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+        param_values = [merged_params[str(p)] for p in system.params]
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+
+        guesses = cycle_config.get('guesses')
+        if not guesses:
+            nx, ny = cycle_config.get('grid', [4, 4])
+            base_state = cycle_config.get('base_state', [0.0] * len(variable_names))
+            guesses = []
+            for gx in np.linspace(xlim[0], xlim[1], nx + 2)[1:-1]:
+                for gy in np.linspace(ylim[0], ylim[1], ny + 2)[1:-1]:
+                    guess = list(base_state)
+                    guess[var_indices[0]], guess[var_indices[1]] = gx, gy
+                    guesses.append(guess)
+
+        cycles = find_limit_cycles(equations_latex, variable_names, param_values, guesses, cycle_config)
+
+        style = dict({'color': 'black', 'linewidth': 2.0}, **cycle_config.get('style', {}))
+        unstable_style = dict(dict(style, linestyle='--'), **cycle_config.get('unstable_style', {}))
+        n_points = merged_params.get('n_points', 1000)
+        for cycle in cycles:
+            multipliers, _ = classify_cycle(cycle['multipliers'])
+            print(f"Цикл: T={cycle['period']:.8g}, {'устойчивый' if cycle['stable'] else 'неустойчивый'}, "
+                  f"мультипликаторы={np.round(multipliers, 6)}, точка на сечении={np.round(cycle['point'], 6)}, "
+                  f"приближений {cycle['guesses']}")
+            t_eval = np.linspace(0, cycle['period'], n_points)
+            sol = solve_ode(system, param_values, (0, cycle['period']), cycle['point'], 'DOP853', 1e-10, 1e-12,
+                            t_eval)
+            line_style = dict(style if cycle['stable'] else unstable_style)
+            line_style.setdefault('label', f"цикл T={cycle['period']:.4g}")
+            self.ax.plot(sol.y[var_indices[0]], sol.y[var_indices[1]], **line_style)
+
+        # Циклы не должны менять пределы осей
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        return cycles
+
+    def add_basin_map(self, equations_latex, variable_names, params, var_indices, basin_config):
+        """
+        Карта областей притяжения по сетке начальных условий в пределах осей (см. core/basin_map.py).
+        Равновесия: basin_config['equilibria'] = 'auto' (поиск по сетке правой части, как для изоклин)
+        или список точек [[x, y], ...]. Возвращает список равновесий
+        """
+        system = ODESystem(equations_latex, variable_names)
+        merged_params = merge_params(self.global_params, params)
+        param_values = [merged_params[str(p)] for p in system.params]
+        base_state = basin_config.get('base_state', [0.0] * len(variable_names))
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+
+        given = basin_config.get('equilibria', 'auto')
+        if given == 'auto':
+            grid = field_grid(system, param_values, var_indices, base_state, xlim, ylim,
+                              basin_config.get('equilibria_resolution', 401),
+                              cache_dir=_field_grid_cache_dir(merged_params))
+            points = equilibria(system, param_values, var_indices, base_state, grid)
+        else:
+            points = []
+            i, j = var_indices
+            for point in given:
+                state = np.array(base_state, dtype=float)
+                state[i], state[j] = point
+                jac = system.jacobian(0.0, state, param_values)
+                eigenvalues = np.linalg.eigvals(jac[np.ix_([i, j], [i, j])])
+                points.append({'point': tuple(point), 'eigenvalues': eigenvalues, 'kind': classify(eigenvalues)})
+
+        settings = {
+            'xlim': tuple(float(v) for v in xlim),
+            'ylim': tuple(float(v) for v in ylim),
+            'base': int(basin_config.get('base', 64)),
+            'levels': int(basin_config.get('levels', 3)),
+            't_span': tuple(float(v) for v in basin_config['t_span']),
+            'rtol': float(basin_config.get('rtol', merged_params.get('rtol', 1e-6))),
+            'atol': float(basin_config.get('atol', merged_params.get('atol', 1e-9))),
+            'capture_radius': float(basin_config.get('capture_radius', 0.01)),
+            'blowup': float(basin_config.get('blowup', 1e8)),
+            'max_steps': int(basin_config.get('max_steps', 20000)),
+        }
+        start = time.perf_counter()
+        x, y, raster, n_trajectories = basin_map(system, param_values, var_indices, base_state, points, settings,
+                                                 cache_dir=merged_params.get('basin_cache_dir', BASIN_CACHE_DIR))
+        if n_trajectories:
+            print(f"Карта притяжения {raster.shape[1]}×{raster.shape[0]}: {n_trajectories} траекторий "
+                  f"({100 * n_trajectories / raster.size:.1f}% растра), {time.perf_counter() - start:.2f} с")
+        else:
+            print("Карта притяжения взята из кэша")
+
+        # Цвета: по одному на равновесие, затем "ушло на бесконечность" и "не определено"
+        colors = basin_config.get('colors', ['#a6cee3', '#fdbf6f', '#b2df8a', '#fb9a99', '#cab2d6', '#ffff99'])
+        palette = [colors[k % len(colors)] for k in range(len(points))]
+        palette += [basin_config.get('diverged_color', '#404040'), basin_config.get('undetermined_color', 'white')]
+        index = np.where(raster >= 0, raster, np.where(raster == DIVERGED, len(points), len(points) + 1))
+        self.ax.imshow(index, origin='lower', extent=(xlim[0], xlim[1], ylim[0], ylim[1]), aspect='auto',
+                       interpolation='nearest', cmap=ListedColormap(palette), vmin=-0.5,
+                       vmax=len(palette) - 0.5, zorder=0)
+
+        names = [variable_names[var_indices[0]], variable_names[var_indices[1]]]
+        for k, point in enumerate(points):
+            print(f"Равновесие {k + 1}: {names[0]}={point['point'][0]:.6g}, {names[1]}={point['point'][1]:.6g}, "
+                  f"{point['kind']}, доля области: {np.mean(raster == k):.3f}")
+            stable = point['kind'].startswith('stable')
+            fill = 'full' if stable else ('left' if point['kind'] == 'saddle' else 'none')
+            self.ax.plot(*point['point'], marker='o', fillstyle=fill, linestyle='none', color='black',
+                         markerfacecoloralt='white', markersize=8, zorder=5,
+                         label=f"{point['kind']} ({point['point'][0]:.4g}, {point['point'][1]:.4g})")
+        if np.any(raster == DIVERGED):
+            print(f"Доля расходящихся траекторий: {np.mean(raster == DIVERGED):.3f}")
+
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        return points
+
+    def solve_space_time(self, system_config, n_times):
+        """
+        Решает систему метода прямых (models/mol_system.py). Возвращает (t, x, U),
+        U - форма (число полей, число ячеек, n_times)
+        """
+        system = MOLSystem(system_config['fields'], system_config['equations'], system_config['n_cells'],
+                           system_config.get('domain', [0, 1]), system_config.get('boundary'))
+        merged_params = merge_params(self.global_params, system_config.get('params', {}))
+        param_values = [merged_params[str(p)] for p in system.params]
+
+        t_span = merged_params.get('t_span', system_config['t_span'])
+        rtol = merged_params.get('rtol', 1e-6)
+        atol = merged_params.get('atol', 1e-9)
+        # Неявные методы получают разреженный символьный якобиан (см. _jacobian_options)
+        method = system_config.get('solver_method', 'BDF')
+        t_eval = np.linspace(t_span[0], t_span[1], n_times)
+
+        y0 = system.initial_state(system_config['initial_conditions'], param_values)
+        start = time.perf_counter()
+        sol = solve_ode(system, param_values, t_span, y0, method, rtol, atol, t_eval)
+        if not sol.success:
+            raise ValueError(f"Method-of-lines solve failed: {sol.message}")
+        print(f"Метод прямых: {len(system.fields)}×{system.n_cells} = {len(y0)} неизвестных, {method}, "
+              f"nfev={sol.nfev}, njev={sol.njev}, nlu={sol.nlu}, время={time.perf_counter() - start:.2f} с")
+        return sol.t, system.x, sol.y.reshape(len(system.fields), system.n_cells, -1)
+
+    def add_space_time(self, t, x, u, plot_config):
+        """Тепловая карта поля u(x, t): время по горизонтали, координата по вертикали"""
+        mesh = self.ax.pcolormesh(t, x, u, shading='auto', cmap=plot_config.get('cmap', 'viridis'),
+                                  vmin=plot_config.get('vmin'), vmax=plot_config.get('vmax'),
+                                  rasterized=True)
+        colorbar = self.fig.colorbar(mesh, ax=self.ax)
+        colorbar.set_label(plot_config.get('colorbar_label', plot_config['field']))
+
+    def add_profiles(self, t, x, u, plot_config):
+        """Профили поля u(x) в моменты plot_config['times'] (берутся ближайшие сохраненные)"""
+        times = plot_config.get('times', list(np.linspace(t[0], t[-1], 5)))
+        cmap = plt.get_cmap(plot_config.get('cmap', 'viridis'))
+        style = plot_config.get('style', {})
+        for k, moment in enumerate(times):
+            column = int(np.argmin(np.abs(t - moment)))
+            color = cmap(k / max(len(times) - 1, 1))
+            self.add_curve(x, u[:, column], dict({'color': color, 'label': f't={t[column]:.3g}'}, **style))
+
+    def solve_lyapunov(self, system_config, analysis, sweep):
+        """
+        Показатели Ляпунова и статистики (core/lyapunov.py) в точке или на сетке развертки.
+        sweep - 0, 1 или 2 параметра ({name, values | linspace | logspace}).
+        Возвращает (result, значения параметров развертки по осям)
+        """
+        merged_params = merge_params(self.global_params, system_config.get('params', {}))
+        axes_values = [parameter_values(spec) for spec in sweep]
+        grid = {}
+        if axes_values:
+            mesh = np.meshgrid(*axes_values, indexing='ij')
+            grid = {spec['name']: values.ravel() for spec, values in zip(sweep, mesh)}
+
+        result = lyapunov_sweep(system_config['equations'], system_config['variable_names'],
+                                system_config['initial_conditions'], merged_params, grid,
+                                system_config.get('t0', 0.0), analysis)
+        if not axes_values:
+            print(f"Показатели Ляпунова: {np.array2string(result['exponents'][0], precision=4)}")
+            for name in result['mean']:
+                print(f"  {name}: среднее {result['mean'][name][0]:.6g}, "
+                      f"ст. отклонение {result['std'][name][0]:.6g}")
+        return result, axes_values
+
+    def add_lyapunov_history(self, result, plot_config):
+        """Сходимость оценок показателей от времени анализа"""
+        times = np.array([entry[0] for entry in result['history']])
+        estimates = np.array([entry[1][0] for entry in result['history']])
+        style_list = plot_config.get('styles', [])
+        for k in range(estimates.shape[1]):
+            style = dict({'label': f'$\\lambda_{k + 1}$'}, **(style_list[k] if k < len(style_list) else {}))
+            self.add_curve(times, estimates[:, k], style)
+        self.ax.axhline(0.0, color='gray', linewidth=0.8)
+        self.ax.set_xscale('log')
+
+    def add_lyapunov_sweep(self, values, result, plot_config):
+        """Величина plot_config['quantity'] от параметра развертки"""
+        quantity = plot_config.get('quantity', 'exponents')
+        data = sweep_quantity(result, quantity)
+        style_list = plot_config.get('styles', [])
+        if data.ndim == 1:
+            self.add_curve(values, data, dict({'label': quantity}, **(style_list[0] if style_list else {})))
+        else:
+            for k in range(data.shape[1]):
+                style = dict({'label': f'$\\lambda_{k + 1}$'}, **(style_list[k] if k < len(style_list) else {}))
+                self.add_curve(values, data[:, k], style)
+        if quantity in ('exponents', 'max_exponent'):
+            self.ax.axhline(0.0, color='gray', linewidth=0.8)
+
+    def add_lyapunov_map(self, x_values, y_values, result, plot_config):
+        """Карта величины по двум параметрам; для показателей - расходящаяся шкала с нулем в центре"""
+        quantity = plot_config.get('quantity', 'max_exponent')
+        data = sweep_quantity(result, quantity)
+        if data.ndim > 1:
+            data = data[:, 0]
+        data = data.reshape(len(x_values), len(y_values)).T
+        norm = None
+        cmap = plot_config.get('cmap', 'viridis')
+        if quantity in ('exponents', 'max_exponent') and np.any(np.isfinite(data)):
+            limit = max(float(np.nanmax(np.abs(data))), 1e-12)
+            norm = TwoSlopeNorm(0.0, -limit, limit)
+            cmap = plot_config.get('cmap', 'RdBu_r')
+        mesh = self.ax.pcolormesh(x_values, y_values, data, shading='auto', cmap=cmap, norm=norm, rasterized=True)
+        colorbar = self.fig.colorbar(mesh, ax=self.ax)
+        colorbar.set_label(plot_config.get('colorbar_label', quantity))
\ No newline at end of file
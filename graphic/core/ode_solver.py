@@ -0,0 +1,186 @@
+import time
+import numpy as np
+from scipy.integrate import solve_ivp
+
+
+# Методы, между которыми выбирает режим 'auto'
+EXPLICIT_METHOD = 'DOP853'
+IMPLICIT_METHOD = 'Radau'
+
+# Пороги показателя жесткости (спектральный радиус якобиана * длина интервала).
+# Ниже нижнего порога система заведомо нежесткая, выше верхнего - заведомо жесткая,
+# между ними решаем по пробному интегрированию.
+STIFFNESS_LOW = 50.0
+STIFFNESS_HIGH = 1e4
+
+# Доля интервала, на которой запускаются пробные решения
+PROBE_FRACTION = 0.05
+
+
+def estimate_stiffness(system, param_values, t_span, y0):
+    """
+    Оценка жесткости по спектру якобиана в начальной точке:
+    max|Re λ| среди затухающих мод, умноженный на длину интервала интегрирования
+    """
+    try:
+        jac = system.jacobian(t_span[0], y0, param_values)
+        eigenvalues = np.linalg.eigvals(jac)
+    except (ValueError, TypeError, np.linalg.LinAlgError):
+        return np.nan
+
+    decaying = -eigenvalues.real[eigenvalues.real < 0]
+    if decaying.size == 0 or not np.all(np.isfinite(decaying)):
+        return 0.0
+    return float(decaying.max() * abs(t_span[1] - t_span[0]))
+
+
+def _solver_cost(sol, n_vars):
+    # Стоимость в "вычислениях правой части": для неявного метода добавляем якобианы и LU-разложения
+    return sol.nfev + n_vars * (sol.njev + sol.nlu)
+
+
+def _probe(system, param_values, t_span, y0, method, rtol, atol):
+    t_end = t_span[0] + PROBE_FRACTION * (t_span[1] - t_span[0])
+    sol = solve_ivp(
+        lambda t, y: system.right_hand_side(t, y, param_values),
+        (t_span[0], t_end),
+        y0,
+        method=method,
+        rtol=rtol,
+        atol=atol,
+        **_jacobian_options(system, param_values, method)
+    )
+    return sol
+
+
+def _jacobian_options(system, param_values, method):
+    # Явным методам якобиан не нужен (solve_ivp предупреждает о лишнем jac), неявным передаем символьный
+    # вместо конечных разностей
+    if method in ('Radau', 'BDF', 'LSODA'):
+        return {'jac': lambda t, y: system.jacobian(t, y, param_values)}
+    return {}
+
+
+def choose_method(system, param_values, t_span, y0, rtol, atol):
+    """
+    Выбирает между явным и неявным методом.
+    Возвращает (method, info), где info - словарь с оценкой жесткости и стоимостью проб
+    """
+    stiffness = estimate_stiffness(system, param_values, t_span, y0)
+    info = {'stiffness': stiffness}
+
+    if np.isfinite(stiffness) and stiffness < STIFFNESS_LOW:
+        info['reason'] = 'spectrum'
+        return EXPLICIT_METHOD, info
+    if np.isfinite(stiffness) and stiffness > STIFFNESS_HIGH:
+        info['reason'] = 'spectrum'
+        return IMPLICIT_METHOD, info
+
+    # Промежуточная область (или якобиан не вычислился) - пробуем оба метода на начальном отрезке
+    n_vars = len(y0)
+    costs = {}
+    for method in (EXPLICIT_METHOD, IMPLICIT_METHOD):
+        probe = _probe(system, param_values, t_span, y0, method, rtol, atol)
+        costs[method] = _solver_cost(probe, n_vars) if probe.success else np.inf
+    info['reason'] = 'probe'
+    info['probe_costs'] = costs
+
+    method = min(costs, key=costs.get)
+    return method, info
+
+
+def solve_ode(system, param_values, t_span, y0, method, rtol, atol, t_eval, **options):
+    """
+    Обертка над solve_ivp. Для method='auto' метод выбирается автоматически,
+    выбор и стоимость решения печатаются в лог.
+    options передаются в solve_ivp как есть (dense_output, first_step, ...)
+    """
+    if method != 'auto':
+        return solve_ivp(
+            lambda t, y: system.right_hand_side(t, y, param_values),
+            t_span,
+            y0,
+            method=method,
+            rtol=rtol,
+            atol=atol,
+            t_eval=t_eval,
+            **_jacobian_options(system, param_values, method),
+            **options
+        )
+
+    start = time.perf_counter()
+    chosen, info = choose_method(system, param_values, t_span, y0, rtol, atol)
+    probe_time = time.perf_counter() - start
+
+    sol = solve_ivp(
+        lambda t, y: system.right_hand_side(t, y, param_values),
+        t_span,
+        y0,
+        method=chosen,
+        rtol=rtol,
+        atol=atol,
+        t_eval=t_eval,
+        **_jacobian_options(system, param_values, chosen),
+        **options
+    )
+    elapsed = time.perf_counter() - start
+
+    # Если явный метод не справился (слишком мелкий шаг), переключаемся на неявный
+    if not sol.success and chosen == EXPLICIT_METHOD:
+        print(f"auto: {chosen} не справился ({sol.message}), переключаемся на {IMPLICIT_METHOD}")
+        chosen = IMPLICIT_METHOD
+        sol = solve_ivp(
+            lambda t, y: system.right_hand_side(t, y, param_values),
+            t_span,
+            y0,
+            method=chosen,
+            rtol=rtol,
+            atol=atol,
+            t_eval=t_eval,
+            **_jacobian_options(system, param_values, chosen),
+            **options
+        )
+        elapsed = time.perf_counter() - start
+
+    sol.method = chosen
+    sol.auto_info = info
+    print(f"auto: {chosen} (жесткость ≈ {info['stiffness']:.3g}, критерий: {info['reason']}), "
+          f"nfev={sol.nfev}, njev={sol.njev}, nlu={sol.nlu}, "
+          f"время={elapsed:.3f} с (из них выбор {probe_time:.3f} с)")
+    return sol
+
+
+def solve_sensitivity(system, param_values, sensitivity_params, t_span, y0, method, rtol, atol, t_eval,
+                      generic=False):
+    """
+    Одно расширенное интегрирование состояния вместе с чувствительностями dy/dp.
+    generic=True - используется параметро-общая компиляция (без перекомпиляции при смене параметров).
+    Возвращает (sol, S), где S имеет форму (число переменных, число параметров, число точек t)
+    """
+    n, m = len(y0), len(sensitivity_params)
+
+    if method == 'auto':
+        method, _ = choose_method(system, param_values, t_span, y0, rtol, atol)
+        print(f"auto: для расширенной системы выбран {method}")
+
+    # Начальные условия не зависят от параметров, поэтому S(t0) = 0
+    y_aug0 = np.concatenate([np.asarray(y0, dtype=float), np.zeros(n * m)])
+
+    if generic:
+        rhs = system.sensitivity_right_hand_side_generic
+    else:
+        rhs = system.sensitivity_right_hand_side
+
+    sol = solve_ivp(
+        lambda t, y: rhs(t, y, param_values, sensitivity_params),
+        t_span,
+        y_aug0,
+        method=method,
+        rtol=rtol,
+        atol=atol,
+        t_eval=t_eval
+    )
+
+    S = sol.y[n:].reshape(n, m, -1)
+    sol.y = sol.y[:n]
+    return sol, S
@@ -0,0 +1,208 @@
+"""
+Подбор параметров модели по измеренным временным рядам (например, кривым с реометра).
+
+Невязка - разность решения и данных в точках измерений, нормированная на разброс каждого ряда.
+Градиенты берутся не конечными разностями, а из уравнений чувствительности, выведенных
+символьно (ODESystem.sensitivity_equations), поэтому одна итерация - одно расширенное решение.
+Система компилируется один раз в параметро-общем виде и переиспользуется на всех итерациях;
+несколько стартовых точек считаются параллельно в отдельных процессах.
+"""
+
+import os
+import numpy as np
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import least_squares
+
+from models.ode_system import ODESystem
+from core.ode_solver import solve_sensitivity
+from utils.validators import merge_params
+
+
+# Скомпилированные системы внутри процесса-исполнителя: компилируем один раз на процесс
+_WORKER_SYSTEMS = {}
+
+
+def load_measurements(data_config):
+    """
+    Читает CSV с заголовком. Возвращает (t, {переменная: значения}).
+    data_config: {file, time_column, columns: {переменная: столбец CSV}}
+    """
+    table = np.genfromtxt(data_config['file'], delimiter=data_config.get('delimiter', ','),
+                          names=True, dtype=float, encoding='utf-8')
+    t = np.asarray(table[data_config.get('time_column', 't')], dtype=float)
+    observed = {var: np.asarray(table[column], dtype=float) for var, column in data_config['columns'].items()}
+
+    order = np.argsort(t)
+    return t[order], {var: values[order] for var, values in observed.items()}
+
+
+def _get_system(equations_latex, variable_names):
+    key = (tuple(equations_latex), tuple(variable_names))
+    if key not in _WORKER_SYSTEMS:
+        _WORKER_SYSTEMS[key] = ODESystem(equations_latex, variable_names)
+    return _WORKER_SYSTEMS[key]
+
+
+def _fit_from_start(task):
+    """Один запуск least_squares из заданной стартовой точки (выполняется в процессе-исполнителе)"""
+    system = _get_system(task['equations'], task['variable_names'])
+    free_names = task['free_names']
+    base_params = task['params']
+    t_data = task['t']
+    observed = task['observed']
+    scales = task['scales']
+    var_index = [task['variable_names'].index(var) for var in observed]
+
+    def param_vector(x):
+        values = dict(base_params)
+        values.update(zip(free_names, x))
+        return [values[str(p)] for p in system.params]
+
+    cache = {}
+
+    def solve(x):
+        # residuals и jacobian вызываются для одной и той же точки - решаем один раз
+        key = tuple(x)
+        if key not in cache:
+            cache.clear()
+            t_span = [min(task['t_span'][0], t_data[0]), max(task['t_span'][1], t_data[-1])]
+            sol, S = solve_sensitivity(system, param_vector(x), free_names, t_span, task['initial_conditions'],
+                                       task['method'], task['rtol'], task['atol'], t_data, generic=True)
+            cache[key] = (sol, S)
+        return cache[key]
+
+    def residuals(x):
+        sol, _ = solve(x)
+        if not sol.success or sol.y.shape[1] != len(t_data):
+            return np.full(len(t_data) * len(observed), 1e10)
+        return np.concatenate([(sol.y[i] - values) / scale
+                               for i, values, scale in zip(var_index, observed.values(), scales)])
+
+    def jacobian(x):
+        sol, S = solve(x)
+        if not sol.success or S.shape[2] != len(t_data):
+            return np.zeros((len(t_data) * len(observed), len(free_names)))
+        return np.concatenate([S[i].T / scale for i, scale in zip(var_index, scales)])
+
+    result = least_squares(residuals, task['x0'], jac=jacobian, bounds=task['bounds'], x_scale='jac',
+                           max_nfev=task['max_nfev'])
+    return {
+        'x': result.x.tolist(),
+        'cost': float(result.cost),
+        'success': bool(result.success),
+        'nfev': int(result.nfev),
+        'x0': list(task['x0'])
+    }
+
+
+def _start_points(free_names, bounds, initial_guess, n_starts, seed):
+    """Первая точка - значения из params (обрезанные по границам), остальные - случайные в границах"""
+    lower, upper = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    rng = np.random.default_rng(seed)
+
+    starts = [np.clip(initial_guess, lower, upper)]
+    for _ in range(n_starts - 1):
+        point = np.empty(len(free_names))
+        for k in range(len(free_names)):
+            # Для положительных границ шириной больше двух порядков выбираем равномерно по логарифму
+            if lower[k] > 0 and upper[k] / lower[k] > 100:
+                point[k] = np.exp(rng.uniform(np.log(lower[k]), np.log(upper[k])))
+            else:
+                point[k] = rng.uniform(lower[k], upper[k])
+        starts.append(point)
+    return starts
+
+
+def fit_parameters(config, global_params):
+    """
+    Подбирает свободные параметры. Возвращает словарь с лучшими параметрами и итогами всех стартов
+    """
+    system_config = config['system']
+    merged_params = merge_params(global_params, system_config.get('params', {}))
+
+    t_data, observed = load_measurements(config['data'])
+    for var in observed:
+        if var not in system_config['variable_names']:
+            raise ValueError(f"Measured variable '{var}' is not in variable_names")
+
+    free_names = list(config['free_params'])
+    bounds = ([config['free_params'][name][0] for name in free_names],
+              [config['free_params'][name][1] for name in free_names])
+    initial_guess = [merged_params.get(name, 0.5 * (lo + hi))
+                     for name, lo, hi in zip(free_names, bounds[0], bounds[1])]
+
+    # Нормируем невязку каждого ряда, чтобы s (~100) не подавляло w (~0.1)
+    scales = [max(np.std(values), np.max(np.abs(values)) * 1e-3, 1e-12) for values in observed.values()]
+
+    # Проверяем, что свободные параметры действительно входят в уравнения (иначе чувствительность не определена)
+    system = ODESystem(system_config['equations'], system_config['variable_names'])
+    missing = [name for name in free_names if name not in {str(p) for p in system.params}]
+    if missing:
+        raise ValueError(f"Free parameters {missing} do not appear in the equations")
+
+    base_params = {str(p): merged_params[str(p)] for p in system.params if str(p) in merged_params}
+    base_params.update(dict(zip(free_names, initial_guess)))
+
+    task_template = {
+        'equations': system_config['equations'],
+        'variable_names': system_config['variable_names'],
+        'initial_conditions': system_config['initial_conditions'],
+        't_span': system_config.get('t_span', [t_data[0], t_data[-1]]),
+        'params': base_params,
+        'free_names': free_names,
+        'bounds': bounds,
+        't': t_data,
+        'observed': observed,
+        'scales': scales,
+        'method': system_config.get('solver_method') or merged_params.get('default_solver_method', 'DOP853'),
+        'rtol': merged_params.get('rtol', 1e-8),
+        'atol': merged_params.get('atol', 1e-10),
+        'max_nfev': config.get('max_nfev', 100)
+    }
+
+    starts = _start_points(free_names, bounds, initial_guess, config.get('n_starts', 4), config.get('seed', 0))
+    tasks = [dict(task_template, x0=start) for start in starts]
+
+    n_workers = min(config.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_fit_from_start, tasks))
+    else:
+        results = [_fit_from_start(task) for task in tasks]
+
+    best = min(results, key=lambda r: r['cost'])
+    fitted = dict(system_config.get('params', {}))
+    fitted.update({name: float(value) for name, value in zip(free_names, best['x'])})
+
+    return {'params': fitted, 'best': best, 'starts': results, 'free_params': free_names,
+            't_span': [float(v) for v in task_template['t_span']]}
+
+
+def write_fitted_config(config, fit_result, output_path):
+    """Записывает готовый к построению YAML (тип ode_time) с подобранными параметрами"""
+    system_config = config['system']
+    colors = ['blue', 'red', 'green', 'orange', 'purple']
+    styles = [{'color': colors[i % len(colors)], 'linestyle': '-', 'linewidth': 1.5, 'label': name}
+              for i, name in enumerate(system_config['variable_names'])]
+
+    rendered = {
+        'type': 'ode_time',
+        'curves': [{
+            'equations': list(system_config['equations']),
+            'variable_names': list(system_config['variable_names']),
+            'initial_conditions': list(system_config['initial_conditions']),
+            'params': fit_result['params'],
+            't_span': [float(v) for v in system_config.get('t_span', fit_result['t_span'])],
+            'styles': config.get('styles', styles)
+        }],
+        'axes': config.get('axes', {'xlabel': 't', 'grid': True}),
+        'output': os.path.splitext(os.path.basename(output_path))[0] + '.svg'
+    }
+    if system_config.get('solver_method'):
+        rendered['curves'][0]['solver_method'] = system_config['solver_method']
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f"# Параметры подобраны по данным {config['data']['file']}, "
+                f"сумма квадратов невязки: {2 * fit_result['best']['cost']:.6g}\n")
+        yaml.safe_dump(rendered, f, allow_unicode=True, sort_keys=False)
@@ -0,0 +1,182 @@
+"""
+Изоклины нуля (нуль-изоклины) и положения равновесия на фазовой плоскости.
+
+Правая часть вычисляется один раз на сетке по пределам осей (векторизованно, без циклов по точкам).
+Эта же сетка обслуживает векторное поле: его стрелки берутся из сетки с шагом, поэтому при
+одновременном построении поля и изоклин правая часть не считается дважды. Вычисленные сетки
+кэшируются в памяти процесса по фактическим пределам осей, а по запросу (field_grid_cache в params)
+и на диске, так что смена оформления (цвета, стили, подписи) не пересчитывает сетку.
+
+Нуль-изоклины - линии уровня 0 компонент правой части (contourpy, тот же алгоритм, что у
+matplotlib.contour). Равновесия: ячейки сетки, где меняют знак обе компоненты, дают начальные
+приближения, которые уточняются методом Ньютона с символьным якобианом.
+"""
+
+import os
+import hashlib
+import pickle
+import numpy as np
+import contourpy
+
+
+# Сетки текущего процесса: {ключ: FieldGrid}
+_GRID_CACHE = {}
+
+NEWTON_MAX_ITER = 50
+NEWTON_TOL = 1e-10
+
+
+class FieldGrid:
+    def __init__(self, x, y, U, V):
+        self.x = x    # узлы по первой переменной (по горизонтали)
+        self.y = y    # узлы по второй переменной
+        self.U = U    # компонента правой части по первой переменной, форма (len(y), len(x))
+        self.V = V
+
+    @property
+    def resolution(self):
+        return len(self.x)
+
+    def subsample(self, density):
+        """Сетка для стрелок векторного поля: каждый k-й узел, если density совместима с разрешением"""
+        step = (self.resolution - 1) // (density - 1) if density > 1 else 1
+        if step < 1 or (density - 1) * step != self.resolution - 1:
+            return None
+        return FieldGrid(self.x[::step], self.y[::step], self.U[::step, ::step], self.V[::step, ::step])
+
+
+def shared_resolution(density, resolution):
+    """Разрешение не меньше resolution, при котором узлы сетки стрелок (density) совпадают с узлами сетки"""
+    if density <= 1:
+        return resolution
+    step = max(1, int(np.ceil((resolution - 1) / (density - 1))))
+    return (density - 1) * step + 1
+
+
+def _grid_key(system, param_values, var_indices, base_state, xlim, ylim, resolution):
+    params = tuple(sorted((str(p), float(v)) for p, v in zip(system.params, param_values)))
+    return (tuple(system.equations_latex), tuple(system.variable_names), params, tuple(var_indices),
+            tuple(float(v) for v in base_state), tuple(float(v) for v in xlim), tuple(float(v) for v in ylim),
+            int(resolution))
+
+
+def _evaluate(system, param_values, var_indices, base_state, xlim, ylim, resolution):
+    x = np.linspace(xlim[0], xlim[1], resolution)
+    y = np.linspace(ylim[0], ylim[1], resolution)
+    X, Y = np.meshgrid(x, y)
+
+    # Остальные переменные фиксированы значениями base_state; параметры передаются аргументами
+    state = [np.full_like(X, value) for value in base_state]
+    state[var_indices[0]] = X
+    state[var_indices[1]] = Y
+    if system.generic_compiled is None:
+        system.compile_generic()
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        result = system.generic_compiled(0.0, *state, *param_values)
+    # Компонента-константа возвращается скаляром - приводим к форме сетки
+    U = np.broadcast_to(np.asarray(result[var_indices[0]], dtype=float), X.shape).copy()
+    V = np.broadcast_to(np.asarray(result[var_indices[1]], dtype=float), X.shape).copy()
+    return FieldGrid(x, y, U, V)
+
+
+def field_grid(system, param_values, var_indices, base_state, xlim, ylim, resolution, cache_dir=None):
+    """
+    Правая часть на сетке resolution × resolution по пределам осей.
+    cache_dir - каталог дискового кэша (None - только кэш процесса)
+    """
+    key = _grid_key(system, param_values, var_indices, base_state, xlim, ylim, resolution)
+    if key in _GRID_CACHE:
+        return _GRID_CACHE[key]
+
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pkl')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                grid = pickle.load(f)
+            _GRID_CACHE[key] = grid
+            return grid
+
+    grid = _evaluate(system, param_values, var_indices, base_state, xlim, ylim, resolution)
+    _GRID_CACHE[key] = grid
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(grid, f)
+    return grid
+
+
+def nullclines(grid, component):
+    """Линии уровня 0 компоненты (0 - по первой переменной, 1 - по второй): список массивов (k, 2)"""
+    Z = grid.U if component == 0 else grid.V
+    if not np.any(np.isfinite(Z)):
+        return []
+    generator = contourpy.contour_generator(grid.x, grid.y, np.ma.masked_invalid(Z))
+    return [line for line in generator.lines(0.0) if len(line) > 1]
+
+
+def _sign_change_cells(Z):
+    corners = np.stack([Z[:-1, :-1], Z[:-1, 1:], Z[1:, :-1], Z[1:, 1:]])
+    with np.errstate(invalid='ignore'):
+        return np.all(np.isfinite(corners), axis=0) & (corners.min(axis=0) <= 0) & (corners.max(axis=0) >= 0)
+
+
+def equilibria(system, param_values, var_indices, base_state, grid):
+    """
+    Положения равновесия в пределах сетки. Возвращает список словарей
+    {point: (x, y), eigenvalues, kind} - вид определяется по собственным числам якобиана 2×2
+    """
+    cells = np.argwhere(_sign_change_cells(grid.U) & _sign_change_cells(grid.V))
+    i, j = var_indices
+    dx = grid.x[1] - grid.x[0]
+    dy = grid.y[1] - grid.y[0]
+
+    found = []
+    for row, col in cells:
+        state = np.array(base_state, dtype=float)
+        state[i] = grid.x[col] + 0.5 * dx
+        state[j] = grid.y[row] + 0.5 * dy
+
+        converged = False
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for _ in range(NEWTON_MAX_ITER):
+                f, jac = system.rhs_and_jacobian(0.0, state, param_values)
+                F = f[[i, j]]
+                J = jac[np.ix_([i, j], [i, j])]
+                try:
+                    step = np.linalg.solve(J, -F)
+                except np.linalg.LinAlgError:
+                    break
+                if not np.all(np.isfinite(step)):
+                    break
+                state[i] += step[0]
+                state[j] += step[1]
+                if np.max(np.abs(step)) <= NEWTON_TOL * (1 + np.max(np.abs(state[[i, j]]))):
+                    converged = True
+                    break
+        if not converged:
+            continue
+
+        point = (state[i], state[j])
+        # Точка должна остаться в пределах сетки и не совпадать с уже найденной
+        if not (grid.x[0] - dx <= point[0] <= grid.x[-1] + dx and grid.y[0] - dy <= point[1] <= grid.y[-1] + dy):
+            continue
+        if any(abs(point[0] - e['point'][0]) < dx and abs(point[1] - e['point'][1]) < dy for e in found):
+            continue
+
+        _, jac = system.rhs_and_jacobian(0.0, state, param_values)
+        eigenvalues = np.linalg.eigvals(jac[np.ix_([i, j], [i, j])])
+        found.append({'point': point, 'eigenvalues': eigenvalues, 'kind': classify(eigenvalues)})
+    return found
+
+
+def classify(eigenvalues):
+    real = eigenvalues.real
+    complex_pair = np.any(np.abs(eigenvalues.imag) > 1e-12 * np.max(np.abs(eigenvalues) + 1e-300))
+    if np.all(np.abs(real) < 1e-12) and complex_pair:
+        return 'center'
+    if np.all(real < 0):
+        return 'stable focus' if complex_pair else 'stable node'
+    if np.all(real > 0):
+        return 'unstable focus' if complex_pair else 'unstable node'
+    return 'saddle'
@@ -0,0 +1,266 @@
+"""
+Конвейер "решение -> отрисовка" для пакета конфигураций (--batch --pipeline).
+
+В обычном режиме кривые рисунка решаются и рисуются по очереди в одном процессе, поэтому
+интегрирование и построение/запись SVG не перекрываются. В конвейере:
+- процессы-решатели берут задачи Коши из очереди и записывают траектории прямо в блоки
+  multiprocessing.shared_memory (массивы не сериализуются, по очереди идет только имя блока);
+- процессы-отрисовщики получают рисунок, у которого решены все кривые, подключаются к блокам
+  и строят рисунок обычными функциями main.py, передавая им готовые траектории;
+- главный процесс раздает задачи и создает/освобождает блоки. Очереди задач и рисунков
+  ограничены, число рисунков "в работе" тоже, поэтому медленная стадия притормаживает
+  быструю, а память под траектории ограничена.
+Время пакета стремится к max(решение, отрисовка) вместо их суммы.
+
+Блоки создает и удаляет главный процесс и держит их открытыми до конца отрисовки - так блок
+не пропадет раньше времени и на Windows, где память освобождается с последним дескриптором.
+"""
+
+import gc
+import os
+import time
+import queue
+import numpy as np
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import shared_memory, resource_tracker
+
+from models.ode_system import ODESystem
+from core.ode_solver import solve_ode
+from core.solve_planner import PLANNED_TYPES, curve_solve
+
+
+# Системы внутри процесса-решателя. right_hand_side компилируется с параметрами первого вызова,
+# поэтому ключ включает значения параметров
+_WORKER_SYSTEMS = {}
+
+POLL_INTERVAL = 0.05
+
+
+def _get_system(equations, variable_names, param_values):
+    key = (tuple(equations), tuple(variable_names), tuple(param_values))
+    if key not in _WORKER_SYSTEMS:
+        _WORKER_SYSTEMS[key] = ODESystem(equations, variable_names)
+    return _WORKER_SYSTEMS[key]
+
+
+def _solver_worker(task_queue, ready_queue):
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        start = time.perf_counter()
+        try:
+            system = _get_system(task['equations'], task['variable_names'], task['param_values'])
+            t_eval = np.linspace(task['t_span'][0], task['t_span'][1], task['shape'][1])
+            sol = solve_ode(system, task['param_values'], task['t_span'], task['y0'], task['method'],
+                            task['rtol'], task['atol'], t_eval)
+            block = shared_memory.SharedMemory(name=task['block'])
+            buffer = np.ndarray(task['shape'], dtype=np.float64, buffer=block.buf)
+            filled = sol.y.shape[1]
+            buffer[:, :filled] = sol.y
+            del buffer
+            block.close()
+            ready_queue.put((task['id'], filled, None, time.perf_counter() - start))
+        except Exception as error:
+            ready_queue.put((task['id'], 0, repr(error), time.perf_counter() - start))
+
+
+def _render_worker(render, render_queue, done_queue):
+    while True:
+        item = render_queue.get()
+        if item is None:
+            break
+        index, config, descriptors = item
+        start = time.perf_counter()
+        blocks = []
+        trajectories = None
+        if descriptors is not None:
+            trajectories = []
+            for name, shape, filled, t_span in descriptors:
+                block = shared_memory.SharedMemory(name=name)
+                blocks.append(block)
+                y = np.ndarray(shape, dtype=np.float64, buffer=block.buf)[:, :filled]
+                t = np.linspace(t_span[0], t_span[1], shape[1])[:filled]
+                trajectories.append((t, y))
+
+        error = None
+        try:
+            render(config, trajectories=trajectories)
+        except Exception as exc:
+            error = repr(exc)
+
+        # Линии matplotlib ссылаются на массивы в блоках - сначала освобождаем рисунок
+        trajectories = None
+        gc.collect()
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass
+        done_queue.put((index, error, time.perf_counter() - start))
+
+
+class _Figure:
+    def __init__(self, index, config):
+        self.index = index
+        self.config = config
+        self.slots = []          # по кривой: идентификатор задачи
+
+
+def _default_workers():
+    cpus = os.cpu_count() or 1
+    renderers = max(1, cpus // 3)
+    return max(1, cpus - renderers), renderers
+
+
+def run_pipeline(configs, render, global_params, n_solvers=None, n_renderers=None, max_in_flight=None):
+    """
+    Строит все рисунки пакета конвейером. render(config, trajectories=...) - функция построения
+    одного рисунка (trajectories - готовые (t, y) по кривым в порядке конфигурации или None).
+    Возвращает статистику: время решения и отрисовки (сумма по процессам), общее время, число задач
+    """
+    default_solvers, default_renderers = _default_workers()
+    n_solvers = n_solvers or default_solvers
+    n_renderers = n_renderers or default_renderers
+    max_in_flight = max_in_flight or n_solvers + 2 * n_renderers
+
+    ctx = mp.get_context()
+    # Ограниченные очереди дают обратное давление; очереди ответов несут только короткие сообщения
+    task_queue = ctx.Queue(maxsize=2 * n_solvers)
+    render_queue = ctx.Queue(maxsize=n_renderers)
+    ready_queue = ctx.Queue()
+    done_queue = ctx.Queue()
+
+    solvers = [ctx.Process(target=_solver_worker, args=(task_queue, ready_queue), daemon=True)
+               for _ in range(n_solvers)]
+    renderers = [ctx.Process(target=_render_worker, args=(render, render_queue, done_queue), daemon=True)
+                 for _ in range(n_renderers)]
+    if os.name == 'posix':
+        # Трекер общих ресурсов запускается до процессов, чтобы они унаследовали один трекер;
+        # иначе каждый процесс заведет свой и при выходе "освободит" чужие блоки
+        resource_tracker.ensure_running()
+    for process in solvers + renderers:
+        process.start()
+
+    stats = {'solve_time': 0.0, 'render_time': 0.0, 'tasks': 0, 'shared_tasks': 0, 'errors': []}
+    start = time.perf_counter()
+
+    systems = {}
+    tasks = {}           # id -> {'block', 'shape', 't_span', 'filled', 'done', 'error', 'figures'}
+    task_by_key = {}     # одинаковые задачи разных рисунков решаются один раз и делят блок
+    figures = {}
+    pending_tasks = deque()
+    pending_renders = deque()
+    next_config = 0
+    finished = 0
+
+    def admit(index):
+        config = configs[index]
+        figure = _Figure(index, config)
+        figures[index] = figure
+        requests = []
+        if config.get('type') in PLANNED_TYPES:
+            requests = [curve_solve(curve, global_params, systems) for curve in config['curves']]
+        if not requests or any(request is None for request in requests):
+            # Кривых нет или их нельзя решить заранее - рисунок решает их сам
+            pending_renders.append((index, config, None))
+            return
+
+        for key, planned in requests:
+            task_key = (key, planned.t_span[1], planned.n_points)
+            if task_key in task_by_key and task_by_key[task_key] in tasks:
+                task_id = task_by_key[task_key]
+                stats['shared_tasks'] += 1
+            else:
+                task_id = stats['tasks']
+                shape = (len(planned.y0), planned.n_points)
+                block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+                tasks[task_id] = {'block': block, 'shape': shape, 't_span': planned.t_span, 'filled': 0,
+                                  'done': False, 'error': None, 'figures': set()}
+                task_by_key[task_key] = task_id
+                stats['tasks'] += 1
+                pending_tasks.append({
+                    'id': task_id, 'block': block.name, 'shape': shape, 'equations': planned.equations,
+                    'variable_names': planned.variable_names, 'param_values': planned.param_values,
+                    'y0': planned.y0, 't_span': planned.t_span, 'method': planned.method,
+                    'rtol': planned.rtol, 'atol': planned.atol
+                })
+            tasks[task_id]['figures'].add(index)
+            figure.slots.append(task_id)
+        _maybe_ready(figure)
+
+    def _maybe_ready(figure):
+        if not figure.slots or not all(tasks[task_id]['done'] for task_id in figure.slots):
+            return
+        if any(tasks[task_id]['error'] for task_id in figure.slots):
+            pending_renders.append((figure.index, figure.config, None))
+            return
+        descriptors = [(tasks[task_id]['block'].name, tasks[task_id]['shape'], tasks[task_id]['filled'],
+                        tasks[task_id]['t_span']) for task_id in figure.slots]
+        pending_renders.append((figure.index, figure.config, descriptors))
+
+    def release(index):
+        figure = figures.pop(index)
+        for task_id in set(figure.slots):
+            task = tasks[task_id]
+            task['figures'].discard(index)
+            if not task['figures']:
+                task['block'].close()
+                task['block'].unlink()
+                del tasks[task_id]
+
+    try:
+        while finished < len(configs):
+            while next_config < len(configs) and len(figures) < max_in_flight:
+                admit(next_config)
+                next_config += 1
+
+            while pending_tasks:
+                try:
+                    task_queue.put_nowait(pending_tasks[0])
+                except queue.Full:
+                    break
+                pending_tasks.popleft()
+            while pending_renders:
+                try:
+                    render_queue.put_nowait(pending_renders[0])
+                except queue.Full:
+                    break
+                pending_renders.popleft()
+
+            try:
+                task_id, filled, error, elapsed = ready_queue.get(timeout=POLL_INTERVAL)
+                task = tasks[task_id]
+                task.update(done=True, filled=filled, error=error)
+                stats['solve_time'] += elapsed
+                for index in sorted(task['figures']):
+                    _maybe_ready(figures[index])
+            except queue.Empty:
+                pass
+
+            while True:
+                try:
+                    index, error, elapsed = done_queue.get_nowait()
+                except queue.Empty:
+                    break
+                stats['render_time'] += elapsed
+                if error:
+                    stats['errors'].append((configs[index].get('output'), error))
+                release(index)
+                finished += 1
+    finally:
+        for _ in solvers:
+            task_queue.put(None)
+        for _ in renderers:
+            render_queue.put(None)
+        for process in solvers + renderers:
+            process.join()
+        for task in tasks.values():
+            task['block'].close()
+            task['block'].unlink()
+
+    stats['total_time'] = time.perf_counter() - start
+    stats['n_solvers'] = n_solvers
+    stats['n_renderers'] = n_renderers
+    return stats
@@ -0,0 +1,193 @@
+"""
+Сечения Пуанкаре и стробоскопические отображения (кривая phase_portrait с блоком section).
+
+Для систем с периодическим воздействием (например, a(t) = a0·(1 + ε·sin ωt)) нужна не траектория,
+а ее точки на сечении:
+    stroboscopic - состояние в моменты t0 + phase + k·period, k = 0, 1, ...;
+    crossing     - пересечения уровня variable = value в направлении direction (+1, -1 или 0 - любом).
+Траектория не сохраняется: решатель (scipy OdeSolver) делается шаг за шагом, на каждом шаге
+точки сечения находятся по плотному выводу шага (моменты стробоскопа - интерполяцией, пересечения -
+корнем brentq), и в буфер попадают только они. Память - O(число точек сечения) независимо от
+длины интегрирования, поэтому можно считать 10^5 периодов.
+
+Несколько начальных условий считаются параллельно в пуле процессов.
+"""
+
+import os
+import time
+import numpy as np
+import sympy as sp
+from scipy.integrate import RK23, RK45, DOP853, Radau, BDF, LSODA
+from scipy.optimize import brentq
+from concurrent.futures import ProcessPoolExecutor
+
+from models.ode_system import ODESystem
+from utils.latex_parser import parse_latex
+
+
+SOLVERS = {'RK23': RK23, 'RK45': RK45, 'DOP853': DOP853, 'Radau': Radau, 'BDF': BDF, 'LSODA': LSODA}
+MODES = ['stroboscopic', 'crossing']
+
+DEFAULT_SETTINGS = {
+    'mode': 'stroboscopic',
+    'phase': 0.0,
+    'n_periods': 1000,
+    'value': 0.0,
+    'direction': 1,
+    'max_points': 100000,
+    'transient': 0,
+}
+
+# Системы внутри процесса-исполнителя; right_hand_side компилируется с параметрами первого вызова
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations, variable_names, param_values):
+    key = (tuple(equations), tuple(variable_names), tuple(param_values))
+    if key not in _WORKER_SYSTEMS:
+        _WORKER_SYSTEMS[key] = ODESystem(equations, variable_names)
+    return _WORKER_SYSTEMS[key]
+
+
+class SectionBuffer:
+    """Растущий буфер точек сечения: строки (t, y_1, ..., y_n), емкость удваивается при заполнении"""
+    def __init__(self, width, capacity=1024):
+        self.data = np.empty((capacity, width))
+        self.size = 0
+
+    def append(self, rows):
+        rows = np.atleast_2d(rows)
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            capacity = len(self.data)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty((capacity, self.data.shape[1]))
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = rows
+        self.size = needed
+
+    def array(self):
+        return self.data[:self.size].copy()
+
+
+def section_period(period, params):
+    """Период стробоскопа: число или выражение LaTeX от параметров ("2 * \\pi / \\omega")"""
+    if isinstance(period, (int, float)):
+        return float(period)
+    expr = parse_latex(str(period)).subs(sp.Symbol('pi'), sp.pi)
+    expr = expr.subs({symbol: params[str(symbol)] for symbol in expr.free_symbols if str(symbol) in params})
+    if expr.free_symbols:
+        raise ValueError(f"Section period depends on unknown symbols: {sorted(map(str, expr.free_symbols))}")
+    return float(expr)
+
+
+def _sign_change(old, new, value, direction):
+    """Пересекает ли шаг уровень value в направлении direction"""
+    g_old, g_new = old - value, new - value
+    if g_old == 0 or np.sign(g_old) == np.sign(g_new):
+        return False
+    return direction * (g_new - g_old) >= 0
+
+
+def next_crossing(fun, t0, y0, t_max, index, value, direction, method='DOP853', rtol=1e-9, atol=1e-12):
+    """
+    Первое пересечение уровня y[index] = value после t0 (точка на самом уровне в t0 не считается).
+    Возвращает (t, y) или None, если пересечения нет до t_max
+    """
+    solver = SOLVERS[method](fun, t0, np.asarray(y0, dtype=float), t_max, rtol=rtol, atol=atol)
+    while solver.status == 'running':
+        t_old, y_old = solver.t, solver.y.copy()
+        solver.step()
+        if solver.status == 'failed':
+            return None
+        if solver.t != t_old and _sign_change(y_old[index], solver.y[index], value, direction):
+            dense = solver.dense_output()
+            t_cross = brentq(lambda t: dense(t)[index] - value, t_old, solver.t, xtol=1e-12)
+            return t_cross, dense(t_cross)
+    return None
+
+
+def trace_section(task):
+    """Точки сечения одной траектории: массив (точки, 1 + переменные) - столбец времени и состояние"""
+    system = _get_system(task['equations'], task['variable_names'], task['param_values'])
+    settings = task['settings']
+    mode = settings['mode']
+    t0, t_end = task['t_span']
+    y0 = np.asarray(task['initial_conditions'], dtype=float)
+
+    period = task.get('period')
+    if mode == 'stroboscopic':
+        first = t0 + float(settings['phase'])
+        t_end = first + int(settings['n_periods']) * period
+    index = task['variable_names'].index(settings['variable']) if mode == 'crossing' else None
+    value, direction = float(settings['value']), int(settings['direction'])
+    max_points = int(settings['transient']) + int(settings['max_points'])
+
+    solver = SOLVERS[task['method']](lambda t, y: system.right_hand_side(t, y, task['param_values']),
+                                     t0, y0, t_end, rtol=task['rtol'], atol=task['atol'])
+    buffer = SectionBuffer(len(y0) + 1)
+    next_k = 0
+    if mode == 'stroboscopic' and first == t0:
+        buffer.append(np.concatenate([[t0], y0]))
+        next_k = 1
+
+    while solver.status == 'running' and buffer.size < max_points:
+        t_old, y_old = solver.t, solver.y.copy()
+        message = solver.step()
+        if solver.status == 'failed':
+            raise ValueError(f"Section integration failed at t={solver.t}: {message}")
+        if solver.t == t_old:
+            continue
+
+        # Плотный вывод шага (у DOP853 - дополнительные вычисления правой части) строится
+        # только для шагов, на которых есть точка сечения
+        if mode == 'stroboscopic':
+            # Моменты стробоскопа внутри шага (t_old, t]
+            last_k = int(np.floor((solver.t - first) / period + 1e-12))
+            if last_k >= next_k:
+                # Последний момент может превышать solver.t на ошибку округления
+                times = np.minimum(first + period * np.arange(next_k, last_k + 1), solver.t)
+                buffer.append(np.column_stack([times, np.atleast_2d(solver.dense_output()(times)).T]))
+                next_k = last_k + 1
+        elif _sign_change(y_old[index], solver.y[index], value, direction):
+            dense = solver.dense_output()
+            t_cross = brentq(lambda t: dense(t)[index] - value, t_old, solver.t, xtol=1e-12)
+            buffer.append(np.concatenate([[t_cross], dense(t_cross)]))
+
+    points = buffer.array()
+    return points[int(settings['transient']):max_points]
+
+
+def compute_sections(equations, variable_names, initial_conditions_list, param_values, params, t_span, method,
+                     rtol, atol, settings):
+    """
+    Сечения для нескольких начальных условий (параллельно при n_workers > 1).
+    Возвращает список массивов (точки, 1 + переменные) в порядке начальных условий
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    if settings['mode'] not in MODES:
+        raise ValueError(f"Invalid section mode: {settings['mode']}. Valid modes: {MODES}")
+    if method not in SOLVERS:
+        raise ValueError(f"Section integration needs a scipy solver method, got: {method}. Valid: {list(SOLVERS)}")
+    if settings['mode'] == 'crossing' and settings.get('variable') not in variable_names:
+        raise ValueError(f"Section variable must be one of {variable_names}")
+
+    period = section_period(settings['period'], params) if settings['mode'] == 'stroboscopic' else None
+    tasks = [{'equations': equations, 'variable_names': variable_names, 'initial_conditions': y0,
+              'param_values': param_values, 't_span': t_span, 'method': method, 'rtol': rtol, 'atol': atol,
+              'settings': settings, 'period': period} for y0 in initial_conditions_list]
+
+    start = time.perf_counter()
+    n_workers = min(settings.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            sections = list(executor.map(trace_section, tasks))
+    else:
+        sections = [trace_section(task) for task in tasks]
+
+    total = sum(len(points) for points in sections)
+    print(f"Сечение ({settings['mode']}): {len(tasks)} траекторий, {total} точек, "
+          f"время {time.perf_counter() - start:.2f} с")
+    return sections
@@ -0,0 +1,184 @@
+"""
+Ансамбль траекторий стохастической системы (кривая с блоком noise, models/sde_system.py).
+
+Траектории ансамбля интегрируются вместе схемой Эйлера-Маруямы или Мильштейна с постоянным шагом dt:
+состояние - массив (переменные, траектории), одна итерация считает снос и диффузию сразу для всех
+траекторий пакета. Приращения dW генерируются блоками по noise_block шагов одним вызовом генератора
+(поток чисел идет в порядке шаг - переменная - траектория, поэтому размер блока на результат не влияет).
+
+Траектории делятся на пакеты по batch_size - память ограничена пакетом и блоком шума. Пакеты
+раздаются процессам; пакет k получает собственный генератор из SeedSequence(seed).spawn(...),
+поэтому результат не зависит от числа процессов. Как и в core/uncertainty.py, решения пакета сразу
+сводятся в гистограммы по точкам вывода (квантили) и суммы (среднее); траектории не хранятся,
+кроме n_sample_paths первых траекторий первого пакета для рисунка.
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from models.sde_system import SDESystem
+from core.uncertainty import QuantileHistogram, histogram_range
+
+
+SCHEMES = ['euler_maruyama', 'milstein']
+
+DEFAULT_SETTINGS = {
+    'scheme': 'milstein',
+    'dt': 1e-3,
+    'n_paths': 1000,
+    'batch_size': 250,
+    'noise_block': 256,
+    'seed': 0,
+    'bins': 256,
+    'bands': [[5, 95], [25, 75]],
+    'n_sample_paths': 5,
+}
+
+# Системы внутри процесса-исполнителя
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations_latex, diffusion_latex, variable_names):
+    key = (tuple(equations_latex), tuple(str(g) for g in diffusion_latex), tuple(variable_names))
+    if key not in _WORKER_SYSTEMS:
+        system = SDESystem(equations_latex, diffusion_latex, variable_names)
+        system.compile()
+        _WORKER_SYSTEMS[key] = system
+    return _WORKER_SYSTEMS[key]
+
+
+def time_grid(t_span, dt, n_points):
+    """
+    Шаг, число шагов и шаг вывода (stride): шаг подгоняется так, чтобы точки вывода
+    (не больше n_points) попадали точно на шаги схемы
+    """
+    length = t_span[1] - t_span[0]
+    n_steps = max(1, int(np.ceil(length / dt)))
+    n_out = max(1, min(int(n_points), n_steps + 1) - 1)
+    stride = int(np.ceil(n_steps / n_out))
+    n_steps = stride * n_out
+    return length / n_steps, n_steps, stride
+
+
+def _integrate(task, size, seed):
+    """Один пакет траекторий: массив (переменные, траектории, точки вывода)"""
+    system = _get_system(task['equations'], task['diffusion'], task['variable_names'])
+    param_values = [task['params'][str(p)] for p in system.params]
+    rng = np.random.default_rng(seed)
+    dt, n_steps, stride = task['dt'], task['n_steps'], task['stride']
+    milstein = task['scheme'] == 'milstein'
+
+    n_vars = len(task['variable_names'])
+    Y = np.repeat(np.asarray(task['initial_conditions'], dtype=float)[:, np.newaxis], size, axis=1)
+    out = np.empty((n_vars, size, n_steps // stride + 1))
+    out[:, :, 0] = Y
+
+    step = 0
+    with np.errstate(over='ignore', invalid='ignore'):
+        while step < n_steps:
+            block = min(task['noise_block'], n_steps - step)
+            dW = rng.standard_normal((block, n_vars, size)) * np.sqrt(dt)
+            for k in range(block):
+                f, g, correction = system.coefficients(task['t0'] + step * dt, Y, param_values)
+                Y = Y + f * dt + g * dW[k]
+                if milstein:
+                    Y += correction * (dW[k] * dW[k] - dt)
+                step += 1
+                if step % stride == 0:
+                    out[:, :, step // stride] = Y
+    return out
+
+
+def _summarize(out, lower, upper, bins):
+    """Счетчики гистограмм, суммы и число конечных значений по точкам, число разошедшихся траекторий"""
+    histogram = QuantileHistogram(lower, upper, bins)
+    histogram.add(out)
+    finite = np.isfinite(out)
+    sums = np.where(finite, out, 0.0).sum(axis=1)
+    failed = int(np.sum(~np.all(finite[:, :, -1], axis=0)))
+    return histogram.counts, sums, finite.sum(axis=1), failed
+
+
+def _run_batch(task):
+    out = _integrate(task, task['size'], task['seed'])
+    return _summarize(out, task['lower'], task['upper'], task['bins'])
+
+
+def simulate_ensemble(equations_latex, variable_names, initial_conditions, params, t_span, n_points, settings):
+    """
+    params - значения параметров по именам (сноса и диффузии).
+    settings - блок noise кривой (diffusion, scheme, dt, n_paths, batch_size, noise_block, seed, ...).
+    Возвращает словарь: t, mean и median (переменные, точки), bands [(нижний %, верхний %, нижняя, верхняя)],
+    paths (переменные, траектории, точки), n_paths, failed
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    if settings['scheme'] not in SCHEMES:
+        raise ValueError(f"Invalid noise scheme: {settings['scheme']}. Valid schemes: {SCHEMES}")
+    system = _get_system(equations_latex, settings['diffusion'], variable_names)
+    missing = [str(p) for p in system.params if str(p) not in params]
+    if missing:
+        raise ValueError(f"Missing parameters for the stochastic system: {missing}")
+
+    # float(): PyYAML читает 1e-3 (без точки) как строку
+    dt, n_steps, stride = time_grid(t_span, float(settings['dt']), n_points)
+    n_paths = int(settings['n_paths'])
+    batch_size = min(int(settings['batch_size']), n_paths)
+    sizes = [batch_size] * (n_paths // batch_size)
+    if n_paths % batch_size:
+        sizes.append(n_paths % batch_size)
+    seeds = np.random.SeedSequence(settings['seed']).spawn(len(sizes))
+
+    task = {
+        'equations': equations_latex,
+        'diffusion': settings['diffusion'],
+        'variable_names': variable_names,
+        'initial_conditions': initial_conditions,
+        'params': {str(p): params[str(p)] for p in system.params},
+        'scheme': settings['scheme'],
+        't0': t_span[0],
+        'dt': dt,
+        'n_steps': n_steps,
+        'stride': stride,
+        'noise_block': int(settings['noise_block']),
+        'bins': int(settings['bins']),
+    }
+
+    start = time.perf_counter()
+    # Первый пакет задает границы гистограмм и дает траектории для рисунка
+    out = _integrate(task, sizes[0], seeds[0])
+    lower, upper = histogram_range(out)
+    paths = out[:, :int(settings['n_sample_paths']), :].copy()
+    counts, sums, finite, failed = _summarize(out, lower, upper, task['bins'])
+    del out
+
+    tasks = [dict(task, size=size, seed=seed, lower=lower, upper=upper) for size, seed in zip(sizes[1:], seeds[1:])]
+    n_workers = min(settings.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_run_batch, tasks))
+    else:
+        results = [_run_batch(t) for t in tasks]
+
+    histogram = QuantileHistogram(lower, upper, task['bins'])
+    histogram.merge(counts)
+    for batch_counts, batch_sums, batch_finite, batch_failed in results:
+        histogram.merge(batch_counts)
+        sums += batch_sums
+        finite += batch_finite
+        failed += batch_failed
+
+    bands = []
+    for low_percent, high_percent in settings['bands']:
+        bands.append((low_percent, high_percent, histogram.quantiles(low_percent / 100),
+                      histogram.quantiles(high_percent / 100)))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(finite > 0, sums / finite, np.nan)
+
+    print(f"СДУ ({settings['scheme']}): {n_paths} траекторий ({len(sizes)} пакетов по {batch_size}), "
+          f"dt={dt:.3g}, {n_steps} шагов, разошлось {failed}, время {time.perf_counter() - start:.2f} с")
+    t = t_span[0] + dt * stride * np.arange(n_steps // stride + 1)
+    return {'t': t, 'mean': mean, 'median': histogram.quantiles(0.5), 'bands': bands, 'paths': paths,
+            'n_paths': n_paths, 'failed': failed}
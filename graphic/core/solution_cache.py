@@ -0,0 +1,118 @@
+"""
+Кэш решений с контрольными точками.
+
+Для каждой задачи Коши (уравнения, параметры, начальное условие в t0, метод, допуски) хранится
+плотный вывод (OdeSolution), последнее состояние и последний шаг. Повторный запрос:
+- внутри уже решенного интервала обслуживается интерполяцией плотного вывода (любая сетка t_eval);
+- с более длинным горизонтом продолжает интегрирование с сохраненной точки и дописывает сегмент,
+  так что расширение t_span с [0, 8] до [0, 20] стоит только отрезка [8, 20].
+Кэш ограничен max_entries решениями (solution_cache_size в params_global): при переполнении
+вытесняется решение, к которому дольше всего не обращались, так что длинный --batch или подбор
+параметров не копит плотные выводы всех решенных задач.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy.integrate import OdeSolution
+from scipy.optimize import OptimizeResult
+
+from core.ode_solver import solve_ode
+
+
+class SolutionCheckpoint:
+    def __init__(self, dense, method):
+        self.dense = dense        # OdeSolution на всем решенном интервале
+        self.method = method      # фактический метод (для 'auto' - выбранный)
+
+    @property
+    def t_end(self):
+        return self.dense.ts[-1]
+
+    @property
+    def y_end(self):
+        return self.dense(self.t_end)
+
+    @property
+    def last_step(self):
+        # Последний принятый шаг - с него продолжаем, чтобы не разгонять шаг заново
+        if len(self.dense.ts) < 2:
+            return None
+        return abs(self.dense.ts[-1] - self.dense.ts[-2])
+
+    def extend(self, segment):
+        ts = np.concatenate([self.dense.ts, segment.ts[1:]])
+        self.dense = OdeSolution(ts, self.dense.interpolants + segment.interpolants)
+
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+class SolutionCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.checkpoints = OrderedDict()   # от давно не использованных к недавним
+        self.stats = {'hits': 0, 'extensions': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(system, param_values, y0, t0, method, rtol, atol):
+        params = tuple(sorted((str(p), float(v)) for p, v in zip(system.params, param_values)))
+        return (tuple(system.equations_latex), tuple(system.variable_names), params,
+                tuple(float(v) for v in y0), float(t0), method, float(rtol), float(atol))
+
+    def solve(self, system, param_values, t_span, y0, method, rtol, atol, t_eval):
+        """То же, что solve_ode, но с переиспользованием и продолжением ранее найденных решений"""
+        t0, t1 = t_span
+        if t1 <= t0:
+            # Интегрирование назад по времени не кэшируем
+            return solve_ode(system, param_values, t_span, y0, method, rtol, atol, t_eval)
+
+        key = self.make_key(system, param_values, y0, t0, method, rtol, atol)
+        checkpoint = self.checkpoints.get(key)
+
+        if checkpoint is None:
+            self.stats['misses'] += 1
+            sol = solve_ode(system, param_values, t_span, y0, method, rtol, atol, t_eval, dense_output=True)
+            if sol.success:
+                self._store(key, SolutionCheckpoint(sol.sol, getattr(sol, 'method', method)))
+            return sol
+
+        self.checkpoints.move_to_end(key)
+        if t1 <= checkpoint.t_end:
+            self.stats['hits'] += 1
+            return self._result(checkpoint, t_eval, nfev=0, message='Served from dense output.')
+
+        # Продолжаем с контрольной точки до нового горизонта
+        self.stats['extensions'] += 1
+        print(f"Кэш решений: продолжение с t={checkpoint.t_end:g} до t={t1:g}")
+        segment = solve_ode(system, param_values, (checkpoint.t_end, t1), checkpoint.y_end, checkpoint.method,
+                            rtol, atol, None, dense_output=True, first_step=checkpoint.last_step)
+        if not segment.success:
+            return solve_ode(system, param_values, t_span, y0, method, rtol, atol, t_eval)
+
+        checkpoint.extend(segment.sol)
+        return self._result(checkpoint, t_eval, nfev=segment.nfev, message=segment.message)
+
+    def _store(self, key, checkpoint):
+        self.checkpoints[key] = checkpoint
+        while len(self.checkpoints) > max(int(self.max_entries), 1):
+            self.checkpoints.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    @staticmethod
+    def _result(checkpoint, t_eval, nfev, message):
+        if t_eval is None:
+            t = checkpoint.dense.ts
+        else:
+            t = np.asarray(t_eval, dtype=float)
+        y = np.atleast_2d(checkpoint.dense(t))
+        return OptimizeResult(t=t, y=y, sol=checkpoint.dense, success=True, status=0, message=message,
+                              nfev=nfev, njev=0, nlu=0, method=checkpoint.method,
+                              t_events=None, y_events=None)
+
+    def clear(self):
+        self.checkpoints.clear()
+
+
+# Общий кэш процесса: одно решение обслуживает все кривые и конфигурации, запускаемые в этом процессе
+SOLUTION_CACHE = SolutionCache()
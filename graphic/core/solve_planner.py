@@ -0,0 +1,132 @@
+"""
+Планирование решений ОДУ для пакета конфигураций (--batch).
+
+До построения графиков все конфигурации пакета читаются, и каждая запрошенная задача Коши
+приводится к нормальному виду - тому же ключу, по которому ODEPlotter ищет решение в кэше
+(core/solution_cache.py): уравнения, параметры после merge_params с params_global, начальное
+условие и t0, метод, допуски. Одинаковые задачи объединяются; задачи, отличающиеся только
+концом интервала, объединяются в одну с наибольшим t1 (короткие интервалы содержатся в длинном).
+Каждая уникальная задача решается один раз, решение кладется в SOLUTION_CACHE, и кривые всех
+рисунков затем обслуживаются интерполяцией плотного вывода.
+"""
+
+import time
+
+from models.ode_system import ODESystem
+from core.solution_cache import SOLUTION_CACHE, SolutionCache
+from utils.validators import merge_params
+
+
+# Типы конфигураций, кривые которых решаются через кэш решений ODEPlotter
+PLANNED_TYPES = ('ode_time', 'phase_portrait')
+
+
+class PlannedSolve:
+    def __init__(self, equations, variable_names, param_values, y0, t_span, method, rtol, atol, n_points):
+        self.equations = equations
+        self.variable_names = variable_names
+        self.param_values = param_values
+        self.y0 = y0
+        self.t_span = list(t_span)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.n_points = n_points
+        self.requests = 0           # сколько кривых обслуживает задача
+        self.requested_length = 0.0 # суммарная длина их интервалов
+
+
+def curve_solve(curve, global_params, systems):
+    """
+    Нормализованная задача Коши одной кривой: (ключ кэша решений, PlannedSolve)
+    или None, если кривая решается мимо кэша решений или ее нельзя нормализовать.
+    systems - словарь разобранных систем по (уравнения, переменные), общий для вызовов
+    """
+    if curve.get('uncertainty') or curve.get('noise') or curve.get('section'):
+        # Ансамбли (core/uncertainty.py, core/sde_ensemble.py) и сечения (core/poincare.py)
+        # решаются своими интеграторами
+        return None
+    merged_params = merge_params(global_params, curve.get('params', {}))
+    # Те же условия, при которых ODEPlotter идет мимо кэша решений; кривые lod берут решение из своей пирамиды
+    if not merged_params.get('solution_cache', True) or int(merged_params.get('ode_chunks', 1)) > 1 \
+            or merged_params.get('lod'):
+        return None
+
+    system_key = (tuple(curve['equations']), tuple(curve['variable_names']))
+    if system_key not in systems:
+        systems[system_key] = ODESystem(curve['equations'], curve['variable_names'])
+    system = systems[system_key]
+
+    if any(str(p) not in merged_params for p in system.params):
+        # Ошибку в конфигурации сообщит сам рисунок при построении
+        return None
+    param_values = [merged_params[str(p)] for p in system.params]
+    t_span = merged_params.get('t_span', curve['t_span'])
+    if t_span[1] <= t_span[0]:
+        return None
+    method = curve.get('solver_method') or merged_params.get('default_solver_method', 'DOP853')
+    rtol = merged_params.get('rtol', 1e-9)
+    atol = merged_params.get('atol', 1e-12)
+    n_points = merged_params.get('n_points', 1000)
+
+    key = SolutionCache.make_key(system, param_values, curve['initial_conditions'], t_span[0], method, rtol, atol)
+    return key, PlannedSolve(curve['equations'], curve['variable_names'], param_values, curve['initial_conditions'],
+                             t_span, method, rtol, atol, n_points)
+
+
+def _requests(config, global_params, systems):
+    """Нормализованные задачи Коши кривых одной конфигурации: список (ключ, PlannedSolve)"""
+    if config.get('type') not in PLANNED_TYPES:
+        return []
+    found = [curve_solve(curve, global_params, systems) for curve in config['curves']]
+    return [request for request in found if request is not None]
+
+
+def plan_solves(configs, global_params):
+    """
+    Уникальные задачи пакета: {ключ кэша решений: PlannedSolve}.
+    Интервал задачи - от общего t0 до наибольшего запрошенного t1
+    """
+    systems = {}
+    plan = {}
+    for config in configs:
+        for key, request in _requests(config, global_params, systems):
+            planned = plan.setdefault(key, request)
+            planned.t_span[1] = max(planned.t_span[1], request.t_span[1])
+            planned.requests += 1
+            planned.requested_length += request.t_span[1] - request.t_span[0]
+    return plan
+
+
+def execute_plan(plan):
+    """
+    Решает каждую уникальную задачу один раз (в SOLUTION_CACHE).
+    Возвращает статистику: запрошено/решено задач, запрошенная/проинтегрированная длина интервалов, время
+    """
+    stats = {'requested': 0, 'unique': 0, 'requested_length': 0.0, 'solved_length': 0.0, 'time': 0.0}
+    if len(plan) > SOLUTION_CACHE.max_entries:
+        print(f"План решений: {len(plan)} задач не помещаются в кэш решений ({SOLUTION_CACHE.max_entries}), "
+              f"вытесненные решаются заново при построении (solution_cache_size в params_global)")
+    start = time.perf_counter()
+    for key, planned in plan.items():
+        stats['requested'] += planned.requests
+        stats['requested_length'] += planned.requested_length
+        stats['unique'] += 1
+        if key in SOLUTION_CACHE.checkpoints and SOLUTION_CACHE.checkpoints[key].t_end >= planned.t_span[1]:
+            continue
+        stats['solved_length'] += planned.t_span[1] - planned.t_span[0]
+
+        # Отдельная система на задачу: right_hand_side компилируется с параметрами первого вызова
+        system = ODESystem(planned.equations, planned.variable_names)
+        SOLUTION_CACHE.solve(system, planned.param_values, tuple(planned.t_span), planned.y0, planned.method,
+                             planned.rtol, planned.atol, None)
+    stats['time'] = time.perf_counter() - start
+    return stats
+
+
+def format_plan_stats(stats):
+    saved = stats['requested'] - stats['unique']
+    share = 1 - stats['solved_length'] / stats['requested_length'] if stats['requested_length'] > 0 else 0.0
+    return (f"План решений: {stats['requested']} запрошено, {stats['unique']} уникальных "
+            f"(сэкономлено {saved} решений, {100 * share:.0f}% интервала интегрирования), "
+            f"время {stats['time']:.2f} с")
@@ -0,0 +1,231 @@
+"""
+Распространение неопределенности параметров методом Монте-Карло (кривая с блоком uncertainty).
+
+Параметры, заданные распределениями (normal, lognormal, uniform), разыгрываются для n_samples
+реализаций; реализации интегрируются пакетами по batch_size одним векторизованным вызовом
+(core/batch_integrator.py, параметро-общая компиляция: значения параметров - массивы по
+траекториям). Решения пакета сразу сводятся в гистограммы по каждой точке сетки времени, сами
+траектории не хранятся: память - O(n_points · bins) на гистограммы плюс один пакет, а не
+O(n_samples · n_points). Квантили (полосы процентилей и медиана) берутся из накопленных гистограмм.
+
+Воспроизводимость: пакет k получает собственный генератор из SeedSequence(seed).spawn(...), поэтому
+выборка не зависит от числа процессов и порядка их завершения. Гистограммы складываются целыми
+счетчиками, так что результат объединения пакетов одинаков при любом порядке. Границы гистограмм
+в каждой точке времени задаются по первому пакету (с запасом); значения за границами попадают
+в крайние ячейки-счетчики.
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from models.ode_system import ODESystem
+from core.batch_integrator import integrate_batch
+
+
+DISTRIBUTIONS = {
+    'normal': ('mean', 'std'),
+    'lognormal': ('median', 'sigma'),   # sigma - стандартное отклонение ln(x)
+    'uniform': ('low', 'high'),
+}
+
+DEFAULT_SETTINGS = {
+    'n_samples': 1000,
+    'batch_size': 250,
+    'seed': 0,
+    'bins': 256,
+    'bands': [[5, 95], [25, 75]],
+    'rtol': 1e-6,
+    'atol': 1e-9,
+    'max_steps': 50000,
+}
+
+# Запас границ гистограммы относительно разброса первого пакета (в долях разброса)
+RANGE_MARGIN = 0.25
+
+# Параметро-общие системы внутри процесса-исполнителя
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations_latex, variable_names):
+    key = (tuple(equations_latex), tuple(variable_names))
+    if key not in _WORKER_SYSTEMS:
+        system = ODESystem(equations_latex, variable_names)
+        system.compile_generic()
+        _WORKER_SYSTEMS[key] = system
+    return _WORKER_SYSTEMS[key]
+
+
+def sample_params(distributions, rng, n):
+    """Значения разыгрываемых параметров: {имя: массив длины n}"""
+    samples = {}
+    for name in sorted(distributions):
+        spec = distributions[name]
+        kind = spec['dist']
+        # float(): PyYAML читает 1e-12 (без точки) как строку
+        if kind == 'normal':
+            samples[name] = rng.normal(float(spec['mean']), float(spec['std']), n)
+        elif kind == 'lognormal':
+            samples[name] = float(spec['median']) * np.exp(rng.normal(0.0, float(spec['sigma']), n))
+        elif kind == 'uniform':
+            samples[name] = rng.uniform(float(spec['low']), float(spec['high']), n)
+        else:
+            raise ValueError(f"Unknown distribution for '{name}': {kind}. Valid: {list(DISTRIBUTIONS)}")
+    return samples
+
+
+class QuantileHistogram:
+    """
+    Гистограммы значений по переменным и точкам времени, форма счетчиков (переменные, точки, bins + 2).
+    Ячейки 0 и bins + 1 - значения ниже lower и выше upper
+    """
+    def __init__(self, lower, upper, bins):
+        self.lower = lower
+        self.upper = upper
+        self.bins = bins
+        self.counts = np.zeros(lower.shape + (bins + 2,), dtype=np.int64)
+
+    def add(self, values):
+        """values: (переменные, реализации, точки), NaN не учитываются"""
+        n_vars, _, n_points = values.shape
+        width = (self.upper - self.lower) / self.bins
+        with np.errstate(invalid='ignore'):
+            cell = np.floor((values - self.lower[:, np.newaxis, :]) / width[:, np.newaxis, :]) + 1
+        finite = np.isfinite(cell)
+        cell = np.clip(cell[finite], 0, self.bins + 1).astype(np.int64)
+
+        v, _, p = np.nonzero(finite)
+        flat = (v * n_points + p) * (self.bins + 2) + cell
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, counts):
+        self.counts += counts
+
+    def quantiles(self, q):
+        """Квантиль уровня q (0..1) в каждой точке: (переменные, точки); линейная интерполяция внутри ячейки"""
+        total = self.counts.sum(axis=-1)
+        cumulative = np.cumsum(self.counts, axis=-1)
+        target = q * total
+        cell = np.argmax(cumulative >= target[..., np.newaxis], axis=-1)
+
+        before = np.take_along_axis(cumulative, cell[..., np.newaxis], axis=-1)[..., 0] - \
+            np.take_along_axis(self.counts, cell[..., np.newaxis], axis=-1)[..., 0]
+        in_cell = np.take_along_axis(self.counts, cell[..., np.newaxis], axis=-1)[..., 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.clip(np.where(in_cell > 0, (target - before) / in_cell, 0.0), 0.0, 1.0)
+
+        width = (self.upper - self.lower) / self.bins
+        value = self.lower + (cell - 1 + fraction) * width
+        value = np.where(cell == 0, self.lower, value)
+        value = np.where(cell == self.bins + 1, self.upper, value)
+        return np.where(total > 0, value, np.nan)
+
+
+def _integrate(task, size, seed):
+    """Один пакет реализаций: массив (переменные, реализации, точки) и число несошедшихся траекторий"""
+    system = _get_system(task['equations'], task['variable_names'])
+    rng = np.random.default_rng(seed)
+    samples = sample_params(task['distributions'], rng, size)
+    sampled = sorted(samples)
+
+    # Параметры передаются по именам: порядок system.params в другом процессе может отличаться
+    names = [str(p) for p in system.params]
+
+    def rhs(t, Y, *values):
+        current = dict(task['params'], **dict(zip(sampled, values)))
+        params = [current[name] for name in names]
+        result = system.generic_compiled(t, *Y, *params)
+        return np.array([np.broadcast_to(np.asarray(r, dtype=float), t.shape) for r in result])
+
+    Y0 = np.repeat(np.asarray(task['initial_conditions'], dtype=float)[:, np.newaxis], size, axis=1)
+    _, _, status, out = integrate_batch(rhs, task['t_span'], Y0, rtol=task['rtol'], atol=task['atol'],
+                                        max_steps=task['max_steps'], args=[samples[name] for name in sampled],
+                                        t_eval=task['t_eval'])
+    return out, int(np.sum(status != 0))
+
+
+def _run_batch(task):
+    """Пакет в процессе-исполнителе: возвращает только счетчики гистограмм"""
+    out, failed = _integrate(task, task['size'], task['seed'])
+    histogram = QuantileHistogram(task['lower'], task['upper'], task['bins'])
+    histogram.add(out)
+    return histogram.counts, failed
+
+
+def histogram_range(values):
+    """Границы гистограмм по первому пакету с запасом RANGE_MARGIN"""
+    finite = np.isfinite(values)
+    low = np.min(np.where(finite, values, np.inf), axis=1)
+    high = np.max(np.where(finite, values, -np.inf), axis=1)
+    low = np.where(np.isfinite(low), low, 0.0)
+    high = np.where(np.isfinite(high), high, 0.0)
+    margin = RANGE_MARGIN * (high - low)
+    # Все реализации совпадают (например, в начальной точке) - берем узкий интервал вокруг значения
+    margin = np.maximum(margin, np.maximum(1e-9 * np.abs(high), 1e-12))
+    return low - margin, high + margin
+
+
+def propagate_uncertainty(equations_latex, variable_names, initial_conditions, params, t_span, n_points,
+                          settings):
+    """
+    params - значения параметров системы по именам (для разыгрываемых не используются).
+    settings - блок uncertainty кривой (distributions, n_samples, batch_size, seed, bins, bands, ...).
+    Возвращает словарь: t, median (переменные, точки), bands [(нижний %, верхний %, нижняя, верхняя)],
+    n_samples, failed
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    system = _get_system(equations_latex, variable_names)
+    names = [str(p) for p in system.params]
+    for name in settings['distributions']:
+        if name not in names:
+            raise ValueError(f"Uncertain parameter '{name}' is not a parameter of the system")
+
+    n_samples = int(settings['n_samples'])
+    batch_size = min(int(settings['batch_size']), n_samples)
+    sizes = [batch_size] * (n_samples // batch_size)
+    if n_samples % batch_size:
+        sizes.append(n_samples % batch_size)
+    seeds = np.random.SeedSequence(settings['seed']).spawn(len(sizes))
+
+    task = {
+        'equations': equations_latex,
+        'variable_names': variable_names,
+        'initial_conditions': initial_conditions,
+        'params': {name: params[name] for name in names if name not in settings['distributions']},
+        'distributions': settings['distributions'],
+        't_span': t_span,
+        't_eval': np.linspace(t_span[0], t_span[1], n_points),
+        'rtol': settings['rtol'],
+        'atol': settings['atol'],
+        'max_steps': settings['max_steps'],
+        'bins': int(settings['bins']),
+    }
+
+    start = time.perf_counter()
+    out, failed = _integrate(task, sizes[0], seeds[0])
+    lower, upper = histogram_range(out)
+    histogram = QuantileHistogram(lower, upper, task['bins'])
+    histogram.add(out)
+    del out
+
+    tasks = [dict(task, size=size, seed=seed, lower=lower, upper=upper) for size, seed in zip(sizes[1:], seeds[1:])]
+    n_workers = min(settings.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_run_batch, tasks))
+    else:
+        results = [_run_batch(t) for t in tasks]
+    for counts, batch_failed in results:
+        histogram.merge(counts)
+        failed += batch_failed
+
+    bands = []
+    for low_percent, high_percent in settings['bands']:
+        bands.append((low_percent, high_percent, histogram.quantiles(low_percent / 100),
+                      histogram.quantiles(high_percent / 100)))
+
+    print(f"Монте-Карло: {n_samples} реализаций ({len(sizes)} пакетов по {batch_size}), "
+          f"не досчитано {failed}, время {time.perf_counter() - start:.2f} с")
+    return {'t': task['t_eval'], 'median': histogram.quantiles(0.5), 'bands': bands,
+            'n_samples': n_samples, 'failed': failed}
@@ -0,0 +1,148 @@
+"""
+Диаграммы "работа - точность" для методов решения ОДУ.
+
+Для заданной системы каждый метод запускается на лестнице допусков rtol (atol = rtol * atol_ratio),
+для каждого запуска измеряются время, nfev/njev/nlu и ошибка относительно эталонного решения,
+посчитанного с очень малыми допусками. Запуски независимы и выполняются параллельно в процессах;
+время берется как лучшее из нескольких повторов, чтобы уменьшить шум от соседних процессов.
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from models.ode_system import ODESystem
+from core.ode_solver import solve_ode
+from utils.validators import merge_params
+
+
+DEFAULT_METHODS = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA']
+DEFAULT_REFERENCE = {'method': 'DOP853', 'rtol': 1e-13, 'atol': 1e-15}
+
+# Скомпилированные системы внутри процесса-исполнителя: компилируем один раз на процесс
+_WORKER_SYSTEMS = {}
+
+
+def _get_system(equations_latex, variable_names, param_values):
+    key = (tuple(equations_latex), tuple(variable_names), tuple(param_values))
+    if key not in _WORKER_SYSTEMS:
+        _WORKER_SYSTEMS[key] = ODESystem(equations_latex, variable_names)
+    return _WORKER_SYSTEMS[key]
+
+
+def tolerance_ladder(tolerances):
+    """[1e-3, 1e-6, ...] или {from: 1e-3, to: 1e-10, n: 8} (равномерно по логарифму)"""
+    if isinstance(tolerances, dict):
+        return list(np.geomspace(tolerances['from'], tolerances['to'], int(tolerances.get('n', 8))))
+    return [float(value) for value in tolerances]
+
+
+def solution_error(y, y_ref):
+    """Максимальная по времени ошибка, отнесенная к масштабу каждой переменной; берется худшая переменная"""
+    scale = np.maximum(np.max(np.abs(y_ref), axis=1), 1e-300)
+    return float(np.max(np.max(np.abs(y - y_ref), axis=1) / scale))
+
+
+def _run_task(task):
+    """Один метод с одним набором допусков (выполняется в процессе-исполнителе)"""
+    system = _get_system(task['equations'], task['variable_names'], task['param_values'])
+    # Первый вызов прогревает скомпилированные функции, в замер не идет
+    system.right_hand_side(task['t_span'][0], task['initial_conditions'], task['param_values'])
+
+    best_time = np.inf
+    sol = None
+    for _ in range(task['repeats']):
+        start = time.perf_counter()
+        sol = solve_ode(system, task['param_values'], task['t_span'], task['initial_conditions'],
+                        task['method'], task['rtol'], task['atol'], task['t_eval'])
+        best_time = min(best_time, time.perf_counter() - start)
+
+    result = {
+        'method': task['method'],
+        'rtol': task['rtol'],
+        'atol': task['atol'],
+        'time': best_time,
+        'nfev': int(sol.nfev),
+        'njev': int(sol.njev),
+        'nlu': int(sol.nlu),
+        'success': bool(sol.success) and sol.y.shape[1] == len(task['t_eval'])
+    }
+    result['error'] = solution_error(sol.y, task['y_ref']) if result['success'] else np.nan
+    return result
+
+
+def run_work_precision(config, global_params):
+    """
+    Запускает все методы на всех допусках. Возвращает словарь с эталоном и списком результатов
+    """
+    system_config = config['system']
+    merged_params = merge_params(global_params, system_config.get('params', {}))
+    system = ODESystem(system_config['equations'], system_config['variable_names'])
+    param_values = [merged_params[str(p)] for p in system.params]
+
+    t_span = merged_params.get('t_span', system_config['t_span'])
+    t_eval = np.linspace(t_span[0], t_span[1], int(config.get('error_points', 200)))
+
+    reference = dict(DEFAULT_REFERENCE, **config.get('reference', {}))
+    start = time.perf_counter()
+    ref = solve_ode(system, param_values, t_span, system_config['initial_conditions'], reference['method'],
+                    reference['rtol'], reference['atol'], t_eval)
+    if not ref.success:
+        raise ValueError(f"Reference solution failed: {ref.message}")
+    reference['time'] = time.perf_counter() - start
+
+    methods = config.get('methods', DEFAULT_METHODS)
+    ladder = tolerance_ladder(config.get('tolerances', {'from': 1e-3, 'to': 1e-10, 'n': 8}))
+    atol_ratio = config.get('atol_ratio', 1e-3)
+
+    task_template = {
+        'equations': system_config['equations'],
+        'variable_names': system_config['variable_names'],
+        'initial_conditions': system_config['initial_conditions'],
+        'param_values': param_values,
+        't_span': t_span,
+        't_eval': t_eval,
+        'y_ref': ref.y,
+        'repeats': int(config.get('repeats', 3))
+    }
+    tasks = [dict(task_template, method=method, rtol=rtol, atol=rtol * atol_ratio)
+             for method in methods for rtol in ladder]
+
+    n_workers = min(config.get('n_workers', os.cpu_count() or 1), len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_run_task, tasks))
+    else:
+        results = [_run_task(task) for task in tasks]
+
+    return {'reference': reference, 'results': results, 'methods': methods}
+
+
+def cheapest_methods(results, key='time'):
+    """
+    Для каждой достигнутой точности 10^-k - самый дешевый запуск, который ее обеспечивает.
+    Возвращает список (целевая ошибка, результат)
+    """
+    successful = [r for r in results if r['success'] and np.isfinite(r['error'])]
+    if not successful:
+        return []
+    errors = np.array([r['error'] for r in successful])
+    low = int(np.floor(np.log10(max(errors.min(), 1e-16))))
+    high = int(np.ceil(np.log10(errors.max())))
+
+    choice = []
+    for k in range(high, low - 1, -1):
+        target = 10.0 ** k
+        candidates = [r for r in successful if r['error'] <= target]
+        if candidates:
+            choice.append((target, min(candidates, key=lambda r: r[key])))
+    return choice
+
+
+def write_results_csv(results, path):
+    columns = ['method', 'rtol', 'atol', 'error', 'time', 'nfev', 'njev', 'nlu', 'success']
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(','.join(columns) + '\n')
+        for r in results:
+            f.write(','.join(str(r[column]) for column in columns) + '\n')
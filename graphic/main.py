@@ -4,40 +4,111 @@ import argparse  #библиотека для парсинга командно
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from utils.config_loader import load_config
+from utils.config_loader import load_config, load_batch_configs
 from utils.validators import validate_config
 from core.function_plotter import FunctionPlotter
 from core.ode_plotter import ODEPlotter
+from core.phase_analysis import shared_resolution
+from core.parameter_fitting import fit_parameters, write_fitted_config
+from core.work_precision import run_work_precision, cheapest_methods, write_results_csv
+from core.base_plotter import GraphPlotter
+from core.equilibrium_sweep import run_equilibrium_sweep, sweep_points, prefetch_equilibria
+from core.solve_planner import plan_solves, execute_plan, format_plan_stats
+from core.pipeline import run_pipeline
+from core.solution_cache import SOLUTION_CACHE, DEFAULT_MAX_ENTRIES
+from utils.memory_budget import plan_memory, parse_size, format_size
+from utils.memory_profile import PROFILER, memory_stage
 import params_global
+import shutil
+import tempfile
+import tracemalloc
 
 #Функция ниже определяет типа графика и проверяет корректность типа графика, после чего вызывает либо соответствующий обработчик графика либо выкидывает ошибку Unkown type.
-def plot_from_config(config):
+def plot_from_config(config, memory_budget=None, trajectories=None):
     validate_config(config) # проверяет корректность входных данных config, в случае ошибки выбрасывает через raise ошибку и останавливает программу.
 
     plot_type = config['type']  # извлекаем из словаря config тип графика
 
+    if PROFILER.enabled and not PROFILER.stack:
+        # Профиль памяти: весь рисунок - этап верхнего уровня, внутри - кривые, решения, сохранение
+        with memory_stage(f"figure {config.get('output', plot_type)}"):
+            return plot_from_config(config, memory_budget, trajectories)
+
+    if memory_budget is not None and plot_type not in ('fit', 'work_precision', 'basin_map', 'equilibrium_sweep', 'space_time',
+                                                           'lyapunov'):
+        return plot_with_memory_budget(config, memory_budget)
+
     if plot_type == 'function':
         plot_function(config)
     elif plot_type == 'ode_time':
-        plot_ode_time(config)
+        plot_ode_time(config, trajectories)
     elif plot_type == 'phase_portrait':
-        plot_phase_portrait(config)
+        plot_phase_portrait(config, trajectories)
+    elif plot_type == 'sensitivity':
+        plot_sensitivity(config)
+    elif plot_type == 'fit':
+        run_fit(config)
+    elif plot_type == 'basin_map':
+        plot_basin_map(config)
+    elif plot_type == 'space_time':
+        plot_space_time(config)
+    elif plot_type == 'equilibrium_sweep':
+        plot_equilibrium_sweep(config)
+    elif plot_type == 'lyapunov':
+        plot_lyapunov(config)
+    elif plot_type == 'work_precision':
+        plot_work_precision(config)
     else:
         raise ValueError(f"Unknown type: {plot_type}")
 
 
+def plot_with_memory_budget(config, memory_budget):
+    """
+    Строит график в пределах бюджета памяти (байты): при необходимости включает режимы экономии
+    (см. utils/memory_budget.py) и печатает прогноз и фактический пик памяти (tracemalloc)
+    """
+    memmap_dir = tempfile.mkdtemp(prefix='graphic_memmap_')
+    planned, estimate, applied = plan_memory(config, vars(params_global), memory_budget, memmap_dir)
+
+    print(f"Прогноз памяти: {format_size(estimate['peak'])} при бюджете {format_size(memory_budget)}")
+    for stage, size in estimate['stages']:
+        if size > 0:
+            print(f"  {stage}: {format_size(size)}")
+    if applied:
+        print(f"Режимы экономии памяти: {', '.join(applied)}")
+    if estimate['peak'] > memory_budget:
+        print("Предупреждение: прогноз превышает бюджет даже со всеми режимами экономии")
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        plot_from_config(planned)
+        _, peak = tracemalloc.get_traced_memory()
+        print(f"Пик памяти: {format_size(peak)} (прогноз {format_size(estimate['peak'])})")
+    finally:
+        if started:
+            tracemalloc.stop()
+        shutil.rmtree(memmap_dir, ignore_errors=True)
+
+
 def plot_function(config):
     plotter = FunctionPlotter(vars(params_global))
 
+    axes = config.get('axes', {})                #словарь, или {}
+    plotter.set_view(xlim=axes.get('xlim'), ylim=axes.get('ylim'))  # нужно адаптивной выборке, чтобы знать масштаб в пикселях
+
     for curve in config['curves']:
         plotter.add_curve_from_latex(
             formula_latex=curve['formula'],      #тип str
             params=curve.get('params', {}),      #словарь, хранит параметры
             x_range=curve['x_range'],            #список, хранить пределы x
-            style=curve['style']                 #словарь, хранит информацию о стилях
+            style=curve['style'],                #словарь, хранит информацию о стилях
+            sampling=curve.get('sampling'),      #None (равномерная сетка) или adaptive / {mode: adaptive, tolerance_px: ...}
+            family=curve.get('family')           #оформление семейства, если какие-то params заданы массивами
         )
 
-    axes = config.get('axes', {})                #словарь, или {}
     plotter.set_axes(
         xlim=axes.get('xlim'),                   #[x_min, x_max] или None
         ylim=axes.get('ylim'),                   #[y_min, y_max] или None
@@ -52,30 +123,60 @@ def plot_function(config):
 
     #if any('label' in curve['style'] for curve in config['curves']):
     #    plotter.ax.legend()
+    if axes.get('legend', False):
+        plotter.ax.legend()
 
     output_path = os.path.join('output', config['output']) # делаем правильное объединение путей, чтобы у Гоши работало тоже.
     plotter.save(output_path)                              # сохраняем график в формате SVG
     print(f"График создан: {output_path}")
 
 
-def plot_ode_time(config):
-    plotter = ODEPlotter(vars(params_global))
+def plot_ode_time(config, trajectories=None):
+    plotter = ODEPlotter(vars(params_global), trajectories)
 
     # ВАЖНО: Если используется dual_y_axis, создаем вторую ось ДО добавления кривых
     axes = config.get('axes', {})
     if axes.get('dual_y_axis', False):
         plotter.enable_dual_y_axis()
+    # Окно по времени нужно до кривых: кривые с lod берут из пирамиды только видимый участок
+    if axes.get('xlim'):
+        plotter.ax.set_xlim(axes['xlim'])
 
-    for curve in config['curves']:
-        plotter.solve_and_plot_time(
-            equations_latex=curve['equations'],
-            variable_names=curve['variable_names'],
-            initial_conditions=curve['initial_conditions'],
-            params=curve.get('params', {}),
-            t_span=curve['t_span'],
-            style_list=curve['styles'],
-            solver_method=curve.get('solver_method')
-        )
+    for i, curve in enumerate(config['curves']):
+        with memory_stage(f'curve {i + 1}'):
+            if curve.get('uncertainty'):
+                # Параметры со случайным разбросом: полосы процентилей вместо одной кривой
+                plotter.solve_and_plot_uncertainty(
+                    equations_latex=curve['equations'],
+                    variable_names=curve['variable_names'],
+                    initial_conditions=curve['initial_conditions'],
+                    params=curve.get('params', {}),
+                    t_span=curve['t_span'],
+                    style_list=curve['styles'],
+                    uncertainty=curve['uncertainty']
+                )
+                continue
+            if curve.get('noise'):
+                # Шум в уравнениях: ансамбль траекторий СДУ
+                plotter.solve_and_plot_sde(
+                    equations_latex=curve['equations'],
+                    variable_names=curve['variable_names'],
+                    initial_conditions=curve['initial_conditions'],
+                    params=curve.get('params', {}),
+                    t_span=curve['t_span'],
+                    style_list=curve['styles'],
+                    noise=curve['noise']
+                )
+                continue
+            plotter.solve_and_plot_time(
+                equations_latex=curve['equations'],
+                variable_names=curve['variable_names'],
+                initial_conditions=curve['initial_conditions'],
+                params=curve.get('params', {}),
+                t_span=curve['t_span'],
+                style_list=curve['styles'],
+                solver_method=curve.get('solver_method')
+            )
 
     plotter.set_axes(
         xlim=axes.get('xlim'),
@@ -100,8 +201,20 @@ def plot_ode_time(config):
     print(f"График создан: {output_path}")
 
 
-def plot_phase_portrait(config):
-    plotter = ODEPlotter(vars(params_global))
+def add_vector_field(plotter, curve, vector_field, grid_resolution):
+    with memory_stage('vector_field'):
+        plotter.add_vector_field(
+            equations_latex=curve['equations'],
+            variable_names=curve['variable_names'],
+            params=curve.get('params', {}),
+            var_indices=curve['var_indices'],
+            field_config=vector_field,
+            resolution=grid_resolution
+        )
+
+
+def plot_phase_portrait(config, trajectories=None):
+    plotter = ODEPlotter(vars(params_global), trajectories)
 
     # Сначала установить пределы осей
     axes = config.get('axes', {})
@@ -109,28 +222,118 @@ def plot_phase_portrait(config):
         plotter.ax.set_xlim(axes['xlim'])
         plotter.ax.set_ylim(axes['ylim'])
 
-    # Затем построить векторное поле (если есть)
+    # Векторное поле и изоклины считаются по одной сетке правой части (core/phase_analysis.py)
     vector_field = config.get('vector_field')
-    if vector_field and vector_field.get('enabled', False):
-        first_curve = config['curves'][0]
-        plotter.add_vector_field(
-            equations_latex=first_curve['equations'],
-            variable_names=first_curve['variable_names'],
-            params=first_curve.get('params', {}),
-            var_indices=first_curve['var_indices'],
-            field_config=vector_field
-        )
+    nullcline_config = config.get('nullclines')
+    first_curve = config['curves'][0]
+    grid_resolution = None
+    if nullcline_config and nullcline_config.get('enabled', False):
+        grid_resolution = nullcline_config.get('resolution', 401)
+        if vector_field and vector_field.get('enabled', False):
+            grid_resolution = shared_resolution(vector_field.get('density', 20), grid_resolution)
+
+    # Затем построить векторное поле (если есть). С изоклинами поле строится после траекторий,
+    # по тем же итоговым пределам осей, иначе без заданных xlim/ylim сетка у них разная
+    if vector_field and vector_field.get('enabled', False) and not grid_resolution:
+        add_vector_field(plotter, first_curve, vector_field, grid_resolution)
 
     # Построить траектории
+    for i, curve in enumerate(config['curves']):
+        with memory_stage(f'curve {i + 1}'):
+            if curve.get('section'):
+                # Только точки сечения Пуанкаре / стробоскопа, без траектории
+                plotter.solve_and_plot_section(
+                    equations_latex=curve['equations'],
+                    variable_names=curve['variable_names'],
+                    initial_conditions=curve['initial_conditions'],
+                    params=curve.get('params', {}),
+                    t_span=curve['t_span'],
+                    var_indices=curve['var_indices'],
+                    style=curve.get('style', {}),
+                    section=curve['section'],
+                    solver_method=curve.get('solver_method')
+                )
+                continue
+            plotter.solve_and_plot_phase(
+                equations_latex=curve['equations'],
+                variable_names=curve['variable_names'],
+                initial_conditions=curve['initial_conditions'],
+                params=curve.get('params', {}),
+                t_span=curve['t_span'],
+                var_indices=curve['var_indices'],
+                style=curve['style'],
+                solver_method=curve.get('solver_method')
+            )
+
+    # Предельные циклы (стрельба по отображению Пуанкаре) - тоже по известным пределам осей
+    cycle_config = config.get('limit_cycles')
+    if cycle_config and cycle_config.get('enabled', False):
+        with memory_stage('limit_cycles'):
+            plotter.add_limit_cycles(
+                equations_latex=first_curve['equations'],
+                variable_names=first_curve['variable_names'],
+                params=first_curve.get('params', {}),
+                var_indices=first_curve['var_indices'],
+                cycle_config=cycle_config
+            )
+
+    # Изоклины и равновесия - после траекторий, когда пределы осей уже известны
+    if grid_resolution:
+        # Пределы фиксируются: стрелки и изоклины не должны их расширять, сетка у них одна
+        plotter.ax.set_xlim(plotter.ax.get_xlim())
+        plotter.ax.set_ylim(plotter.ax.get_ylim())
+        if vector_field and vector_field.get('enabled', False):
+            add_vector_field(plotter, first_curve, vector_field, grid_resolution)
+        with memory_stage('nullclines'):
+            plotter.add_nullclines(
+                equations_latex=first_curve['equations'],
+                variable_names=first_curve['variable_names'],
+                params=first_curve.get('params', {}),
+                var_indices=first_curve['var_indices'],
+                nullcline_config=nullcline_config,
+                resolution=grid_resolution
+            )
+
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', ''),
+        ylabel=axes.get('ylabel', ''),
+        grid=axes.get('grid', True),
+        equal_aspect=axes.get('equal_aspect', False),
+        spines=axes.get('spines'),
+        grid_style=axes.get('grid_style'),
+        xticks=axes.get('xticks'),
+        yticks=axes.get('yticks'),
+        axis_labels_at_end=axes.get('axis_labels_at_end', False)
+    )
+
+    if axes.get('legend', False):
+        plotter.ax.legend()
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path)
+    print(f"График создан: {output_path}")
+
+
+def plot_sensitivity(config):
+    plotter = ODEPlotter(vars(params_global))
+
+    axes = config.get('axes', {})
+    if axes.get('dual_y_axis', False):
+        plotter.enable_dual_y_axis()
+
+    # Одно расширенное интегрирование на кривую вместо 2·n_params решений с возмущенными параметрами
     for curve in config['curves']:
-        plotter.solve_and_plot_phase(
+        plotter.solve_and_plot_sensitivity(
             equations_latex=curve['equations'],
             variable_names=curve['variable_names'],
             initial_conditions=curve['initial_conditions'],
             params=curve.get('params', {}),
             t_span=curve['t_span'],
-            var_indices=curve['var_indices'],
-            style=curve['style'],
+            sensitivity_params=curve['sensitivity_params'],
+            style_list=curve.get('styles'),
+            normalize=curve.get('normalize', False),
             solver_method=curve.get('solver_method')
         )
 
@@ -143,21 +346,294 @@ def plot_phase_portrait(config):
         equal_aspect=axes.get('equal_aspect', False),
         spines=axes.get('spines'),
         grid_style=axes.get('grid_style'),
+        axis_labels_at_end=axes.get('axis_labels_at_end', False),
+        dual_y_axis=axes.get('dual_y_axis', False),
+        ylim_right=axes.get('ylim_right'),
+        ylabel_right=axes.get('ylabel_right', ''),
+        yticks_right=axes.get('yticks_right')
+    )
+
+    if axes.get('legend', True):
+        plotter.ax.legend()
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path)
+    print(f"График создан: {output_path}")
+
+
+def plot_basin_map(config):
+    plotter = ODEPlotter(vars(params_global))
+
+    axes = config.get('axes', {})
+    plotter.ax.set_xlim(axes['xlim'])
+    plotter.ax.set_ylim(axes['ylim'])
+
+    system = config['system']
+    basin_config = dict(config.get('basin', {}), t_span=system['t_span'])
+    plotter.add_basin_map(
+        equations_latex=system['equations'],
+        variable_names=system['variable_names'],
+        params=system.get('params', {}),
+        var_indices=config.get('var_indices', [0, 1]),
+        basin_config=basin_config
+    )
+
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', ''),
+        ylabel=axes.get('ylabel', ''),
+        grid=axes.get('grid', False),
+        grid_style=axes.get('grid_style'),
         xticks=axes.get('xticks'),
-        yticks=axes.get('yticks'),
-        axis_labels_at_end=axes.get('axis_labels_at_end', False)
+        yticks=axes.get('yticks')
+    )
+
+    if axes.get('legend', False):
+        plotter.ax.legend()
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path)
+    print(f"График создан: {output_path}")
+
+
+def plot_space_time(config):
+    plotter = ODEPlotter(vars(params_global))
+
+    plot_config = config['plot']
+    mode = plot_config.get('mode', 'heatmap')
+    n_times = plot_config.get('n_times', 200)
+    t, x, U = plotter.solve_space_time(config['system'], n_times)
+    u = U[config['system']['fields'].index(plot_config['field'])]
+
+    axes = config.get('axes', {})
+    if mode == 'heatmap':
+        plotter.add_space_time(t, x, u, plot_config)
+    else:
+        plotter.add_profiles(t, x, u, plot_config)
+
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', 't' if mode == 'heatmap' else 'x'),
+        ylabel=axes.get('ylabel', 'x' if mode == 'heatmap' else plot_config['field']),
+        grid=axes.get('grid', mode != 'heatmap'),
+        grid_style=axes.get('grid_style'),
+        xticks=axes.get('xticks'),
+        yticks=axes.get('yticks')
     )
 
+    if axes.get('legend', mode == 'profiles'):
+        plotter.ax.legend()
+
     output_path = os.path.join('output', config['output'])
     plotter.save(output_path)
     print(f"График создан: {output_path}")
 
 
+def plot_lyapunov(config):
+    plotter = ODEPlotter(vars(params_global))
+
+    sweep = config.get('sweep', [])
+    sweep = sweep if isinstance(sweep, list) else [sweep]
+    plot_config = config.get('plot', {})
+    result, values = plotter.solve_lyapunov(config['system'], config.get('analysis', {}), sweep)
+
+    axes = config.get('axes', {})
+    if len(values) == 0:
+        plotter.add_lyapunov_history(result, plot_config)
+        xlabel, ylabel = 't', '$\\lambda$'
+    elif len(values) == 1:
+        plotter.add_lyapunov_sweep(values[0], result, plot_config)
+        xlabel, ylabel = sweep[0]['name'], plot_config.get('quantity', 'exponents')
+    else:
+        plotter.add_lyapunov_map(values[0], values[1], result, plot_config)
+        xlabel, ylabel = sweep[0]['name'], sweep[1]['name']
+
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', xlabel),
+        ylabel=axes.get('ylabel', ylabel),
+        grid=axes.get('grid', len(values) < 2),
+        grid_style=axes.get('grid_style'),
+        xticks=axes.get('xticks'),
+        yticks=axes.get('yticks')
+    )
+
+    if axes.get('legend', len(values) < 2):
+        plotter.ax.legend()
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path)
+    print(f"График создан: {output_path}")
+
+
+def plot_equilibrium_sweep(config):
+    output_path = os.path.join('output', config['output'])
+    run_equilibrium_sweep(config, output_path)
+    print(f"График создан: {output_path}")
+
+
+def plot_batch(batch_path, memory_budget=None, pipeline=None):
+    """
+    Строит все графики пакета. До построения планируется вся работа пакета:
+    одинаковые задачи Коши всех конфигураций (и вложенные по интервалу) решаются один раз
+    (core/solve_planner.py), равновесия всех equilibrium_sweep-конфигураций решаются одной
+    раздачей пулу процессов, каждая точка один раз.
+    pipeline - (число решателей, число отрисовщиков): решение и отрисовка идут параллельно
+    в разных процессах (core/pipeline.py); None - все по очереди в этом процессе
+    """
+    configs = load_batch_configs(batch_path)
+
+    if pipeline is None:
+        with memory_stage('plan_solves'):
+            plan = plan_solves(configs, vars(params_global))
+            if plan:
+                print(format_plan_stats(execute_plan(plan)))
+
+    keys = []
+    for config in configs:
+        if config.get('type') == 'equilibrium_sweep':
+            validate_config(config)
+            keys.extend(sweep_points(config))
+    if keys:
+        n_solved = prefetch_equilibria(keys)
+        print(f"Пакет: {len(keys)} обращений к равновесиям, решено {n_solved} различных точек")
+
+    if pipeline is not None:
+        stats = run_pipeline(configs, plot_from_config, vars(params_global), *pipeline)
+        print(f"Конвейер: {stats['n_solvers']} решателей, {stats['n_renderers']} отрисовщиков; "
+              f"{stats['tasks']} задач Коши ({stats['shared_tasks']} повторных запросов без решения); "
+              f"решение {stats['solve_time']:.2f} с, отрисовка {stats['render_time']:.2f} с "
+              f"(суммарно по процессам), всего {stats['total_time']:.2f} с")
+        for output, error in stats['errors']:
+            print(f"Ошибка: {output}: {error}")
+        return
+
+    for config in configs:
+        plot_from_config(config, memory_budget=memory_budget)
+
+
+def run_fit(config):
+    result = fit_parameters(config, vars(params_global))
+
+    for i, start in enumerate(result['starts']):
+        values = ', '.join(f"{name}={value:.6g}" for name, value in zip(result['free_params'], start['x']))
+        print(f"Старт {i + 1}: {values}, невязка={2 * start['cost']:.6g}, nfev={start['nfev']}")
+
+    output_path = os.path.join('output', config['output'])
+    write_fitted_config(config, result, output_path)
+    print(f"Подобранные параметры: {result['params']}")
+    print(f"Конфигурация создана: {output_path}")
+
+
+def plot_work_precision(config):
+    result = run_work_precision(config, vars(params_global))
+    reference = result['reference']
+    print(f"Эталон: {reference['method']}, rtol={reference['rtol']:g}, atol={reference['atol']:g}, "
+          f"время={reference['time']:.3f} с")
+
+    print(f"{'метод':>8} {'rtol':>8} {'ошибка':>10} {'время, с':>10} {'nfev':>7} {'njev':>5} {'nlu':>5}")
+    for r in result['results']:
+        print(f"{r['method']:>8} {r['rtol']:>8.1e} {r['error']:>10.2e} {r['time']:>10.4f} "
+              f"{r['nfev']:>7} {r['njev']:>5} {r['nlu']:>5}" + ('' if r['success'] else '  (не решено)'))
+
+    # По оси y - время или число вычислений правой части (y_axis: nfev)
+    cost_key = config.get('y_axis', 'time')
+    for target, r in cheapest_methods(result['results'], cost_key):
+        print(f"Ошибка ≤ {target:.0e}: {r['method']} (rtol={r['rtol']:.1e}, {cost_key}={r[cost_key]:.4g})")
+
+    plotter = GraphPlotter()
+    colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'black']
+    markers = ['o', 's', '^', 'D', 'v', 'P', 'X']
+    styles = config.get('styles', {})
+    for i, method in enumerate(result['methods']):
+        runs = [r for r in result['results'] if r['method'] == method and r['success'] and r['error'] > 0]
+        if not runs:
+            continue
+        style = {'color': colors[i % len(colors)], 'marker': markers[i % len(markers)], 'linestyle': '-',
+                 'linewidth': 1.5, 'label': method}
+        style.update(styles.get(method, {}))
+        plotter.add_curve([r['error'] for r in runs], [r[cost_key] for r in runs], style)
+
+    plotter.ax.set_xscale('log')
+    plotter.ax.set_yscale('log')
+    axes = config.get('axes', {})
+    plotter.set_axes(
+        xlim=axes.get('xlim'),
+        ylim=axes.get('ylim'),
+        xlabel=axes.get('xlabel', 'ошибка'),
+        ylabel=axes.get('ylabel', 'время, с' if cost_key == 'time' else cost_key),
+        grid=axes.get('grid', True),
+        grid_style=axes.get('grid_style')
+    )
+    plotter.ax.legend()
+
+    output_path = os.path.join('output', config['output'])
+    plotter.save(output_path)
+    write_results_csv(result['results'], os.path.splitext(output_path)[0] + '.csv')
+    print(f"График создан: {output_path}")
+
+
+def work_precision_config(config):
+    """Конфигурация work_precision для системы из первой кривой ODE-конфигурации (для --work-precision)"""
+    curve = config['curves'][0]
+    name = os.path.splitext(os.path.basename(config['output']))[0]
+    system = {key: curve[key] for key in ('equations', 'variable_names', 'initial_conditions', 't_span')}
+    system['params'] = curve.get('params', {})
+    return {'type': 'work_precision', 'system': system, 'output': f'{name}_work_precision.svg'}
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Построение графиков из YAML конфигурации')
-    parser.add_argument('--config', required=True, help='Путь к YAML файлу конфигурации')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--config', help='Путь к YAML файлу конфигурации')
+    source.add_argument('--batch', help='Путь к YAML файлу пакета: configs: [список конфигураций]')
+    parser.add_argument('--memory-budget', help='Бюджет памяти на график (например 512MB, 2GB): при превышении '
+                                                'прогноза включаются float32, вычисление по частям, прореживание, запись на диск')
+    parser.add_argument('--work-precision', action='store_true',
+                        help='Вместо графика построить диаграмму работа-точность методов для системы из первой кривой')
+    parser.add_argument('--pipeline', nargs='?', const='auto', metavar='РЕШАТЕЛИ:ОТРИСОВЩИКИ',
+                        help='Для --batch: решать и рисовать параллельно в разных процессах '
+                             '(например 6:2; без значения - по числу ядер)')
+    parser.add_argument('--memory-profile', nargs='?', const='-', metavar='ФАЙЛ',
+                        help='Профиль памяти по этапам (пик, остаток, места выделения, временные массивы); '
+                             'отчет печатается и, если указан файл, записывается в него для сравнения версий')
 
     args = parser.parse_args()
+    memory_budget = parse_size(args.memory_budget) if args.memory_budget else None
+
+    pipeline = None
+    if args.memory_profile and (args.pipeline or memory_budget is not None):
+        parser.error('--memory-profile works without --pipeline and --memory-budget')
+
+    if args.pipeline:
+        if not args.batch or memory_budget is not None:
+            parser.error('--pipeline works only with --batch and without --memory-budget')
+        if args.pipeline == 'auto':
+            pipeline = (None, None)
+        else:
+            n_solvers, n_renderers = args.pipeline.split(':')
+            pipeline = (int(n_solvers), int(n_renderers))
+
+    # Сколько решений держит кэш с контрольными точками (solution_cache_size в params_global)
+    SOLUTION_CACHE.max_entries = int(vars(params_global).get('solution_cache_size', DEFAULT_MAX_ENTRIES))
+
+    if args.memory_profile:
+        PROFILER.start()
+
+    if args.batch:
+        plot_batch(args.batch, memory_budget=memory_budget, pipeline=pipeline)
+    else:
+        config = load_config(args.config)
+        if args.work_precision:
+            config = work_precision_config(config)
+        plot_from_config(config, memory_budget=memory_budget)
 
-    config = load_config(args.config)
-    plot_from_config(config)
\ No newline at end of file
+    if args.memory_profile:
+        PROFILER.stop()
+        print(PROFILER.report())
+        if args.memory_profile != '-':
+            PROFILER.write(args.memory_profile)
+            print(f"Профиль памяти записан: {args.memory_profile}")
\ No newline at end of file
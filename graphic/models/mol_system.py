@@ -0,0 +1,209 @@
+"""
+Пространственно распределенная система (метод прямых) на отрезке [x0, x1], разбитом на n_cells ячеек.
+
+Вместо списка уравнений по одному на переменную задается шаблон по одному на поле: уравнение ячейки i,
+в котором значения поля в самой ячейке и в соседних записываются индексами:
+    s, s_i или s_{i}   - значение в ячейке i
+    s_{i+1}, s_{i-2}   - значения в соседних ячейках (шаблон связи соседей любой ширины)
+    x                  - координата центра ячейки, \\Delta_x - ширина ячейки
+Например, диффузия: D_w * (w_{i+1} - 2 w_i + w_{i-1}) / \\Delta_x^2.
+
+Шаблон компилируется один раз в векторизованную функцию, которая считает правую часть сразу для
+всех ячеек (аргументы - массивы со сдвинутыми значениями полей). Соседи за границей отрезка
+берутся из фиктивных ячеек по граничному условию:
+    dirichlet: значение value на границе (фиктивная ячейка - отражение с обратным знаком)
+    neumann:   производная du/dx = value на границе (зеркальное отражение, value = 0 - нет потока)
+    periodic:  замыкание отрезка в кольцо
+Якобиан тоже вычисляется символьно и собирается в разреженную матрицу (scipy.sparse) с ленточной
+структурой шаблона; Radau и BDF используют его вместо плотного якобиана конечными разностями.
+
+Вектор состояния: поля подряд, [s_0 ... s_{N-1}, w_0 ... w_{N-1}].
+Интерфейс тот же, что у ODESystem (params, right_hand_side, jacobian), поэтому решение идет через solve_ode.
+"""
+
+import re
+import numpy as np
+import sympy as sp
+import scipy.sparse
+
+from utils.latex_parser import parse_latex
+
+
+BOUNDARY_TYPES = ['dirichlet', 'neumann', 'periodic']
+
+# Зарезервированные имена шаблона
+COORDINATE = 'x'
+CELL_WIDTH = 'Delta_x'
+
+
+def _parse_boundary(spec):
+    """'neumann' или {type: neumann, value: 0}"""
+    if isinstance(spec, str):
+        spec = {'type': spec}
+    if spec.get('type') not in BOUNDARY_TYPES:
+        raise ValueError(f"Invalid boundary type: {spec.get('type')}. Valid types: {BOUNDARY_TYPES}")
+    return spec['type'], float(spec.get('value', 0.0))
+
+
+class MOLSystem:
+    def __init__(self, fields, equations_latex, n_cells, domain, boundary):
+        self.fields = list(fields)
+        self.equations_latex = list(equations_latex)
+        self.n_cells = int(n_cells)
+        self.domain = (float(domain[0]), float(domain[1]))
+        self.dx = (self.domain[1] - self.domain[0]) / self.n_cells
+        self.x = self.domain[0] + (np.arange(self.n_cells) + 0.5) * self.dx
+
+        # Граничные условия по полям: (тип, значение) слева и справа
+        self.boundary = {}
+        for field in self.fields:
+            spec = (boundary or {}).get(field, {})
+            left = _parse_boundary(spec.get('left', 'neumann'))
+            right = _parse_boundary(spec.get('right', 'neumann'))
+            if (left[0] == 'periodic') != (right[0] == 'periodic'):
+                raise ValueError(f"Periodic boundary for '{field}' must be set on both sides")
+            self.boundary[field] = (left, right)
+
+        # Для совместимости с ODESystem (ключи кэшей, подписи)
+        self.variable_names = [f'{field}_{i}' for field in self.fields for i in range(self.n_cells)]
+
+        self.equations = [parse_latex(eq) for eq in self.equations_latex]
+        if len(self.equations) != len(self.fields):
+            raise ValueError("Method-of-lines system needs one equation template per field")
+
+        # Слоты шаблона: (номер поля, сдвиг) -> символ-заменитель
+        self.slots = []
+        replacements = {}
+        reserved = {COORDINATE, CELL_WIDTH, 't'}
+        params = set()
+        pattern = re.compile(r'^(?P<field>.+?)(?:_(?:i|\{i(?:(?P<sign>[+-])(?P<shift>\d+))?\}))?$')
+        for eq in self.equations:
+            for symbol in eq.free_symbols:
+                name = str(symbol)
+                match = pattern.match(name)
+                if match and match.group('field') in self.fields:
+                    shift = int(match.group('shift') or 0) * (-1 if match.group('sign') == '-' else 1)
+                    slot = (self.fields.index(match.group('field')), shift)
+                    if slot not in self.slots:
+                        self.slots.append(slot)
+                    replacements[symbol] = sp.Symbol(f'_slot_{slot[0]}_{slot[1] + 1000}')
+                elif name not in reserved:
+                    params.add(symbol)
+
+        self.slots.sort()
+        self.slot_symbols = [sp.Symbol(f'_slot_{f}_{k + 1000}') for f, k in self.slots]
+        self.params = sorted(params, key=str)
+        self.templates = [eq.xreplace(replacements) for eq in self.equations]
+        self.ghost = max([abs(k) for _, k in self.slots] + [0])
+        if self.ghost >= self.n_cells:
+            raise ValueError("Stencil is wider than the grid")
+
+        t = sp.Symbol('t')
+        self._args = [t] + self.slot_symbols + [sp.Symbol(COORDINATE), sp.Symbol(CELL_WIDTH)] + self.params
+        self.rhs_compiled = None
+        self.jac_compiled = None
+        self._jac_pattern = None
+
+    # --- правая часть -------------------------------------------------------------------------
+
+    def _padded(self, field_index, u):
+        """Поле с фиктивными ячейками ghost с каждой стороны"""
+        g = self.ghost
+        if g == 0:
+            return u
+        (left_type, left_value), (right_type, right_value) = self.boundary[self.fields[field_index]]
+        if left_type == 'periodic':
+            return np.concatenate([u[-g:], u, u[:g]])
+
+        m = np.arange(1, g + 1)
+        # Фиктивная ячейка -m слева отражает ячейку m-1, справа N-1+m отражает N-m
+        left_mirror = u[m - 1]
+        right_mirror = u[self.n_cells - m]
+        if left_type == 'dirichlet':
+            left = 2 * left_value - left_mirror
+        else:
+            left = left_mirror - (2 * m - 1) * self.dx * left_value
+        if right_type == 'dirichlet':
+            right = 2 * right_value - right_mirror
+        else:
+            right = right_mirror + (2 * m - 1) * self.dx * right_value
+        return np.concatenate([left[::-1], u, right])
+
+    def _slot_values(self, y):
+        U = np.asarray(y, dtype=float).reshape(len(self.fields), self.n_cells)
+        padded = [self._padded(f, U[f]) for f in range(len(self.fields))]
+        g, n = self.ghost, self.n_cells
+        return [padded[f][g + k:g + k + n] for f, k in self.slots]
+
+    def compile(self):
+        self.rhs_compiled = sp.lambdify(self._args, self.templates, 'numpy', cse=True)
+        return self.rhs_compiled
+
+    def right_hand_side(self, t, y, param_values):
+        if self.rhs_compiled is None:
+            self.compile()
+        result = self.rhs_compiled(t, *self._slot_values(y), self.x, self.dx, *param_values)
+        return np.concatenate([np.broadcast_to(np.asarray(r, dtype=float), (self.n_cells,)) for r in result])
+
+    # --- разреженный якобиан ------------------------------------------------------------------
+
+    def compile_jacobian(self):
+        derivatives = [sp.diff(template, symbol) for template in self.templates for symbol in self.slot_symbols]
+        self.jac_compiled = sp.lambdify(self._args, derivatives, 'numpy', cse=True)
+        self._jac_pattern = self._sparsity_layout()
+        return self.jac_compiled
+
+    def _sparsity_layout(self):
+        """
+        Для каждой пары (уравнение, слот): строки, столбцы и коэффициенты отражения.
+        Сосед за границей - фиктивная ячейка, линейно выраженная через внутреннюю (±1)
+        """
+        n = self.n_cells
+        i = np.arange(n)
+        layout = []
+        for eq_index in range(len(self.fields)):
+            for f, k in self.slots:
+                j = i + k
+                coefficient = np.ones(n)
+                (left_type, _), (right_type, _) = self.boundary[self.fields[f]]
+                if left_type == 'periodic':
+                    j = j % n
+                else:
+                    left = j < 0
+                    right = j >= n
+                    j = np.where(left, -j - 1, np.where(right, 2 * n - 1 - j, j))
+                    if left_type == 'dirichlet':
+                        coefficient[left] = -1.0
+                    if right_type == 'dirichlet':
+                        coefficient[right] = -1.0
+                layout.append((eq_index * n + i, f * n + j, coefficient))
+        return layout
+
+    def jacobian(self, t, y, param_values):
+        """Якобиан в формате scipy.sparse.csc_matrix"""
+        if self.jac_compiled is None:
+            self.compile_jacobian()
+        values = self.jac_compiled(t, *self._slot_values(y), self.x, self.dx, *param_values)
+
+        rows, cols, data = [], [], []
+        for (row, col, coefficient), value in zip(self._jac_pattern, values):
+            rows.append(row)
+            cols.append(col)
+            data.append(coefficient * np.broadcast_to(np.asarray(value, dtype=float), (self.n_cells,)))
+        size = len(self.fields) * self.n_cells
+        # Повторяющиеся (строка, столбец) складываются - так учитываются и отраженные соседи
+        return scipy.sparse.csc_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                                       shape=(size, size))
+
+    # --- начальные условия ----------------------------------------------------------------------
+
+    def initial_state(self, initial_latex, param_values):
+        """Начальные профили полей: по формуле от x (или числу) на поле"""
+        profiles = []
+        x = sp.Symbol(COORDINATE)
+        for expr_latex in initial_latex:
+            expr = parse_latex(str(expr_latex)).subs(sp.Symbol('pi'), sp.pi)
+            expr = expr.subs({p: v for p, v in zip(self.params, param_values)})
+            f = sp.lambdify([x], expr, 'numpy')
+            profiles.append(np.broadcast_to(np.asarray(f(self.x), dtype=float), (self.n_cells,)))
+        return np.concatenate(profiles)
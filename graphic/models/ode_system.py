@@ -1,5 +1,6 @@
 import sympy as sp
-from sympy.parsing.latex import parse_latex
+from utils.latex_parser import parse_latex
+from utils.cse_stats import cse_statistics
 import numpy as np
 
 
@@ -20,25 +21,199 @@ class ODESystem:
             if sym not in self.variables and str(sym) != 't':
                 self.params.append(sym)
 
+        # Ядра с подставленными параметрами помнят, для каких значений они собраны:
+        # при других значениях параметров они пересобираются, а не считают старую систему
         self.func_compiled = None
+        self.func_param_values = None
+        self.jac_compiled = None
+        self.jac_param_values = None
+        self.fused_compiled = None
+        self.fused_param_values = None
+        self.sens_compiled = None
+        self.sensitivity_params = None
+        self.sens_param_values = None
+        self.generic_compiled = None
+        self.fused_generic_compiled = None
+        self.sens_generic_compiled = None
+        self.sens_generic_params = None
 
-    def compile(self, param_values):
-        t = sp.Symbol('t')
-
+    def substitute_params(self, param_values):
         substituted = []
         for eq in self.equations:
             expr = eq
             for param, value in zip(self.params, param_values):
                 expr = expr.subs(param, value)
             substituted.append(expr)
+        return substituted
+
+    def symbolic_jacobian(self, param_values):
+        return sp.Matrix(self.substitute_params(param_values)).jacobian(self.variables)
+
+    # Все функции ниже генерируются с cse=True: общие подвыражения (например, exp(h*s),
+    # встречающееся в нескольких уравнениях и в якобиане) вычисляются один раз за вызов
+    def compile(self, param_values):
+        t = sp.Symbol('t')
+
+        substituted = self.substitute_params(param_values)
 
         args = [t] + self.variables
-        self.func_compiled = sp.lambdify(args, substituted, 'numpy')
+        self.func_compiled = sp.lambdify(args, substituted, 'numpy', cse=True)
+        self.func_param_values = list(param_values)
         return self.func_compiled
 
+    def compile_jacobian(self, param_values):
+        """Компилирует якобиан df/dy, полученный символьно из тех же уравнений"""
+        t = sp.Symbol('t')
+
+        jac = self.symbolic_jacobian(param_values)
+
+        # lambdify применяет CSE только к плоскому списку выражений, поэтому матрицу разворачиваем
+        args = [t] + self.variables
+        self.jac_compiled = sp.lambdify(args, list(jac), 'numpy', cse=True)
+        self.jac_param_values = list(param_values)
+        return self.jac_compiled
+
+    def compile_fused(self, param_values):
+        """Одно ядро, которое за вызов считает и правую часть, и якобиан с общими подвыражениями"""
+        t = sp.Symbol('t')
+
+        substituted = self.substitute_params(param_values)
+        jac = sp.Matrix(substituted).jacobian(self.variables)
+
+        args = [t] + self.variables
+        self.fused_compiled = sp.lambdify(args, substituted + list(jac), 'numpy', cse=True)
+        self.fused_param_values = list(param_values)
+        return self.fused_compiled
+
+    def sensitivity_equations(self, param_values, sensitivity_params):
+        """
+        Уравнения прямой чувствительности для расширенного состояния [y, S], S[i][k] = dy_i/dp_k:
+        dS/dt = (df/dy)·S + df/dp. Производные берутся символьно, затем подставляются значения параметров
+        (param_values=None - параметры остаются символами).
+        Возвращает (выражения, символы S построчно)
+        """
+        by_name = {str(p): p for p in self.params}
+        for name in sensitivity_params:
+            if name not in by_name:
+                raise ValueError(f"Parameter '{name}' does not appear in the equations (available: {sorted(by_name)})")
+        sens_symbols = [by_name[name] for name in sensitivity_params]
+
+        n, m = len(self.variables), len(sens_symbols)
+        S = sp.Matrix(n, m, lambda i, k: sp.Symbol(f'S_{i}_{k}'))
+
+        f = sp.Matrix(self.equations)
+        rhs_sens = f.jacobian(self.variables) * S + f.jacobian(sens_symbols)
+
+        exprs = list(f) + list(rhs_sens)
+        if param_values is not None:
+            values = dict(zip(self.params, param_values))
+            exprs = [expr.subs(values) for expr in exprs]
+        return exprs, list(S)
+
+    def compile_sensitivity(self, param_values, sensitivity_params):
+        t = sp.Symbol('t')
+
+        exprs, sens_symbols = self.sensitivity_equations(param_values, sensitivity_params)
+
+        args = [t] + self.variables + sens_symbols
+        self.sens_compiled = sp.lambdify(args, exprs, 'numpy', cse=True)
+        self.sensitivity_params = list(sensitivity_params)
+        self.sens_param_values = list(param_values)
+        return self.sens_compiled
+
+    def sensitivity_right_hand_side(self, t, y_aug, param_values, sensitivity_params):
+        """Правая часть расширенной системы: состояние и матрица чувствительностей (построчно) в одном векторе"""
+        if (self.sens_compiled is None or self.sensitivity_params != list(sensitivity_params)
+                or self.sens_param_values != list(param_values)):
+            self.compile_sensitivity(param_values, sensitivity_params)
+
+        result = self.sens_compiled(t, *y_aug)
+        return np.array(result, dtype=float)
+
+    # Параметро-общие версии: параметры передаются аргументами при каждом вызове, а не подставляются
+    # при компиляции. Одна компиляция обслуживает любые значения параметров (подбор параметров,
+    # ансамбли), а значения параметров могут быть массивами - тогда вычисление векторизуется.
+    def compile_generic(self):
+        t = sp.Symbol('t')
+
+        args = [t] + self.variables + self.params
+        self.generic_compiled = sp.lambdify(args, self.equations, 'numpy', cse=True)
+        return self.generic_compiled
+
+    def right_hand_side_generic(self, t, y, param_values):
+        if self.generic_compiled is None:
+            self.compile_generic()
+
+        result = self.generic_compiled(t, *y, *param_values)
+        return np.array(result)
+
+    def compile_fused_generic(self):
+        """Правая часть и якобиан одним ядром, параметры - аргументы (касательная динамика ансамблей)"""
+        t = sp.Symbol('t')
+
+        jac = sp.Matrix(self.equations).jacobian(self.variables)
+
+        args = [t] + self.variables + self.params
+        self.fused_generic_compiled = sp.lambdify(args, self.equations + list(jac), 'numpy', cse=True)
+        return self.fused_generic_compiled
+
+    def rhs_and_jacobian_generic(self, t, y, param_values):
+        """y - (переменные, траектории); возвращает f (переменные, траектории) и J (n, n, траектории)"""
+        if self.fused_generic_compiled is None:
+            self.compile_fused_generic()
+
+        n = len(self.variables)
+        shape = np.shape(y)[1:]
+        result = self.fused_generic_compiled(t, *y, *param_values)
+        # Постоянные элементы (скаляры) растягиваются присваиванием
+        values = np.empty((len(result),) + shape)
+        for i, r in enumerate(result):
+            values[i] = r
+        return values[:n], values[n:].reshape((n, n) + shape)
+
+    def compile_sensitivity_generic(self, sensitivity_params):
+        t = sp.Symbol('t')
+
+        exprs, sens_symbols = self.sensitivity_equations(None, sensitivity_params)
+
+        args = [t] + self.variables + sens_symbols + self.params
+        self.sens_generic_compiled = sp.lambdify(args, exprs, 'numpy', cse=True)
+        self.sens_generic_params = list(sensitivity_params)
+        return self.sens_generic_compiled
+
+    def sensitivity_right_hand_side_generic(self, t, y_aug, param_values, sensitivity_params):
+        if self.sens_generic_compiled is None or self.sens_generic_params != list(sensitivity_params):
+            self.compile_sensitivity_generic(sensitivity_params)
+
+        result = self.sens_generic_compiled(t, *y_aug, *param_values)
+        return np.array(result, dtype=float)
+
     def right_hand_side(self, t, y, param_values):
-        if self.func_compiled is None:
+        if self.func_compiled is None or self.func_param_values != list(param_values):
             self.compile(param_values)
 
         result = self.func_compiled(t, *y)
-        return np.array(result)
\ No newline at end of file
+        return np.array(result)
+
+    def jacobian(self, t, y, param_values):
+        if self.jac_compiled is None or self.jac_param_values != list(param_values):
+            self.compile_jacobian(param_values)
+
+        n = len(self.variables)
+        result = self.jac_compiled(t, *y)
+        return np.array(result, dtype=float).reshape(n, n)
+
+    def rhs_and_jacobian(self, t, y, param_values):
+        if self.fused_compiled is None or self.fused_param_values != list(param_values):
+            self.compile_fused(param_values)
+
+        n = len(self.variables)
+        result = np.array(self.fused_compiled(t, *y), dtype=float)
+        return result[:n], result[n:].reshape(n, n)
+
+    def cse_report(self, param_values, include_jacobian=False):
+        """Число трансцендентных вычислений на один вызов ядра до и после CSE"""
+        exprs = self.substitute_params(param_values)
+        if include_jacobian:
+            exprs = exprs + list(sp.Matrix(exprs).jacobian(self.variables))
+        return cse_statistics(exprs)
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Стохастическая система (СДУ Ито) с диагональным шумом:
+    dy_k = f_k(t, y) dt + g_k(t, y) dW_k,
+где f_k - уравнения кривой (снос), g_k - коэффициенты диффузии в том же синтаксисе LaTeX,
+W_k - независимые винеровские процессы (по одному на переменную; "0" - переменная без шума).
+
+Все функции параметро-общие (как ODESystem.compile_generic): параметры передаются аргументами,
+значения переменных - массивы по траекториям, вычисление векторизуется по ансамблю.
+"""
+
+import numpy as np
+import sympy as sp
+
+from utils.latex_parser import parse_latex
+
+
+class SDESystem:
+    def __init__(self, equations_latex, diffusion_latex, variable_names):
+        if len(diffusion_latex) != len(equations_latex):
+            raise ValueError("Noise block needs one diffusion term per equation")
+        self.equations_latex = equations_latex
+        self.diffusion_latex = diffusion_latex
+        self.variable_names = variable_names
+        self.variables = [sp.Symbol(name) for name in variable_names]
+        self.drift = [parse_latex(eq) for eq in equations_latex]
+        self.diffusion = [parse_latex(str(g)) for g in diffusion_latex]
+
+        all_symbols = set()
+        for expr in self.drift + self.diffusion:
+            all_symbols.update(expr.free_symbols)
+        # Порядок по именам - одинаковый в любом процессе
+        self.params = sorted((s for s in all_symbols if s not in self.variables and str(s) != 't'), key=str)
+
+        self.compiled = None
+
+    def milstein_terms(self):
+        """Поправка Мильштейна для диагонального шума: 1/2 · g_k · dg_k/dy_k"""
+        return [sp.Rational(1, 2) * g * sp.diff(g, y) for g, y in zip(self.diffusion, self.variables)]
+
+    def compile(self):
+        """Одно ядро: снос, диффузия и поправка Мильштейна с общими подвыражениями"""
+        t = sp.Symbol('t')
+        args = [t] + self.variables + self.params
+        self.compiled = sp.lambdify(args, self.drift + self.diffusion + self.milstein_terms(), 'numpy', cse=True)
+        return self.compiled
+
+    def coefficients(self, t, Y, param_values):
+        """Y - (переменные, траектории). Возвращает (f, g, поправка Мильштейна) той же формы"""
+        if self.compiled is None:
+            self.compile()
+        result = self.compiled(t, *Y, *param_values)
+        values = np.array([np.broadcast_to(np.asarray(r, dtype=float), Y.shape[1:]) for r in result])
+        n = len(self.variables)
+        return values[:n], values[n:2 * n], values[2 * n:]
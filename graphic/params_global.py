@@ -26,4 +26,9 @@ n_points = 10000
 #rtol = 1e-9  # это точность для метода DOP853
 #atol = 1e-12 # это точность для метода DOP853
 #default_solver_method = 'RK45'    # в качетсве метода по дефолту используем метод DOP853
+#default_solver_method = 'auto'    # метод выбирается автоматически по оценке жесткости системы
+#solution_cache = False    # отключить кэш решений с контрольными точками (по умолчанию решения переиспользуются и продолжаются)
+#solution_cache_size = 64    # сколько решений держит кэш (при переполнении вытесняются давно не использованные)
+#field_grid_cache = True    # сохранять сетки правой части (векторное поле, изоклины) на диск в cache/field_grids
+#chunked_threshold = 1000000    # с такого n_points графики функций считаются по кускам в заранее выделенный массив
 # Если нужно честно строить много точек, то можно воспользоваться методом RK45 и грузануть в него 5 миллионов точек, в мою систему как раз вписывается, может чуть-чуть сброс на диск есть, но некритично в целом
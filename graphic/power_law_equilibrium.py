@@ -93,67 +93,208 @@ def compute_discriminant(s_star, w_star, a, b, alpha, beta, c, h, g_type='exp'):
     D = term1**2 - term2
     return D
 
-def plot_s_w_vs_parameter(param_values, param_name, a_fixed=1, b_fixed=0.01, alpha_fixed=2,
-                          beta_fixed=1, c_fixed=0.3, h=0.1, g_types=['exp', 'quadratic', 'linear'],
-                          output_dir='output/power_law'):
+# Аналитические производные МФ g'(s) - для векторизованного поиска равновесий и якобиана
+def g_exp_prime(s, h):
+    return h * np.exp(h * s)
+
+def g_quadratic_prime(s, h):
+    return 2 * h**2 * s
+
+def g_linear_prime(s, h):
+    return h * np.ones_like(s)
+
+MATERIAL_FUNCTION_DERIVATIVES = {
+    'exp': g_exp_prime,
+    'quadratic': g_quadratic_prime,
+    'linear': g_linear_prime
+}
+
+# Коды типов равновесия для карты устойчивости
+NO_EQUILIBRIUM = -1
+STABLE_NODE = 0
+STABLE_FOCUS = 1
+UNSTABLE_NODE = 2
+UNSTABLE_FOCUS = 3
+SADDLE = 4
+
+EQUILIBRIUM_TYPE_NAMES = {
+    STABLE_NODE: 'устойчивый узел',
+    STABLE_FOCUS: 'устойчивый фокус',
+    UNSTABLE_NODE: 'неустойчивый узел',
+    UNSTABLE_FOCUS: 'неустойчивый фокус',
+    SADDLE: 'седло',
+    NO_EQUILIBRIUM: 'нет равновесия'
+}
+
+def find_equilibrium_grid(a, b, alpha, h, g_type='exp', iterations=60):
     """
-    Строит зависимости s*(param) и w*(param)
+    Векторизованный поиск s* для массивов параметров (любой формы, с broadcasting).
+    F(s) = a·(1 + bg(s))^(-α) - s строго убывает при s > 0, F(0) > 0, F(a) <= 0,
+    поэтому корень единственен и лежит в [0, a]: метод Ньютона с аналитической g'(s),
+    а если шаг выходит из текущего отрезка - деление пополам
+    """
+    g_func = MATERIAL_FUNCTIONS[g_type]
+    g_prime = MATERIAL_FUNCTION_DERIVATIVES[g_type]
+    a, b, alpha, h = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (a, b, alpha, h)])
+
+    low = np.zeros_like(a)
+    high = a.copy()
+    s = 0.5 * a
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            bg = 1.0 + b * g_func(s, h)
+            F = a * bg ** (-alpha) - s
+            dF = -a * alpha * b * g_prime(s, h) * bg ** (-alpha - 1) - 1.0
+            low = np.where(F > 0, s, low)
+            high = np.where(F > 0, high, s)
+            newton = s - F / dF
+            inside = np.isfinite(newton) & (newton > low) & (newton < high)
+            s_next = np.where(inside, newton, 0.5 * (low + high))
+            if np.all(np.abs(s_next - s) <= 1e-13 * (1 + np.abs(s))):
+                s = s_next
+                break
+            s = s_next
+
+        w = 1.0 / (1.0 + b * g_func(s, h))
+    valid = (a > 0) & np.isfinite(s) & np.isfinite(w)
+    return np.where(valid, s, np.nan), np.where(valid, w, np.nan)
+
+def classify_equilibrium_grid(a, b, alpha, beta, c, h, g_type='exp'):
+    """
+    Тип равновесия для массивов параметров по следу и определителю точного якобиана
+    системы ṡ = a·w^β - s·w^(β-α), ẇ = c[(1-w) - bg(s)w] в точке (s*, w*).
+    Возвращает (коды типов, s*, w*, след, определитель)
+    """
+    g_func = MATERIAL_FUNCTIONS[g_type]
+    g_prime = MATERIAL_FUNCTION_DERIVATIVES[g_type]
+    s, w = find_equilibrium_grid(a, b, alpha, h, g_type)
+    a, b, alpha, beta, c, h = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (a, b, alpha, beta, c, h)])
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        J11 = -w ** (beta - alpha)
+        J12 = a * beta * w ** (beta - 1) - s * (beta - alpha) * w ** (beta - alpha - 1)
+        J21 = -c * b * g_prime(s, h) * w
+        J22 = -c * (1 + b * g_func(s, h))
+        trace = J11 + J22
+        det = J11 * J22 - J12 * J21
+        discriminant = trace**2 - 4 * det
+
+    codes = np.where(trace < 0,
+                     np.where(discriminant < 0, STABLE_FOCUS, STABLE_NODE),
+                     np.where(discriminant < 0, UNSTABLE_FOCUS, UNSTABLE_NODE))
+    codes = np.where(det < 0, SADDLE, codes)
+    codes = np.where(np.isfinite(trace) & np.isfinite(det), codes, NO_EQUILIBRIUM)
+    return codes, s, w, trace, det
+
+def stability_map(param_x, x_values, param_y, y_values, fixed, g_type='exp', levels=2):
     """
-    colors = ['black', 'blue', 'red']
-    linestyles = ['-', '--', ':']
-
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-
-    for idx, g_type in enumerate(g_types):
-        s_values = []
-        w_values = []
-
-        for param in param_values:
-            # Устанавливаем параметры
-            if param_name == 'b':
-                a, b, alpha, beta = a_fixed, param, alpha_fixed, beta_fixed
-            elif param_name == 'alpha':
-                a, b, alpha, beta = a_fixed, b_fixed, param, beta_fixed
-            elif param_name == 'a':
-                a, b, alpha, beta = param, b_fixed, alpha_fixed, beta_fixed
-            else:
-                raise ValueError(f"Unknown parameter: {param_name}")
-
-            s_star, w_star = find_equilibrium(a, b, alpha, h, g_type)
-            if s_star is not None:
-                s_values.append(s_star)
-                w_values.append(w_star)
-            else:
-                s_values.append(np.nan)
-                w_values.append(np.nan)
-
-        # График s*(param)
-        ax1.plot(param_values, s_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-        # График w*(param)
-        ax2.plot(param_values, w_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-    ax1.set_xlabel(param_name)
-    ax1.set_ylabel('s*')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
-    ax2.set_xlabel(param_name)
-    ax2.set_ylabel('w*')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
+    Карта типов равновесия на плоскости двух параметров.
+    x_values, y_values - узлы итоговой сетки (длины кратны 2^levels, шкала может быть логарифмической).
+    Сначала классифицируется грубая сетка, затем уточняются только ячейки, где тип меняется.
+    fixed - значения остальных параметров {a, b, alpha, beta, c, h}
+    Возвращает (коды формы (len(y), len(x)), число классифицированных точек)
+    """
+    from core.basin_map import refine_labels
+
+    counter = [0]
+
+    def classify(xs, ys):
+        values = dict(fixed)
+        values[param_x] = xs
+        values[param_y] = ys
+        counter[0] += xs.size
+        codes, _, _, _, _ = classify_equilibrium_grid(values['a'], values['b'], values['alpha'], values['beta'],
+                                                      values['c'], values['h'], g_type)
+        return codes
+
+    codes = refine_labels(classify, np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float), levels)
+    return codes, counter[0]
+
+def _cell_edges(values, log):
+    # Границы ячеек для pcolormesh: середины между узлами (в логарифмической шкале - геометрические)
+    v = np.log10(values) if log else np.asarray(values, dtype=float)
+    edges = np.concatenate([[v[0] - 0.5 * (v[1] - v[0])], 0.5 * (v[1:] + v[:-1]), [v[-1] + 0.5 * (v[-1] - v[-2])]])
+    return 10 ** edges if log else edges
+
+def plot_stability_map(param_x, x_range, param_y, y_range, a_fixed=1, b_fixed=0.01, alpha_fixed=2,
+                       beta_fixed=1, c_fixed=0.3, h=0.1, g_type='exp', resolution=512, levels=2,
+                       log_x=False, log_y=False, output_dir='output/power_law'):
+    """
+    Карта устойчивости на плоскости (param_x, param_y): области узлов, фокусов и седел.
+    resolution - итоговая сетка resolution × resolution (уточняется вдоль границ областей)
+    """
+    import time
+    from matplotlib.colors import ListedColormap
+    from matplotlib.patches import Patch
+
+    n = resolution // 2**levels * 2**levels
+    x_values = np.geomspace(*x_range, n) if log_x else np.linspace(*x_range, n)
+    y_values = np.geomspace(*y_range, n) if log_y else np.linspace(*y_range, n)
+    fixed = {'a': a_fixed, 'b': b_fixed, 'alpha': alpha_fixed, 'beta': beta_fixed, 'c': c_fixed, 'h': h}
+
+    start = time.perf_counter()
+    codes, n_points = stability_map(param_x, x_values, param_y, y_values, fixed, g_type, levels)
+    print(f"Карта {n}×{n}: классифицировано {n_points} точек ({100 * n_points / codes.size:.1f}%), "
+          f"{time.perf_counter() - start:.2f} с")
+
+    colors = {NO_EQUILIBRIUM: 'white', STABLE_NODE: '#1f78b4', STABLE_FOCUS: '#a6cee3',
+              UNSTABLE_NODE: '#e31a1c', UNSTABLE_FOCUS: '#fb9a99', SADDLE: '#fdbf6f'}
+    order = sorted(colors)
+    index = np.searchsorted(order, codes)
+
+    fig, ax = plt.subplots(figsize=(8, 7))
+    ax.pcolormesh(_cell_edges(x_values, log_x), _cell_edges(y_values, log_y), index,
+                  cmap=ListedColormap([colors[k] for k in order]), vmin=-0.5, vmax=len(order) - 0.5,
+                  shading='flat', rasterized=True)
+    if log_x:
+        ax.set_xscale('log')
+    if log_y:
+        ax.set_yscale('log')
+
+    present = [k for k in order if np.any(codes == k)]
+    ax.legend(handles=[Patch(facecolor=colors[k], edgecolor='gray', label=EQUILIBRIUM_TYPE_NAMES[k])
+                       for k in present], loc='best')
+    ax.set_xlabel(param_x)
+    ax.set_ylabel(param_y)
+    ax.set_title(f'Тип равновесия, g={g_type}')
 
     plt.tight_layout()
 
     # Сохранение
     os.makedirs(output_dir, exist_ok=True)
-    filename = f'fig_s_w_vs_{param_name}_power.svg'
+    filename = f'fig_stability_map_{param_x}_{param_y}_power.svg'
     plt.savefig(os.path.join(output_dir, filename))
     plt.close()
 
     print(f"Saved: {filename}")
+    return codes
+
+def _fixed(a_fixed, b_fixed, alpha_fixed, beta_fixed, c_fixed, h):
+    return {'a': a_fixed, 'b': b_fixed, 'alpha': alpha_fixed, 'beta': beta_fixed, 'c': c_fixed, 'h': h}
+
+def _save_sweep(config, output_dir, filename):
+    """
+    Рисунки развертки строятся общим кодом core/equilibrium_sweep.py (тип конфигурации equilibrium_sweep):
+    равновесия берутся из EQUILIBRIUM_CACHE, поэтому одинаковые точки разных рисунков решаются один раз
+    """
+    from core.equilibrium_sweep import run_equilibrium_sweep
+
+    run_equilibrium_sweep(config, os.path.join(output_dir, filename))
+    print(f"Saved: {filename}")
+
+def plot_s_w_vs_parameter(param_values, param_name, a_fixed=1, b_fixed=0.01, alpha_fixed=2,
+                          beta_fixed=1, c_fixed=0.3, h=0.1, g_types=['exp', 'quadratic', 'linear'],
+                          output_dir='output/power_law'):
+    """
+    Строит зависимости s*(param) и w*(param)
+    """
+    if param_name not in ('b', 'alpha', 'a'):
+        raise ValueError(f"Unknown parameter: {param_name}")
+
+    _save_sweep({'quantity': 's_w', 'parameter': {'name': param_name, 'values': param_values},
+                 'fixed': _fixed(a_fixed, b_fixed, alpha_fixed, beta_fixed, c_fixed, h),
+                 'material_functions': g_types},
+                output_dir, f'fig_s_w_vs_{param_name}_power.svg')
 
 def plot_apparent_viscosity_vs_parameter(param_values, param_name, a_fixed=1, b_fixed=0.01,
                                           alpha_fixed=2, beta_fixed=1, c_fixed=0.3, h=0.1,
@@ -162,51 +303,13 @@ def plot_apparent_viscosity_vs_parameter(param_values, param_name, a_fixed=1, b_
     """
     Строит зависимость кажущейся вязкости μ(a)/η₀ = (w*)^β от параметра
     """
-    colors = ['black', 'blue', 'red']
-    linestyles = ['-', '--', ':']
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-
-    for idx, g_type in enumerate(g_types):
-        viscosity_values = []
-
-        for param in param_values:
-            # Устанавливаем параметры
-            if param_name == 'b':
-                a, b, alpha, beta = a_fixed, param, alpha_fixed, beta_fixed
-            elif param_name == 'alpha':
-                a, b, alpha, beta = a_fixed, b_fixed, param, beta_fixed
-            elif param_name == 'a':
-                a, b, alpha, beta = param, b_fixed, alpha_fixed, beta_fixed
-            else:
-                raise ValueError(f"Unknown parameter: {param_name}")
-
-            s_star, w_star = find_equilibrium(a, b, alpha, h, g_type)
-            if s_star is not None and w_star is not None:
-                # Кажущаяся вязкость: μ(a)/η₀ = (w*)^β
-                mu_app = w_star ** beta
-                viscosity_values.append(mu_app)
-            else:
-                viscosity_values.append(np.nan)
-
-        # График μ(a)/η₀ vs param
-        ax.plot(param_values, viscosity_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-    ax.set_xlabel(param_name)
-    ax.set_ylabel('μ(a)/η₀')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-
-    plt.tight_layout()
-
-    # Сохранение
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f'fig5_viscosity_vs_{param_name}_power.svg'
-    plt.savefig(os.path.join(output_dir, filename))
-    plt.close()
+    if param_name not in ('b', 'alpha', 'a'):
+        raise ValueError(f"Unknown parameter: {param_name}")
 
-    print(f"Saved: {filename}")
+    _save_sweep({'quantity': 'viscosity', 'parameter': {'name': param_name, 'values': param_values},
+                 'fixed': _fixed(a_fixed, b_fixed, alpha_fixed, beta_fixed, c_fixed, h),
+                 'material_functions': g_types},
+                output_dir, f'fig5_viscosity_vs_{param_name}_power.svg')
 
 def plot_phase_space_curves(a_fixed=1, b_fixed=0.01, alpha_fixed=2, beta_fixed=1,
                              c_fixed=0.3, h=0.1, g_types=['exp', 'quadratic', 'linear'],
@@ -216,68 +319,14 @@ def plot_phase_space_curves(a_fixed=1, b_fixed=0.01, alpha_fixed=2, beta_fixed=1
     - Параметрическая кривая {s*(b), w*(b)}
     - Параметрическая кривая {s*(α), w*(α)}
     """
-    colors = ['black', 'blue', 'red']
-    linestyles = ['-', '--', ':']
-
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-
-    # Левый график: кривые {s*(b), w*(b)}
-    b_values = np.logspace(-3, 0, 100)
-    for idx, g_type in enumerate(g_types):
-        s_values = []
-        w_values = []
-
-        for b in b_values:
-            s_star, w_star = find_equilibrium(a_fixed, b, alpha_fixed, h, g_type)
-            if s_star is not None:
-                s_values.append(s_star)
-                w_values.append(w_star)
-            else:
-                s_values.append(np.nan)
-                w_values.append(np.nan)
-
-        ax1.plot(s_values, w_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-    ax1.set_xlabel('s*')
-    ax1.set_ylabel('w*')
-    ax1.set_title('Кривые {s*(b), w*(b)}')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
-    # Правый график: кривые {s*(α), w*(α)}
-    alpha_values = np.linspace(0.1, 10, 100)
-    for idx, g_type in enumerate(g_types):
-        s_values = []
-        w_values = []
-
-        for alpha in alpha_values:
-            s_star, w_star = find_equilibrium(a_fixed, b_fixed, alpha, h, g_type)
-            if s_star is not None:
-                s_values.append(s_star)
-                w_values.append(w_star)
-            else:
-                s_values.append(np.nan)
-                w_values.append(np.nan)
-
-        ax2.plot(s_values, w_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-    ax2.set_xlabel('s*')
-    ax2.set_ylabel('w*')
-    ax2.set_title('Кривые {s*(α), w*(α)}')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
-
-    plt.tight_layout()
-
-    # Сохранение
-    os.makedirs(output_dir, exist_ok=True)
-    filename = 'fig3_phase_space_curves_power.svg'
-    plt.savefig(os.path.join(output_dir, filename))
-    plt.close()
-
-    print(f"Saved: {filename}")
+    parameters = [
+        {'name': 'b', 'logspace': [-3, 0, 100], 'title': 'Кривые {s*(b), w*(b)}'},
+        {'name': 'alpha', 'linspace': [0.1, 10, 100], 'title': 'Кривые {s*(α), w*(α)}'},
+    ]
+    _save_sweep({'quantity': 'phase_curve', 'parameter': parameters,
+                 'fixed': _fixed(a_fixed, b_fixed, alpha_fixed, beta_fixed, c_fixed, h),
+                 'material_functions': g_types},
+                output_dir, 'fig3_phase_space_curves_power.svg')
 
 def plot_discriminant_vs_parameter(param_values, param_name, a_fixed=1, b_fixed=0.01,
                                     alpha_fixed=2, beta_fixed=1, c_fixed=0.3, h=0.1,
@@ -285,56 +334,13 @@ def plot_discriminant_vs_parameter(param_values, param_name, a_fixed=1, b_fixed=
     """
     Строит зависимость дискриминанта D от параметра
     """
-    colors = ['black', 'blue', 'red']
-    linestyles = ['-', '--', ':']
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-
-    for idx, g_type in enumerate(g_types):
-        D_values = []
-
-        for param in param_values:
-            # Устанавливаем параметры
-            if param_name == 'a':
-                a, b, alpha, beta, c = param, b_fixed, alpha_fixed, beta_fixed, c_fixed
-            elif param_name == 'b':
-                a, b, alpha, beta, c = a_fixed, param, alpha_fixed, beta_fixed, c_fixed
-            elif param_name == 'c':
-                a, b, alpha, beta, c = a_fixed, b_fixed, alpha_fixed, beta_fixed, param
-            else:
-                raise ValueError(f"Unknown parameter: {param_name}")
-
-            # Находим равновесие
-            s_star, w_star = find_equilibrium(a, b, alpha, h, g_type)
-
-            if s_star is not None and w_star is not None:
-                # Вычисляем дискриминант
-                D = compute_discriminant(s_star, w_star, a, b, alpha, beta, c, h, g_type)
-                D_values.append(D)
-            else:
-                D_values.append(np.nan)
-
-        # График D vs param
-        ax.plot(param_values, D_values, color=colors[idx], linestyle=linestyles[idx],
-                linewidth=1.5, label=f'g={g_type}')
-
-    # Линия D=0 (граница между узлом и фокусом)
-    ax.axhline(y=0, color='gray', linestyle=':', linewidth=1, alpha=0.5)
-
-    ax.set_xlabel(param_name)
-    ax.set_ylabel('D')
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-
-    plt.tight_layout()
+    if param_name not in ('a', 'b', 'c'):
+        raise ValueError(f"Unknown parameter: {param_name}")
 
-    # Сохранение
-    os.makedirs(output_dir, exist_ok=True)
-    filename = f'fig_discriminant_vs_{param_name}_power.svg'
-    plt.savefig(os.path.join(output_dir, filename))
-    plt.close()
-
-    print(f"Saved: {filename}")
+    _save_sweep({'quantity': 'discriminant', 'parameter': {'name': param_name, 'values': param_values},
+                 'fixed': _fixed(a_fixed, b_fixed, alpha_fixed, beta_fixed, c_fixed, h),
+                 'material_functions': g_types},
+                output_dir, f'fig_discriminant_vs_{param_name}_power.svg')
 
 # Основная программа
 if __name__ == "__main__":
@@ -389,4 +395,13 @@ if __name__ == "__main__":
     plot_discriminant_vs_parameter(b_values, 'b', a_fixed=1, alpha_fixed=2, c_fixed=0.3, h=h,
                                     g_types=['exp'], output_dir=output_dir)
 
+    # Карты устойчивости на плоскостях двух параметров
+    print("\nКарта устойчивости на плоскости (a, b)")
+    plot_stability_map('a', (0.1, 50), 'b', (1e-3, 1), alpha_fixed=2, c_fixed=0.3, h=h,
+                       log_y=True, output_dir=output_dir)
+
+    print("\nКарта устойчивости на плоскости (c, α)")
+    plot_stability_map('c', (0.01, 1), 'alpha', (0.1, 10), a_fixed=1, b_fixed=0.01, h=h,
+                       output_dir=output_dir)
+
     print("\nГотово! Графики сохранены в:", output_dir)
@@ -0,0 +1,8 @@
+import sys
+import os
+
+# Модули проекта импортируются от папки graphic, как в main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
@@ -0,0 +1,27 @@
+import numpy as np
+
+from models.ode_system import ODESystem
+from core.basin_map import basin_map
+
+
+# z не меняется, x приходит к z: куда сходится траектория, задает только неотображаемая переменная
+EQUATIONS = ['z - x', '-y', '0']
+VARIABLES = ['x', 'y', 'z']
+EQUILIBRIA = [{'point': (1.0, 0.0), 'kind': 'stable node'}, {'point': (-1.0, 0.0), 'kind': 'stable node'}]
+SETTINGS = {'xlim': (-2.0, 2.0), 'ylim': (-2.0, 2.0), 'base': 4, 'levels': 1, 't_span': (0.0, 40.0),
+            'rtol': 1e-6, 'atol': 1e-9, 'capture_radius': 0.01, 'blowup': 1e8, 'max_steps': 20000}
+
+
+def test_disk_cache_keeps_base_state_and_projection_apart(tmp_path):
+    system = ODESystem(EQUATIONS, VARIABLES)
+    cache_dir = str(tmp_path)
+
+    _, _, raster_plus, n_plus = basin_map(system, [], [0, 1], [0, 0, 1], EQUILIBRIA, SETTINGS, cache_dir)
+    _, _, raster_minus, n_minus = basin_map(system, [], [0, 1], [0, 0, -1], EQUILIBRIA, SETTINGS, cache_dir)
+    assert n_plus > 0 and n_minus > 0
+    assert np.all(raster_plus == 0) and np.all(raster_minus == 1)
+
+    # Другая проекция - тоже другой растр, а повтор берется из кэша
+    assert basin_map(system, [], [1, 0], [0, 0, 1], EQUILIBRIA, SETTINGS, cache_dir)[3] > 0
+    _, _, cached, n_cached = basin_map(system, [], [0, 1], [0, 0, -1], EQUILIBRIA, SETTINGS, cache_dir)
+    assert n_cached == 0 and np.array_equal(cached, raster_minus)
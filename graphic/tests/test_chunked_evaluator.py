@@ -0,0 +1,54 @@
+import numpy as np
+import sympy as sp
+import pytest
+
+from core.chunked_evaluator import ChunkedEvaluator
+
+
+x = sp.Symbol('x', real=True)
+a = sp.Symbol('a')
+
+UNARY = [sp.sin, sp.cos, sp.exp, sp.tanh, lambda e: sp.sqrt(sp.Abs(e) + 1), lambda e: e ** 2, lambda e: 1 / (e ** 2 + 1)]
+BINARY = [lambda p, q: p + q, lambda p, q: p * q, lambda p, q: p - q, lambda p, q: p / (q ** 2 + 2)]
+
+
+def random_expression(rng, n_ops=12):
+    """Выражение, в котором одни и те же подвыражения встречаются несколько раз (материал для CSE)"""
+    pool = [x, sp.exp(x), sp.sin(x) + 1]
+    for _ in range(n_ops):
+        if rng.random() < 0.4:
+            expr = UNARY[rng.integers(len(UNARY))](pool[rng.integers(len(pool))])
+        else:
+            expr = BINARY[rng.integers(len(BINARY))](pool[rng.integers(len(pool))], pool[rng.integers(len(pool))])
+        if expr.free_symbols:
+            pool.append(expr)
+    # Итог собирается из нескольких последних подвыражений пула, у которых много общих частей
+    picks = [pool[i] for i in rng.integers(len(pool) // 2, len(pool), size=3)]
+    return picks[0] * (1 + picks[1]) + sp.tanh(picks[2]) * picks[0]
+
+
+def test_shared_subexpression_is_not_overwritten():
+    # exp(x) - общий буфер: сложение не должно писать в него, пока его читает внешнее умножение
+    evaluator = ChunkedEvaluator(sp.exp(x) * (1 + sp.exp(x)), x)
+    grid = np.linspace(-2, 2, 101)
+    np.testing.assert_allclose(evaluator.evaluate(x=grid), np.exp(grid) * (1 + np.exp(grid)), rtol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_matches_lambdify(seed):
+    rng = np.random.default_rng(seed)
+    expr = random_expression(rng)
+    grid = np.linspace(-3, 3, 1001)
+    with np.errstate(all='ignore'):
+        expected = np.broadcast_to(sp.lambdify(x, expr, 'numpy')(grid), grid.shape)
+        # Маленькие куски - чтобы буферы переиспользовались между кусками
+        actual = ChunkedEvaluator(expr, x).evaluate(x=grid, chunk_size=128)
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=str(expr))
+
+
+def test_params_range_and_threads():
+    expr = a * sp.exp(-x ** 2) * sp.cos(a * x) + sp.exp(-x ** 2)
+    evaluator = ChunkedEvaluator(expr, x, param_values={a: 1.5})
+    expected = sp.lambdify(x, expr.subs(a, 1.5), 'numpy')(np.linspace(-4, 4, 10001))
+    actual = evaluator.evaluate(x_range=(-4, 4), n_points=10001, chunk_size=1000, n_threads=3)
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-15)
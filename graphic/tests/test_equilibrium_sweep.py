@@ -0,0 +1,23 @@
+import numpy as np
+
+import power_law_equilibrium
+from core.equilibrium_sweep import EQUILIBRIUM_CACHE, sweep_points
+
+
+def test_script_figures_go_through_equilibrium_cache(tmp_path):
+    EQUILIBRIUM_CACHE.clear()
+    b_values = np.logspace(-3, 0, 20)
+    power_law_equilibrium.plot_s_w_vs_parameter(b_values, 'b', g_types=['exp'], output_dir=str(tmp_path))
+    assert (tmp_path / 'fig_s_w_vs_b_power.svg').exists()
+
+    keys = sweep_points({'parameter': {'name': 'b', 'values': b_values},
+                         'fixed': {'a': 1, 'alpha': 2, 'h': 0.1}, 'material_functions': ['exp']})
+    assert set(keys) <= set(EQUILIBRIUM_CACHE)
+    for a, b, alpha, h, g_type in keys:
+        assert EQUILIBRIUM_CACHE[(a, b, alpha, h, g_type)] == power_law_equilibrium.find_equilibrium(a, b, alpha, h, g_type)
+
+    # Рис. 8 (D от b) использует те же равновесия и ничего не решает заново
+    n_cached = len(EQUILIBRIUM_CACHE)
+    power_law_equilibrium.plot_discriminant_vs_parameter(b_values, 'b', output_dir=str(tmp_path))
+    assert len(EQUILIBRIUM_CACHE) == n_cached
+    EQUILIBRIUM_CACHE.clear()
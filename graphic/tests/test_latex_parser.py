@@ -0,0 +1,66 @@
+import os
+import glob
+import yaml
+import sympy as sp
+import pytest
+from sympy.parsing.latex import parse_latex as parse_latex_antlr
+
+from utils.latex_parser import parse_latex, parse_latex_fast, UnsupportedLatex, _canonical_subscripts
+
+
+GRAPHIC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _collect(node, formulas):
+    # Уравнения и формулы на любом уровне конфигурации (кривые, шаблоны space_time, пакеты)
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'equations' and isinstance(value, list):
+                formulas.update(str(eq) for eq in value)
+            elif key == 'formula' and isinstance(value, str):
+                formulas.add(value)
+            else:
+                _collect(value, formulas)
+    elif isinstance(node, list):
+        for item in node:
+            _collect(item, formulas)
+
+
+def config_formulas():
+    formulas = set()
+    for path in glob.glob(os.path.join(GRAPHIC_DIR, 'configs', '**', '*.yaml'), recursive=True):
+        with open(path, 'r', encoding='utf-8') as f:
+            _collect(yaml.safe_load(f), formulas)
+    return sorted(formulas)
+
+
+def _names(expr):
+    return sorted(str(s) for s in expr.free_symbols)
+
+
+@pytest.mark.parametrize('formula', config_formulas())
+def test_fast_parser_matches_antlr(formula):
+    expected = _canonical_subscripts(parse_latex_antlr(formula))
+    try:
+        result = parse_latex_fast(formula)
+    except UnsupportedLatex:
+        # Вне подмножества - parse_latex отдает формулу ANTLR
+        result = parse_latex(formula)
+    assert _names(result) == _names(expected)
+    assert sp.simplify(result - expected) == 0
+
+
+@pytest.mark.parametrize('written, name', [
+    ('w_i', 'w_i'), ('w_{i}', 'w_i'), ('D_w', 'D_w'), ('\\Delta_x', 'Delta_x'), ('x_{10}', 'x_10'),
+    ('s_{i+1}', 's_{i+1}'), ('s_{i - 1}', 's_{i-1}'),
+])
+def test_subscript_names(written, name):
+    assert _names(parse_latex_fast(written)) == [name]
+    assert _names(_canonical_subscripts(parse_latex_antlr(written))) == [name]
+
+
+def test_fallback_keeps_subscript_names():
+    # \tanh нет в подмножестве: формула уходит в ANTLR, но имена те же, что у быстрого парсера
+    with pytest.raises(UnsupportedLatex):
+        parse_latex_fast('\\tanh(w_{i}) + s_{i+1}')
+    assert _names(parse_latex('\\tanh(w_{i}) + s_{i+1}')) == ['s_{i+1}', 'w_i']
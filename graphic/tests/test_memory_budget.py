@@ -0,0 +1,85 @@
+import os
+import copy
+import tracemalloc
+import numpy as np
+import matplotlib.pyplot as plt
+
+import main
+import params_global
+from core.function_plotter import FunctionPlotter
+from utils.config_loader import load_config
+from utils.memory_budget import apply_tier, estimate_memory, plan_memory
+
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'configs')
+
+
+def _plotted_values(config):
+    """Значения y всех кривых - как их строит main.plot_function"""
+    plotter = FunctionPlotter(vars(params_global))
+    for curve in config['curves']:
+        plotter.add_curve_from_latex(curve['formula'], curve.get('params', {}), curve['x_range'], curve['style'],
+                                     sampling=curve.get('sampling'), family=curve.get('family'))
+    values = [np.asarray(line.get_ydata(), dtype=float) for line in plotter.curves]
+    plt.close(plotter.fig)
+    return values
+
+
+def test_budget_tiers_do_not_change_function_values():
+    config = load_config(os.path.join(CONFIGS_DIR, 'example_function.yaml'))
+    # Кривая с общими подвыражениями: в режиме chunked она идет через core/chunked_evaluator.py
+    config['curves'].append(dict(copy.deepcopy(config['curves'][0]),
+                                 formula=r'\sin(x) \exp(-x/a) (1 + \exp(-x/a))', params={'a': 3, 'n_points': 200000}))
+    global_params = vars(params_global)
+
+    # Бюджет, при котором планировщик включает float32 и chunked, но не прореживает точки
+    tight = apply_tier(apply_tier(config, global_params, 'float32'), global_params, 'chunked')
+    budget = estimate_memory(tight, global_params)['peak']
+    planned, _, applied = plan_memory(config, global_params, budget)
+    assert applied == ['float32', 'chunked']
+    assert planned['curves'][-1]['sampling'] == 'chunked'
+
+    for budgeted, full in zip(_plotted_values(planned), _plotted_values(config)):
+        assert budgeted.shape == full.shape
+        np.testing.assert_allclose(budgeted, full, rtol=1e-6, atol=1e-7)
+
+
+def _measured_peak(config):
+    tracemalloc.start()
+    try:
+        main.plot_from_config(config)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        plt.close('all')
+
+
+def _ensemble_config(name, block, tmp_path, **settings):
+    config = load_config(os.path.join(CONFIGS_DIR, name))
+    curve = config['curves'][0]
+    curve[block].update(settings, n_workers=1)
+    curve['params'] = dict(curve['params'], n_points=1500)
+    config['output'] = str(tmp_path / 'ensemble.svg')
+    return config
+
+
+def test_uncertainty_curve_estimate_follows_measured_peak(tmp_path):
+    config = _ensemble_config('example_uncertainty.yaml', 'uncertainty', tmp_path, n_samples=300, batch_size=100)
+    estimate = estimate_memory(config, vars(params_global))['peak']
+    peak = _measured_peak(config)
+    assert 0.7 * peak < estimate < 1.3 * peak
+
+
+def test_noise_curve_estimate_follows_measured_peak(tmp_path):
+    config = _ensemble_config('example_sde.yaml', 'noise', tmp_path, n_paths=300, batch_size=100, dt=4e-3)
+    estimate = estimate_memory(config, vars(params_global))['peak']
+    peak = _measured_peak(config)
+    assert 0.7 * peak < estimate < 1.3 * peak
+
+
+def test_nullcline_grid_estimate_follows_measured_peak(tmp_path):
+    config = load_config(os.path.join(CONFIGS_DIR, 'example_nullclines.yaml'))
+    config['output'] = str(tmp_path / 'nullclines.svg')
+    estimate = estimate_memory(config, vars(params_global))['peak']
+    peak = _measured_peak(config)
+    assert 0.7 * peak < estimate < 1.3 * peak
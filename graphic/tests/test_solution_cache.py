@@ -0,0 +1,104 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from models.ode_system import ODESystem
+from core.ode_solver import solve_ode
+from core.solution_cache import SolutionCache
+
+
+# Затухающий осциллятор: y'' + k y' + y = 0
+EQUATIONS = ['v', '-x - k v']
+VARIABLES = ['x', 'v']
+RTOL, ATOL = 1e-10, 1e-12
+
+
+def _system():
+    return ODESystem(EQUATIONS, VARIABLES)
+
+
+def _reference(k, t_span, t_eval):
+    sol = solve_ivp(lambda t, y: [y[1], -y[0] - k * y[1]], t_span, [1, 0], method='DOP853',
+                    rtol=RTOL, atol=ATOL, t_eval=t_eval)
+    return sol.y
+
+
+def test_make_key():
+    system = _system()
+    key = SolutionCache.make_key(system, [0.1], [1, 0], 0, 'DOP853', RTOL, ATOL)
+    # Типы чисел не важны, любое изменение задачи Коши - другой ключ
+    assert key == SolutionCache.make_key(_system(), [0.1], [1.0, 0.0], 0.0, 'DOP853', RTOL, ATOL)
+    assert key != SolutionCache.make_key(system, [0.2], [1, 0], 0, 'DOP853', RTOL, ATOL)
+    assert key != SolutionCache.make_key(system, [0.1], [1, 0.5], 0, 'DOP853', RTOL, ATOL)
+    assert key != SolutionCache.make_key(system, [0.1], [1, 0], 1, 'DOP853', RTOL, ATOL)
+    assert key != SolutionCache.make_key(system, [0.1], [1, 0], 0, 'Radau', RTOL, ATOL)
+
+
+def test_miss_then_hit_inside_solved_interval():
+    cache = SolutionCache()
+    system = _system()
+    t_eval = np.linspace(0, 8, 81)
+    first = cache.solve(system, [0.1], (0, 8), [1, 0], 'DOP853', RTOL, ATOL, t_eval)
+    assert cache.stats['misses'] == 1
+
+    t_inner = np.linspace(1, 5, 41)
+    second = cache.solve(system, [0.1], (0, 5), [1, 0], 'DOP853', RTOL, ATOL, t_inner)
+    assert cache.stats['hits'] == 1 and second.nfev == 0
+    direct = solve_ode(system, [0.1], (0, 8), [1, 0], 'DOP853', RTOL, ATOL, t_inner)
+    np.testing.assert_allclose(second.y, direct.y, rtol=1e-7, atol=1e-9)
+    np.testing.assert_allclose(first.t, t_eval)
+
+    # Другие параметры - промах
+    cache.solve(system, [0.3], (0, 5), [1, 0], 'DOP853', RTOL, ATOL, t_inner)
+    assert cache.stats['misses'] == 2
+
+
+def test_extend_cached_interval():
+    cache = SolutionCache()
+    system = _system()
+    cache.solve(system, [0.1], (0, 8), [1, 0], 'DOP853', RTOL, ATOL, None)
+    key = SolutionCache.make_key(system, [0.1], [1, 0], 0, 'DOP853', RTOL, ATOL)
+    assert cache.checkpoints[key].t_end == 8
+
+    t_eval = np.linspace(0, 20, 201)
+    extended = cache.solve(system, [0.1], (0, 20), [1, 0], 'DOP853', RTOL, ATOL, t_eval)
+    assert cache.stats['extensions'] == 1 and cache.checkpoints[key].t_end == 20
+    direct = solve_ode(system, [0.1], (0, 20), [1, 0], 'DOP853', RTOL, ATOL, t_eval)
+    np.testing.assert_allclose(extended.y, direct.y, rtol=1e-7, atol=1e-8)
+
+    # Точное решение: x = e^{-kt/2} (cos ωt + k/(2ω) sin ωt), ω = sqrt(1 - k²/4)
+    k = 0.1
+    omega = np.sqrt(1 - k ** 2 / 4)
+    exact = np.exp(-k * t_eval / 2) * (np.cos(omega * t_eval) + k / (2 * omega) * np.sin(omega * t_eval))
+    np.testing.assert_allclose(extended.y[0], exact, atol=1e-8)
+
+
+def test_least_recently_used_solution_is_evicted():
+    cache = SolutionCache(max_entries=2)
+    system = _system()
+    for k in (0.1, 0.2):
+        cache.solve(system, [k], (0, 2), [1, 0], 'DOP853', RTOL, ATOL, None)
+    # Обращение к первому решению делает его недавним - вытесняется второе
+    cache.solve(system, [0.1], (0, 1), [1, 0], 'DOP853', RTOL, ATOL, None)
+    cache.solve(system, [0.3], (0, 2), [1, 0], 'DOP853', RTOL, ATOL, None)
+
+    assert len(cache.checkpoints) == 2 and cache.stats['evictions'] == 1
+    keys = [SolutionCache.make_key(system, [k], [1, 0], 0, 'DOP853', RTOL, ATOL) for k in (0.1, 0.2, 0.3)]
+    assert keys[0] in cache.checkpoints and keys[1] not in cache.checkpoints and keys[2] in cache.checkpoints
+
+
+def test_one_system_with_different_params():
+    # Одна и та же ODESystem с новыми параметрами: в кэш должно попадать решение для этих параметров
+    cache = SolutionCache()
+    system = _system()
+    t_eval = np.linspace(0, 6, 61)
+    for k in (0.1, 0.9, 0.3, 0.1):
+        sol = cache.solve(system, [k], (0, 6), [1, 0], 'DOP853', RTOL, ATOL, t_eval)
+        np.testing.assert_allclose(sol.y, _reference(k, (0, 6), t_eval), rtol=1e-7, atol=1e-9)
+    assert cache.stats['misses'] == 3 and cache.stats['hits'] == 1
+
+    # Продолжение берет контрольную точку своих параметров
+    t_long = np.linspace(0, 12, 121)
+    for k in (0.9, 0.3):
+        sol = cache.solve(system, [k], (0, 12), [1, 0], 'DOP853', RTOL, ATOL, t_long)
+        np.testing.assert_allclose(sol.y, _reference(k, (0, 12), t_long), rtol=1e-7, atol=1e-8)
+    assert cache.stats['extensions'] == 2
@@ -0,0 +1,39 @@
+import numpy as np
+
+from models.ode_system import ODESystem
+from core.work_precision import run_work_precision
+
+
+def _config(k):
+    return {
+        'system': {
+            'equations': ['v', '-x - k v'],
+            'variable_names': ['x', 'v'],
+            'initial_conditions': [1, 0],
+            'params': {'k': k},
+            't_span': [0, 10]
+        },
+        'methods': ['DOP853', 'Radau'],
+        'tolerances': [1e-8],
+        'repeats': 1,
+        'n_workers': 1
+    }
+
+
+def test_system_recompiles_for_new_params():
+    system = ODESystem(['v', '-x - k v'], ['x', 'v'])
+    y = [1.0, 0.5]
+    for k in [0.1, 2.0, 0.1]:
+        assert np.allclose(system.right_hand_side(0, y, [k]), [0.5, -1.0 - k * 0.5])
+        assert np.allclose(system.jacobian(0, y, [k]), [[0, 1], [-1, -k]])
+        f, J = system.rhs_and_jacobian(0, y, [k])
+        assert np.allclose(f, [0.5, -1.0 - k * 0.5]) and np.allclose(J, [[0, 1], [-1, -k]])
+
+
+def test_second_run_in_process_uses_its_own_params():
+    # Оба запуска в одном процессе; со старыми параметрами ошибка второго была бы порядка единицы
+    for k in [0.1, 2.0]:
+        result = run_work_precision(_config(k), {})
+        for r in result['results']:
+            assert r['success']
+            assert r['error'] < 1e-5, (k, r['method'], r['error'])
@@ -0,0 +1,41 @@
+import sympy as sp
+
+
+# Функции, вычисление которых заметно дороже арифметики
+TRANSCENDENTAL_FUNCTIONS = (sp.exp, sp.log, sp.sin, sp.cos, sp.tan, sp.sinh, sp.cosh, sp.tanh)
+
+
+def is_transcendental(node):
+    if isinstance(node, TRANSCENDENTAL_FUNCTIONS):
+        return True
+    # Степень с нецелым (или символьным) показателем считается через exp/log
+    if isinstance(node, sp.Pow):
+        return not node.exp.is_Integer and node.exp != sp.Rational(1, 2)
+    return False
+
+
+def count_transcendentals(exprs):
+    """
+    Сколько трансцендентных функций вычисляется при наивной (без CSE) генерации кода:
+    каждое вхождение поддерева считается отдельно, как это делает обычный lambdify
+    """
+    count = 0
+    for expr in exprs:
+        for node in sp.preorder_traversal(sp.sympify(expr)):
+            if is_transcendental(node):
+                count += 1
+    return count
+
+
+def cse_statistics(exprs):
+    """Сравнение числа трансцендентных вычислений до и после исключения общих подвыражений"""
+    exprs = [sp.sympify(expr) for expr in exprs]
+    replacements, reduced = sp.cse(exprs)
+    before = count_transcendentals(exprs)
+    after = count_transcendentals([value for _, value in replacements] + list(reduced))
+    return {
+        'transcendentals_before': before,
+        'transcendentals_after': after,
+        'common_subexpressions': len(replacements),
+        'reduction': 1.0 - after / before if before else 0.0
+    }
@@ -0,0 +1,277 @@
+"""
+Быстрый разбор LaTeX-формул для узкого подмножества, которое используется в наших конфигурациях:
++ - * / ^, \\cdot, \\times, \\frac, \\exp (и \\ln, \\sqrt, \\sin, \\cos), греческие буквы
+(включая наше \\betta), скобки ( ) и { }, \\left( ... \\right), нижние индексы у символов
+(s_i, D_w, s_{i+1} - один символ).
+
+Имя символа с индексом одно и то же при любой записи и любом парсере: индекс из одного символа или
+числа пишется без скобок (w_i и w_{i} - это w_i), индекс-выражение - в скобках без пробелов (s_{i+1});
+имена из sympy.parsing.latex (там всегда w_{i}, s_{i + 1}) приводятся к тому же виду.
+
+Разбор - рекурсивный спуск по той же грамматике, что и у sympy.parsing.latex (ANTLR),
+поэтому приоритеты операций совпадают: неявное умножение сильнее явного и деления
+(a/b c = a/(b c)), степень левоассоциативна (2^3^2 = (2^3)^2).
+Все, что выходит за подмножество (или содержит ошибку), отдается в parse_latex из sympy.
+"""
+
+import re
+import sympy as sp
+
+
+GREEK_LETTERS = {
+    'alpha', 'beta', 'betta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta', 'theta',
+    'vartheta', 'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi', 'pi', 'rho', 'sigma', 'tau',
+    'upsilon', 'phi', 'varphi', 'chi', 'psi', 'omega',
+    'Gamma', 'Delta', 'Theta', 'Lambda', 'Xi', 'Pi', 'Sigma', 'Phi', 'Psi', 'Omega'
+}
+
+FUNCTIONS = {
+    'exp': sp.exp,
+    'ln': sp.log,
+    'sin': sp.sin,
+    'cos': sp.cos,
+}
+
+MUL_COMMANDS = {'cdot', 'times'}
+DIV_COMMANDS = {'div'}
+
+# Команды-пробелы, которые просто пропускаем
+SPACE_COMMANDS = {',', ';', ':', '!', 'quad', 'qquad'}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>\d+(?:\.\d*)?|\.\d+)
+  | (?P<command>\\(?:[A-Za-z]+|[,;:!]))
+  | (?P<letter>[A-Za-z])
+  | (?P<op>[-+*/^(){}_])
+""", re.VERBOSE)
+
+
+class UnsupportedLatex(ValueError):
+    """Формула выходит за поддерживаемое подмножество (или некорректна)"""
+
+
+def tokenize(latex):
+    tokens = []
+    pos = 0
+    while pos < len(latex):
+        match = _TOKEN_RE.match(latex, pos)
+        if match is None:
+            raise UnsupportedLatex(f"Unexpected character {latex[pos]!r} at position {pos}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'space':
+            continue
+        if kind == 'command':
+            value = value[1:]
+            if value in SPACE_COMMANDS:
+                continue
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind, value):
+        token = self.take()
+        if token != (kind, value):
+            raise UnsupportedLatex(f"Expected {value!r}, got {token[1]!r}")
+
+    def parse(self):
+        expr = self.expr()
+        if self.pos != len(self.tokens):
+            raise UnsupportedLatex(f"Unexpected token {self.peek()[1]!r}")
+        return expr
+
+    # expr: additive
+    def expr(self):
+        result = self.mp()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            _, op = self.take()
+            rhs = self.mp()
+            result = sp.Add(result, rhs) if op == '+' else sp.Add(result, -rhs)
+        return result
+
+    # mp: unary ((* | / | \cdot | \times | \div) unary)*
+    def mp(self):
+        result = self.unary()
+        while True:
+            kind, value = self.peek()
+            if (kind, value) == ('op', '*') or (kind == 'command' and value in MUL_COMMANDS):
+                self.take()
+                result = sp.Mul(result, self.unary())
+            elif (kind, value) == ('op', '/') or (kind == 'command' and value in DIV_COMMANDS):
+                self.take()
+                result = sp.Mul(result, sp.Pow(self.unary(), -1))
+            else:
+                return result
+
+    # unary: (+|-) unary | postfix+   (подряд идущие множители - неявное умножение)
+    def unary(self):
+        kind, value = self.peek()
+        if (kind, value) == ('op', '-'):
+            self.take()
+            return -self.unary()
+        if (kind, value) == ('op', '+'):
+            self.take()
+            return self.unary()
+
+        factors = [self.postfix()]
+        while self._starts_factor():
+            factors.append(self.postfix())
+        return sp.Mul(*factors)
+
+    def _starts_factor(self):
+        kind, value = self.peek()
+        if kind in ('number', 'letter'):
+            return True
+        if kind == 'op':
+            return value in ('(', '{')
+        if kind == 'command':
+            return value not in MUL_COMMANDS and value not in DIV_COMMANDS and value != 'right'
+        return False
+
+    # postfix: comp (^ (atom | {expr}))*
+    def postfix(self):
+        base = self.comp()
+        while self.peek() == ('op', '^'):
+            self.take()
+            base = sp.Pow(base, self.exponent())
+        return base
+
+    def exponent(self):
+        kind, value = self.peek()
+        if (kind, value) == ('op', '{'):
+            self.take()
+            result = self.expr()
+            self.expect('op', '}')
+            return result
+        if kind == 'number':
+            # как и в sympy, x^23 означает x^{23}
+            self.take()
+            return sp.Number(value)
+        return self.atom()
+
+    def comp(self):
+        kind, value = self.peek()
+        if (kind, value) == ('op', '('):
+            self.take()
+            result = self.expr()
+            self.expect('op', ')')
+            return result
+        if (kind, value) == ('op', '{'):
+            self.take()
+            result = self.expr()
+            self.expect('op', '}')
+            return result
+        if kind == 'command':
+            if value == 'left':
+                self.take()
+                self.expect('op', '(')
+                result = self.expr()
+                self.expect('command', 'right')
+                self.expect('op', ')')
+                return result
+            if value == 'frac':
+                self.take()
+                numerator = self.group()
+                denominator = self.group()
+                return sp.Mul(numerator, sp.Pow(denominator, -1))
+            if value == 'sqrt':
+                self.take()
+                return sp.sqrt(self.group())
+            if value in FUNCTIONS:
+                self.take()
+                # поддерживаем только форму \exp(...), остальное (\exp x, \exp^2) - через sympy
+                if self.peek() != ('op', '('):
+                    raise UnsupportedLatex(f"\\{value} without parentheses")
+                self.take()
+                argument = self.expr()
+                self.expect('op', ')')
+                return FUNCTIONS[value](argument)
+        return self.atom()
+
+    def group(self):
+        self.expect('op', '{')
+        result = self.expr()
+        self.expect('op', '}')
+        return result
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return sp.Number(value)
+        if kind == 'letter' or (kind == 'command' and value in GREEK_LETTERS):
+            # В sympy f(x) - это применение функции f, а не умножение; такое оставляем ему
+            if self.peek() == ('op', '_'):
+                value = _subscripted(value, self.subscript())
+            if self.peek() == ('op', '('):
+                raise UnsupportedLatex(f"Function application {value}(...)")
+            return sp.Symbol(value)
+        raise UnsupportedLatex(f"Unsupported token {value!r}")
+
+    def subscript(self):
+        # Индекс входит в имя символа как текст: s_i, s_{i+1}
+        self.expect('op', '_')
+        kind, value = self.take()
+        if (kind, value) != ('op', '{'):
+            if kind not in ('letter', 'number'):
+                raise UnsupportedLatex(f"Unsupported subscript {value!r}")
+            return value
+        index = self.expr()
+        self.expect('op', '}')
+        # Как в sympy.parsing.latex: текст индекса - печать выражения
+        return str(index)
+
+
+_SUBSCRIPTED_RE = re.compile(r'^(?P<name>[^_]+)_\{(?P<index>.+)\}$')
+
+
+def _subscripted(name, index):
+    """Имя символа с индексом: w_i, x_10, s_{i+1}"""
+    index = index.replace(' ', '')
+    if re.fullmatch(r'[A-Za-z]+|\d+', index) is None:
+        index = '{' + index + '}'
+    return name + '_' + index
+
+
+def _canonical_subscripts(expr):
+    """Имена символов с индексом из sympy.parsing.latex (w_{i}, s_{i + 1}) в виде быстрого парсера"""
+    replacements = {}
+    for symbol in expr.free_symbols:
+        match = _SUBSCRIPTED_RE.match(symbol.name)
+        if match is not None:
+            replacements[symbol] = sp.Symbol(_subscripted(match.group('name'), match.group('index')))
+    return expr.xreplace(replacements)
+
+
+def parse_latex_fast(latex):
+    """Разбирает формулу из поддерживаемого подмножества, иначе выбрасывает UnsupportedLatex"""
+    return _Parser(tokenize(latex)).parse()
+
+
+def parse_latex(latex):
+    """
+    Разбирает LaTeX-формулу в sympy-выражение: сначала быстрым парсером,
+    при неудаче - через sympy.parsing.latex (импортируется только в этом случае)
+    """
+    try:
+        return parse_latex_fast(latex)
+    except UnsupportedLatex:
+        from sympy.parsing.latex import parse_latex as parse_latex_antlr
+        return _canonical_subscripts(parse_latex_antlr(latex))
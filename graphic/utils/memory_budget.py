@@ -0,0 +1,273 @@
+"""
+Оценка памяти для построения графика и режим бюджета памяти (--memory-budget).
+
+До построения по конфигурации оценивается, сколько памяти займет каждый этап: сетки и массивы
+значений функций, t_eval и решения ОДУ, пакеты и гистограммы ансамблей (uncertainty, noise), сетки
+векторного поля и изоклин и копии данных внутри matplotlib.
+Пик для фигуры = все, что живет до сохранения (массивы кривых + копии matplotlib),
+плюс самый большой временный расход одного этапа (вычисление формулы, интегрирование, отрисовка).
+
+Если прогноз больше бюджета, по очереди включаются режимы экономии, пока прогноз не уложится:
+  float32  - массивы для графиков в float32 вместо float64;
+  chunked  - функции считаются по кускам (core/chunked_evaluator.py), ОДУ интегрируются по отрезкам
+             сетки с записью в заранее выделенный массив (решатель не держит всю траекторию дважды);
+  decimate - число точек на кривую ограничивается разрешением картинки, плотность векторного поля тоже;
+  stream   - массивы кривых пишутся в файлы на диске (memmap), линии растеризуются при сохранении.
+Режимы передаются плотерам через params кривых (plot_dtype, ode_chunks, memmap_dir, rasterized).
+
+Коэффициенты matplotlib измерены через tracemalloc на matplotlib 3.x: Line2D хранит массив точек
+(n×2 float64) и путь, при сохранении создается преобразованная копия пути.
+"""
+
+import copy
+import re
+import numpy as np
+
+from utils.validators import merge_params
+
+
+MPL_BYTES_PER_POINT = 32          # живет вместе с линией до сохранения
+MPL_DRAW_BYTES_PER_POINT = 24     # временно при отрисовке
+QUIVER_BYTES_PER_ARROW = 400      # многоугольник стрелки и его преобразованная копия
+VECTOR_FIELD_ARRAYS = 9           # X, Y, U, V, модуль, нормированные U и V, сетки x и y
+FIELD_GRID_ARRAYS = 2             # U и V сетки изоклин остаются в кэше сеток процесса
+FIELD_GRID_TEMP_ARRAYS = 6        # X, Y, состояние и промежуточные массивы ядра, углы ячеек при поиске равновесий
+DECIMATED_POINTS = 10000          # ~4 точки на пиксель ширины при 8 дюймах и 300 dpi
+DECIMATED_DENSITY = 50
+ODE_CHUNKS = 16
+CHUNK_SIZE = 65536
+# Пакет решений ансамбля (переменные × траектории × точки) и временные массивы его сведения в гистограммы:
+# номера ячеек, координаты из nonzero, плоские индексы для bincount (измерено через tracemalloc)
+ENSEMBLE_VALUE_COPIES = 6
+
+TIERS = ['float32', 'chunked', 'decimate', 'stream']
+
+_UNITS = {'': 1, 'b': 1, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2, 'g': 1024 ** 3, 'gb': 1024 ** 3}
+
+
+def parse_size(text):
+    """'512MB', '2G', '1.5gb', 1000000 -> байты"""
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([a-zA-Z]*)\s*', str(text))
+    if not match or match.group(2).lower() not in _UNITS:
+        raise ValueError(f"Invalid memory size: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def format_size(n_bytes):
+    return f"{n_bytes / 1024 ** 2:.1f} МБ"
+
+
+def _is_family(params):
+    return any(isinstance(value, (list, tuple, dict)) for value in (params or {}).values())
+
+
+def _count_operations(formula_latex):
+    # Сколько временных массивов полного размера создаст lambdify: примерно по одному на операцию,
+    # но numpy освобождает промежуточные результаты, поэтому одновременно живут не больше нескольких
+    from utils.latex_parser import parse_latex
+    try:
+        n_ops = int(parse_latex(formula_latex).count_ops())
+    except Exception:
+        n_ops = 4
+    return max(1, min(n_ops, 4))
+
+
+def _function_curve(curve, global_params):
+    merged = merge_params(global_params, curve.get('params', {}))
+    itemsize = np.dtype(merged.get('plot_dtype', 'float64')).itemsize
+    n = int(merged.get('n_points', 1000))
+    sampling = curve.get('sampling')
+    mode = sampling if isinstance(sampling, str) else (sampling or {}).get('mode')
+    if mode == 'adaptive':
+        n = int((sampling if isinstance(sampling, dict) else {}).get('max_points', n))
+    elif not mode and n >= merged.get('chunked_threshold', 1000000):
+        mode = 'chunked'
+
+    if _is_family(curve.get('params')):
+        n_curves = max(len(v) if isinstance(v, (list, tuple)) else int(v['linspace'][2])
+                       for v in curve['params'].values() if isinstance(v, (list, tuple, dict)))
+        # y (n_кривых × n) и segments (n_кривых × n × 2), LineCollection хранит свою копию segments
+        retained = n * 8 + n_curves * n * (8 + 16 + 16)
+        transient = n_curves * n * 8 * _count_operations(curve['formula'])
+        return retained, transient, n_curves * n
+
+    stored = 0 if merged.get('memmap_dir') else n * itemsize
+    retained = n * 8 + stored + n * MPL_BYTES_PER_POINT
+    if mode == 'chunked':
+        transient = _count_operations(curve['formula']) * CHUNK_SIZE * 8
+    else:
+        transient = _count_operations(curve['formula']) * n * 8
+    return retained, transient, n
+
+
+def _ensemble(n_vars, n_out, n_paths, batch_size, bins):
+    """
+    Временный расход ансамбля (core/uncertainty.py, core/sde_ensemble.py): один пакет траекторий
+    со сведением в гистограммы, общие счетчики, счетчики остальных пакетов в списке результатов
+    и результат bincount
+    """
+    batch_size = min(batch_size, n_paths)
+    n_batches = -(-n_paths // batch_size)
+    batch = ENSEMBLE_VALUE_COPIES * n_vars * batch_size * n_out * 8
+    histograms = (n_batches + 1) * n_vars * n_out * (bins + 2) * 8
+    return batch + histograms
+
+
+def _ode_curve(curve, global_params, plot_type):
+    merged = merge_params(global_params, curve.get('params', {}))
+    itemsize = np.dtype(merged.get('plot_dtype', 'float64')).itemsize
+    n = int(merged.get('n_points', 1000))
+    n_vars = len(curve['variable_names'])
+    n_chunks = max(1, int(merged.get('ode_chunks', 1)))
+
+    if plot_type == 'sensitivity':
+        # Расширенная система: состояние и n_vars × n_params чувствительностей
+        n_rows = n_vars * (1 + len(curve['sensitivity_params']))
+        n_lines = len(curve.get('styles') or []) or n_vars * len(curve['sensitivity_params'])
+        solution = n_rows * n * 8
+        return n * 8 + solution + n_lines * n * MPL_BYTES_PER_POINT, solution, n_lines * n
+
+    if plot_type == 'phase_portrait':
+        n_lines = 1
+    else:
+        n_lines = len(curve['styles'])
+
+    if curve.get('uncertainty'):
+        from core.uncertainty import DEFAULT_SETTINGS
+        settings = dict(DEFAULT_SETTINGS, **curve['uncertainty'])
+        n_bands = len(settings['bands'])
+        transient = _ensemble(n_vars, n, int(settings['n_samples']), int(settings['batch_size']), int(settings['bins']))
+        # Медиана и границы полос; полоса fill_between - многоугольник из 2n точек на переменную
+        retained = n * 8 + (1 + 2 * n_bands) * n_vars * n * 8
+        points = n_lines * n + n_bands * n_vars * 2 * n
+        return retained + points * MPL_BYTES_PER_POINT, transient, points
+
+    if curve.get('noise'):
+        from core.sde_ensemble import DEFAULT_SETTINGS, time_grid
+        settings = dict(DEFAULT_SETTINGS, **curve['noise'])
+        t_span = merged.get('t_span', curve['t_span'])
+        _, n_steps, stride = time_grid(t_span, float(settings['dt']), n)
+        n_out = n_steps // stride + 1
+        n_paths = int(settings['n_paths'])
+        batch_size = min(int(settings['batch_size']), n_paths)
+        n_bands = len(settings['bands'])
+        n_sample_paths = min(int(settings['n_sample_paths']), batch_size)
+        # Приращения dW генерируются блоками по noise_block шагов для всего пакета
+        noise_block = int(settings['noise_block']) * n_vars * batch_size * 8
+        transient = _ensemble(n_vars, n_out, n_paths, batch_size, int(settings['bins'])) + noise_block
+        # Среднее, медиана, границы полос и траектории для рисунка
+        retained = n_out * 8 + (2 + 2 * n_bands + n_sample_paths) * n_vars * n_out * 8
+        points = (n_lines + n_sample_paths * n_vars + n_bands * n_vars * 2) * n_out
+        return retained + points * MPL_BYTES_PER_POINT, transient, points
+
+    stored = 0 if merged.get('memmap_dir') else n_vars * n * itemsize
+    if n_chunks > 1 or itemsize != 8 or merged.get('memmap_dir'):
+        # Решение копируется в отдельный буфер графика, решатель держит только текущий отрезок
+        retained = n * 8 + stored
+        transient = 2 * (n_vars + 1) * (n // n_chunks) * 8
+    else:
+        # solve_ivp собирает значения в t_eval по шагам и склеивает их в один массив - две копии
+        retained = n * 8 + n_vars * n * 8
+        transient = (n_vars + 1) * n * 8
+    return retained + n_lines * n * MPL_BYTES_PER_POINT, transient, n_lines * n
+
+
+def estimate_memory(config, global_params):
+    """
+    Прогноз памяти для одной фигуры.
+    Возвращает {'stages': [(этап, байты)], 'peak': байты}
+    """
+    plot_type = config['type']
+    stages = []
+    retained_total = 0
+    transient_max = 0
+    plotted_points = 0
+
+    vector_field = config.get('vector_field')
+    if plot_type == 'phase_portrait' and vector_field and vector_field.get('enabled', False):
+        density = int(vector_field.get('density', 20))
+        field = density ** 2 * (VECTOR_FIELD_ARRAYS * 8 + QUIVER_BYTES_PER_ARROW)
+        stages.append(('векторное поле', field))
+        retained_total += field
+
+    nullcline_config = config.get('nullclines')
+    if plot_type == 'phase_portrait' and nullcline_config and nullcline_config.get('enabled', False):
+        from core.phase_analysis import shared_resolution
+        resolution = int(nullcline_config.get('resolution', 401))
+        if vector_field and vector_field.get('enabled', False):
+            resolution = shared_resolution(int(vector_field.get('density', 20)), resolution)
+        grid = FIELD_GRID_ARRAYS * resolution ** 2 * 8
+        grid_transient = FIELD_GRID_TEMP_ARRAYS * resolution ** 2 * 8
+        stages.append(('сетка изоклин', grid))
+        stages.append(('сетка изоклин: вычисление', grid_transient))
+        retained_total += grid
+        transient_max = max(transient_max, grid_transient)
+
+    for i, curve in enumerate(config['curves']):
+        if plot_type == 'function':
+            retained, transient, points = _function_curve(curve, global_params)
+        else:
+            retained, transient, points = _ode_curve(curve, global_params, plot_type)
+        stages.append((f'кривая {i + 1}: массивы', retained - points * MPL_BYTES_PER_POINT))
+        stages.append((f'кривая {i + 1}: matplotlib', points * MPL_BYTES_PER_POINT))
+        stages.append((f'кривая {i + 1}: вычисление', transient))
+        retained_total += retained
+        transient_max = max(transient_max, transient)
+        plotted_points += points
+
+    draw = plotted_points * MPL_DRAW_BYTES_PER_POINT
+    stages.append(('отрисовка', draw))
+    transient_max = max(transient_max, draw)
+
+    return {'stages': stages, 'peak': retained_total + transient_max}
+
+
+def _set_curve_param(curve, name, value):
+    curve['params'] = dict(curve.get('params') or {}, **{name: value})
+
+
+def apply_tier(config, global_params, tier, memmap_dir=None):
+    """Включает режим экономии памяти tier в копии конфигурации"""
+    config = copy.deepcopy(config)
+    for curve in config['curves']:
+        merged = merge_params(global_params, curve.get('params', {}))
+        if tier == 'float32':
+            _set_curve_param(curve, 'plot_dtype', 'float32')
+        elif tier == 'chunked':
+            if config['type'] == 'function':
+                if not curve.get('sampling') and not _is_family(curve.get('params')):
+                    curve['sampling'] = 'chunked'
+            elif config['type'] != 'sensitivity':
+                _set_curve_param(curve, 'ode_chunks', ODE_CHUNKS)
+        elif tier == 'decimate':
+            _set_curve_param(curve, 'n_points', min(int(merged.get('n_points', 1000)), DECIMATED_POINTS))
+            sampling = curve.get('sampling')
+            if isinstance(sampling, dict) and 'max_points' in sampling:
+                sampling['max_points'] = min(sampling['max_points'], DECIMATED_POINTS)
+        elif tier == 'stream':
+            _set_curve_param(curve, 'rasterized', True)
+            if not _is_family(curve.get('params')) and config['type'] != 'sensitivity':
+                _set_curve_param(curve, 'memmap_dir', memmap_dir)
+
+    if tier == 'decimate' and config.get('vector_field'):
+        config['vector_field']['density'] = min(int(config['vector_field'].get('density', 20)), DECIMATED_DENSITY)
+    return config
+
+
+def plan_memory(config, global_params, budget, memmap_dir=None):
+    """
+    Подбирает минимальный набор режимов экономии, при котором прогноз укладывается в бюджет.
+    Возвращает (конфигурация, прогноз, включенные режимы). Если не помогают даже все режимы,
+    возвращается конфигурация со всеми режимами
+    """
+    estimate = estimate_memory(config, global_params)
+    applied = []
+    for tier in TIERS:
+        if estimate['peak'] <= budget:
+            break
+        config = apply_tier(config, global_params, tier, memmap_dir)
+        estimate = estimate_memory(config, global_params)
+        applied.append(tier)
+    return config, estimate, applied
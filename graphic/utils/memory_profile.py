@@ -0,0 +1,211 @@
+"""
+Профиль памяти по этапам (--memory-profile): кто сколько выделяет.
+
+Этапы размечаются в коде через memory_stage(имя) (рисунок, кривая, решение, векторное поле, сохранение);
+без --memory-profile это пустой контекст. Для каждого этапа (этапы вложены) tracemalloc дает:
+    peak      - пик памяти этапа сверх уровня на входе;
+    retained  - сколько осталось занято после выхода (результаты, кэши);
+    transient - peak - retained, временные данные;
+    temp      - число массивов numpy, живых в момент пика, но освобожденных к концу этапа.
+Места выделения - строки кода проекта (самый глубокий кадр из каталога проекта, иначе библиотечный):
+топ по приросту в пике и по оставшемуся.
+
+Снимок в пике: фоновый поток каждые SAMPLE_INTERVAL секунд сверяет текущий объем с порогом и, когда
+прирост этапа вырос в PEAK_GROWTH раз, делает снимок tracemalloc; снимков O(log пика). Пик внутри
+одного долгого вызова C (поток ждет GIL) виден только по объему, без мест выделения.
+Сам tracemalloc замедляет расчет тем сильнее, чем глубже записываемый стек (TRACEBACK_LIMIT):
+на example_nullclines.yaml 1 кадр - 14 с, 4 - 31 с, 16 - 126 с (без профиля - 3.5 с), поэтому
+берется 4 кадра - обычно этого хватает, чтобы дойти до строки проекта.
+Процессы пулов не профилируются, поэтому режим не совмещается с --pipeline и --memory-budget
+(последний сам сбрасывает пик tracemalloc).
+
+Отчет - текст с размерами в КБ без времени, его удобно сравнивать между версиями через diff.
+"""
+
+import os
+import time
+import weakref
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+PEAK_GROWTH = 1.25
+# Пока этап не вырос хотя бы на столько, снимок в пике не делается
+MIN_PEAK_DELTA = 1024 * 1024
+TRACEBACK_LIMIT = 4
+SAMPLE_INTERVAL = 0.002
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NUMPY_DOMAIN = np.lib.tracemalloc_domain
+
+
+class StageRecord:
+    def __init__(self, name, depth, start_current, start_snapshot):
+        self.name = name
+        self.depth = depth
+        self.start_current = start_current
+        self.start_snapshot = start_snapshot
+        self.peak_current = start_current
+        self.peak_snapshot = None
+        self.threshold = start_current + MIN_PEAK_DELTA
+        self.result = None
+
+
+def _site(traceback):
+    """Самый глубокий кадр из кода проекта (иначе самый глубокий вообще): 'файл:строка'"""
+    # Кадры tracemalloc.Traceback идут от самого старого вызова к самому глубокому
+    for frame in reversed(traceback):
+        if frame.filename.startswith(PROJECT_DIR):
+            return f"{os.path.relpath(frame.filename, PROJECT_DIR)}:{frame.lineno}"
+    frame = traceback[-1]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+
+
+_SITES = {}
+# Разбор снимка пика нужен всем вложенным этапам, которые его разделяют - считаем один раз
+_SNAPSHOT_SITES = weakref.WeakKeyDictionary()
+
+
+def _sites(snapshot):
+    if snapshot not in _SNAPSHOT_SITES:
+        _SNAPSHOT_SITES[snapshot] = _group_sites(snapshot)
+    return _SNAPSHOT_SITES[snapshot]
+
+
+def _group_sites(snapshot):
+    # Группировка по стеку - в самом tracemalloc, место считается один раз на стек
+    sizes = Counter()
+    for stat in snapshot.statistics('traceback'):
+        site = _SITES.get(stat.traceback)
+        if site is None:
+            site = _SITES[stat.traceback] = _site(stat.traceback)
+        sizes[site] += stat.size
+    # Снимки и счетчики самого профиля
+    for site in [site for site in sizes if site.startswith(('tracemalloc.py', 'utils/memory_profile.py'))]:
+        del sizes[site]
+    return sizes
+
+
+def _numpy_blocks(snapshot):
+    return Counter((trace.traceback, trace.size) for trace in snapshot.traces if trace.domain == NUMPY_DOMAIN)
+
+
+class MemoryProfiler:
+    def __init__(self, top=5):
+        self.top = top
+        self.enabled = False
+        self.stack = []
+        self.records = []
+        self.lock = threading.Lock()
+        self.sampler = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_LIMIT)
+        self.enabled = True
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.enabled = False
+        self.sampler.join()
+        tracemalloc.stop()
+
+    def _sample(self):
+        while self.enabled:
+            time.sleep(SAMPLE_INTERVAL)
+            with self.lock:
+                if not self.stack:
+                    continue
+                current = tracemalloc.get_traced_memory()[0]
+                if current <= min(record.threshold for record in self.stack):
+                    continue
+                snapshot = tracemalloc.take_snapshot()
+                for record in self.stack:
+                    if current > record.threshold:
+                        record.peak_snapshot = snapshot
+                        record.threshold = record.start_current + (current - record.start_current) * PEAK_GROWTH
+
+    @contextmanager
+    def stage(self, name):
+        with self.lock:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                # Пик родителя до входа во вложенный этап (reset_peak ниже его сбрасывает)
+                self.stack[-1].peak_current = max(self.stack[-1].peak_current, peak)
+            record = StageRecord(name, len(self.stack), current, tracemalloc.take_snapshot())
+            self.records.append(record)
+            self.stack.append(record)
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            with self.lock:
+                current, peak = tracemalloc.get_traced_memory()
+                self.stack.pop()
+                record.peak_current = max(record.peak_current, peak)
+                if self.stack:
+                    self.stack[-1].peak_current = max(self.stack[-1].peak_current, record.peak_current)
+                self._finish(record, current)
+                tracemalloc.reset_peak()
+
+    def _finish(self, record, end_current):
+        end_snapshot = tracemalloc.take_snapshot()
+        start_sites = _sites(record.start_snapshot)
+        end_sites = _sites(end_snapshot)
+        retained_sites = [(site, end_sites[site] - start_sites[site]) for site in end_sites]
+
+        peak_sites, temporaries = [], 0
+        if record.peak_snapshot is not None:
+            sites = _sites(record.peak_snapshot)
+            peak_sites = [(site, sites[site] - start_sites[site]) for site in sites]
+            # Массивы numpy, живые в пике, которых нет ни на входе, ни на выходе
+            temporaries = sum((_numpy_blocks(record.peak_snapshot) - _numpy_blocks(record.start_snapshot)
+                               - _numpy_blocks(end_snapshot)).values())
+
+        def top(entries):
+            return sorted((e for e in entries if e[1] >= 1024), key=lambda e: (-e[1], e[0]))[:self.top]
+
+        record.result = {
+            'peak': record.peak_current - record.start_current,
+            'retained': end_current - record.start_current,
+            'temporaries': temporaries,
+            'peak_sites': top(peak_sites),
+            'retained_sites': top(retained_sites),
+        }
+        # Снимки больше не нужны
+        record.start_snapshot = record.peak_snapshot = None
+
+    def report(self):
+        lines = [f"{'этап':<48} {'peak КБ':>10} {'retained КБ':>12} {'transient КБ':>13} {'temp':>6}"]
+        for record in self.records:
+            result = record.result
+            if result is None:
+                continue
+            name = '  ' * record.depth + record.name
+            lines.append(f"{name:<48} {result['peak'] // 1024:>10} {result['retained'] // 1024:>12} "
+                         f"{(result['peak'] - result['retained']) // 1024:>13} {result['temporaries']:>6}")
+            indent = '  ' * (record.depth + 2)
+            for label, key in (('пик', 'peak_sites'), ('осталось', 'retained_sites')):
+                for site, size in result[key]:
+                    lines.append(f"{indent}{label:<9}{size // 1024:>9} КБ  {site}")
+        return '\n'.join(lines)
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.report() + '\n')
+
+
+PROFILER = MemoryProfiler()
+
+
+def memory_stage(name):
+    """Этап профиля памяти; без --memory-profile - пустой контекст"""
+    if PROFILER.enabled:
+        return PROFILER.stage(name)
+    return nullcontext()
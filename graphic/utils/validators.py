@@ -1,16 +1,39 @@
 def validate_config(config):
+    if 'type' not in config:
+        raise ValueError("Missing required key: type")
+
+    if config['type'] == 'fit':
+        return validate_fit_config(config)
+    if config['type'] == 'work_precision':
+        return validate_work_precision_config(config)
+    if config['type'] == 'basin_map':
+        return validate_basin_map_config(config)
+    if config['type'] == 'equilibrium_sweep':
+        return validate_equilibrium_sweep_config(config)
+    if config['type'] == 'space_time':
+        return validate_space_time_config(config)
+    if config['type'] == 'lyapunov':
+        return validate_lyapunov_config(config)
+
     required_keys = ['type', 'curves', 'output']
     for key in required_keys:
         if key not in config:
             raise ValueError(f"Missing required key: {key}")
 
-    if config['type'] not in ['function', 'ode_time', 'phase_portrait']:
+    if config['type'] not in ['function', 'ode_time', 'phase_portrait', 'sensitivity']:
         raise ValueError(f"Invalid type: {config['type']}")
 
     plot_type = config['type']
 
-    # Список допустимых методов решения ОДУ
-    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA']
+    cycle_config = config.get('limit_cycles')
+    if plot_type == 'phase_portrait' and cycle_config and cycle_config.get('enabled', False):
+        if 'variable' not in cycle_config or 'value' not in cycle_config:
+            raise ValueError("Limit cycles need a section: 'variable' and 'value'")
+        if cycle_config.get('direction', 1) not in [-1, 1]:
+            raise ValueError("Limit cycle section 'direction' must be -1 or 1")
+
+    # Список допустимых методов решения ОДУ ('auto' - автоматический выбор между явным и неявным методом, см. core/ode_solver.py)
+    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA', 'auto']
 
     for curve in config['curves']:
         if plot_type == 'function':
@@ -21,7 +44,7 @@ def validate_config(config):
             if 'style' not in curve:
                 raise ValueError("Each function curve must have 'style'")
 
-        elif plot_type in ['ode_time', 'phase_portrait']:
+        elif plot_type in ['ode_time', 'phase_portrait', 'sensitivity']:
             if 'equations' not in curve:
                 raise ValueError("Each ODE curve must have 'equations'")
             if 'variable_names' not in curve:
@@ -31,6 +54,16 @@ def validate_config(config):
             if 't_span' not in curve:
                 raise ValueError("Each ODE curve must have 't_span'")
 
+            if plot_type == 'sensitivity' and not curve.get('sensitivity_params'):
+                raise ValueError("Each sensitivity curve must have 'sensitivity_params'")
+
+            if curve.get('uncertainty'):
+                validate_uncertainty(curve['uncertainty'])
+            if curve.get('noise'):
+                validate_noise(curve['noise'], len(curve['equations']))
+            if curve.get('section'):
+                validate_section(curve['section'], curve['variable_names'])
+
             # Проверка метода решения ОДУ, если указан
             if 'solver_method' in curve:
                 if curve['solver_method'] not in valid_solver_methods:
@@ -39,6 +72,184 @@ def validate_config(config):
     return True
 
 
+def validate_uncertainty(uncertainty):
+    required = {'normal': ['mean', 'std'], 'lognormal': ['median', 'sigma'], 'uniform': ['low', 'high']}
+    if not uncertainty.get('distributions'):
+        raise ValueError("Uncertainty block must have 'distributions'")
+    for name, spec in uncertainty['distributions'].items():
+        if spec.get('dist') not in required:
+            raise ValueError(f"Invalid distribution for '{name}': {spec.get('dist')}. Valid: {list(required)}")
+        for key in required[spec['dist']]:
+            if key not in spec:
+                raise ValueError(f"Distribution '{spec['dist']}' for '{name}' must have '{key}'")
+    for band in uncertainty.get('bands', []):
+        if len(band) != 2 or not 0 <= band[0] < band[1] <= 100:
+            raise ValueError(f"Invalid percentile band: {band}")
+    return True
+
+
+def validate_noise(noise, n_equations):
+    if len(noise.get('diffusion', [])) != n_equations:
+        raise ValueError("Noise block must have one 'diffusion' term per equation")
+    valid_schemes = ['euler_maruyama', 'milstein']
+    if noise.get('scheme', 'milstein') not in valid_schemes:
+        raise ValueError(f"Invalid noise scheme: {noise['scheme']}. Valid schemes: {valid_schemes}")
+    if float(noise.get('dt', 1e-3)) <= 0:
+        raise ValueError("Noise 'dt' must be positive")
+    if noise.get('center', 'mean') not in ['mean', 'median']:
+        raise ValueError(f"Invalid noise center: {noise['center']}. Valid: ['mean', 'median']")
+    for band in noise.get('bands', []):
+        if len(band) != 2 or not 0 <= band[0] < band[1] <= 100:
+            raise ValueError(f"Invalid percentile band: {band}")
+    return True
+
+
+def validate_section(section, variable_names):
+    mode = section.get('mode', 'stroboscopic')
+    if mode == 'stroboscopic':
+        if 'period' not in section:
+            raise ValueError("Stroboscopic section must have 'period'")
+    elif mode == 'crossing':
+        if section.get('variable') not in variable_names:
+            raise ValueError(f"Crossing section 'variable' must be one of {variable_names}")
+        if section.get('direction', 1) not in [-1, 0, 1]:
+            raise ValueError("Crossing section 'direction' must be -1, 0 or 1")
+    else:
+        raise ValueError(f"Invalid section mode: {mode}. Valid modes: ['stroboscopic', 'crossing']")
+    return True
+
+
+def validate_fit_config(config):
+    for key in ['system', 'data', 'free_params', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    for key in ['equations', 'variable_names', 'initial_conditions']:
+        if key not in config['system']:
+            raise ValueError(f"Fit system must have '{key}'")
+
+    if 'file' not in config['data'] or not config['data'].get('columns'):
+        raise ValueError("Fit data must have 'file' and 'columns'")
+
+    for name, bounds in config['free_params'].items():
+        if len(bounds) != 2 or bounds[0] >= bounds[1]:
+            raise ValueError(f"Invalid bounds for free parameter '{name}': {bounds}")
+
+    return True
+
+
+def validate_work_precision_config(config):
+    for key in ['system', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    for key in ['equations', 'variable_names', 'initial_conditions', 't_span']:
+        if key not in config['system']:
+            raise ValueError(f"Work-precision system must have '{key}'")
+
+    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF', 'LSODA', 'auto']
+    for method in config.get('methods', []):
+        if method not in valid_solver_methods:
+            raise ValueError(f"Invalid method: {method}. Valid methods: {valid_solver_methods}")
+
+    if config.get('y_axis', 'time') not in ['time', 'nfev']:
+        raise ValueError(f"Invalid y_axis: {config['y_axis']}. Valid values: ['time', 'nfev']")
+
+    return True
+
+
+def validate_basin_map_config(config):
+    for key in ['system', 'axes', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    for key in ['equations', 'variable_names', 't_span']:
+        if key not in config['system']:
+            raise ValueError(f"Basin map system must have '{key}'")
+
+    # Сетка начальных условий строится по пределам осей, поэтому они обязательны
+    if not config['axes'].get('xlim') or not config['axes'].get('ylim'):
+        raise ValueError("Basin map requires axes 'xlim' and 'ylim'")
+
+    return True
+
+
+def validate_space_time_config(config):
+    for key in ['system', 'plot', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    system = config['system']
+    for key in ['fields', 'equations', 'n_cells', 'initial_conditions', 't_span']:
+        if key not in system:
+            raise ValueError(f"Space-time system must have '{key}'")
+    if len(system['equations']) != len(system['fields']) or len(system['initial_conditions']) != len(system['fields']):
+        raise ValueError("Space-time system needs one equation and one initial condition per field")
+
+    # Якобиан - разреженная матрица: LSODA и 'auto' (оценка жесткости по плотному спектру) не подходят
+    valid_solver_methods = ['RK23', 'RK45', 'DOP853', 'Radau', 'BDF']
+    if system.get('solver_method', 'BDF') not in valid_solver_methods:
+        raise ValueError(f"Invalid solver_method: {system['solver_method']}. Valid methods: {valid_solver_methods}")
+
+    plot = config['plot']
+    if plot.get('field') not in system['fields']:
+        raise ValueError(f"Plot field must be one of {system['fields']}")
+    if plot.get('mode', 'heatmap') not in ['heatmap', 'profiles']:
+        raise ValueError(f"Invalid plot mode: {plot['mode']}. Valid modes: ['heatmap', 'profiles']")
+
+    return True
+
+
+def validate_lyapunov_config(config):
+    for key in ['system', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    system = config['system']
+    for key in ['equations', 'variable_names', 'initial_conditions']:
+        if key not in system:
+            raise ValueError(f"Lyapunov system must have '{key}'")
+    n = len(system['variable_names'])
+    if len(system['equations']) != n or len(system['initial_conditions']) != n:
+        raise ValueError("Lyapunov system needs one equation and one initial condition per variable")
+
+    analysis = config.get('analysis', {})
+    for key in ['t_total', 'renorm_interval', 'sample_interval']:
+        if key in analysis and float(analysis[key]) <= 0:
+            raise ValueError(f"Lyapunov analysis '{key}' must be positive")
+    if analysis.get('n_exponents') is not None and not 1 <= int(analysis['n_exponents']) <= n:
+        raise ValueError(f"Lyapunov 'n_exponents' must be between 1 and {n}")
+
+    sweep = config.get('sweep', [])
+    sweep = sweep if isinstance(sweep, list) else [sweep]
+    if len(sweep) > 2:
+        raise ValueError("Lyapunov sweep supports at most two parameters")
+    for parameter in sweep:
+        if 'name' not in parameter or not any(key in parameter for key in ['values', 'linspace', 'logspace']):
+            raise ValueError("Each Lyapunov sweep parameter needs 'name' and 'values', 'linspace' or 'logspace'")
+
+    return True
+
+
+def validate_equilibrium_sweep_config(config):
+    for key in ['quantity', 'parameter', 'output']:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    valid_quantities = ['s_w', 'viscosity', 'phase_curve', 'discriminant']
+    if config['quantity'] not in valid_quantities:
+        raise ValueError(f"Invalid quantity: {config['quantity']}. Valid quantities: {valid_quantities}")
+
+    parameters = config['parameter'] if isinstance(config['parameter'], list) else [config['parameter']]
+    if len(parameters) > 1 and config['quantity'] != 'phase_curve':
+        raise ValueError("Several parameters are supported only for quantity 'phase_curve'")
+    for parameter in parameters:
+        if parameter.get('name') not in ['a', 'b', 'alpha', 'beta', 'c', 'h']:
+            raise ValueError(f"Invalid sweep parameter: {parameter.get('name')}")
+
+    return True
+
+
 def merge_params(global_params, local_params):
     merged = global_params.copy()
     if local_params:
@@ -0,0 +1,49 @@
+# Отчет о том, сколько трансцендентных функций (exp, log, нецелые степени) вычисляется
+# за один вызов правой части и якобиана до и после исключения общих подвыражений (CSE).
+# Запуск из папки graphic: python "Разные наглядные тесты/cse_report.py"
+import sys
+import os
+import glob
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml
+from models.ode_system import ODESystem
+from utils.validators import merge_params
+import params_global
+
+graphic_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Число вычислений правой части на один принятый шаг (без учета отброшенных шагов)
+RHS_CALLS_PER_STEP = {'DOP853': 12, 'RK45': 6}
+
+seen = set()
+for path in sorted(glob.glob(os.path.join(graphic_dir, 'configs', '**', '*.yaml'), recursive=True)):
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    if config.get('type') not in ('ode_time', 'phase_portrait'):
+        continue
+
+    for curve in config['curves']:
+        merged_params = merge_params(vars(params_global), curve.get('params', {}))
+        key = (tuple(curve['equations']), tuple(sorted(curve.get('params', {}).items())))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        try:
+            system = ODESystem(curve['equations'], curve['variable_names'])
+            param_values = [merged_params[str(p)] for p in system.params]
+            rhs = system.cse_report(param_values)
+            fused = system.cse_report(param_values, include_jacobian=True)
+        except Exception as error:
+            print(f"{os.path.basename(path)}: пропущено ({error})\n")
+            continue
+
+        print(f"{os.path.basename(path)}: {curve['equations']}")
+        print(f"    правая часть:      {rhs['transcendentals_before']} -> {rhs['transcendentals_after']} "
+              f"трансцендентных вычислений на вызов ({rhs['reduction']:.0%} меньше)")
+        for method, calls in RHS_CALLS_PER_STEP.items():
+            print(f"    {method}: {rhs['transcendentals_before'] * calls} -> {rhs['transcendentals_after'] * calls} на шаг")
+        print(f"    правая часть + якобиан (одно ядро): {fused['transcendentals_before']} -> "
+              f"{fused['transcendentals_after']} ({fused['reduction']:.0%} меньше)\n")
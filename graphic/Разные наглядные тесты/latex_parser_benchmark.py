@@ -0,0 +1,65 @@
+# Сравнение быстрого парсера utils/latex_parser.py с sympy.parsing.latex (ANTLR):
+# время импорта, время разбора одного уравнения и совпадение получившихся выражений.
+# Запуск из папки graphic: python "Разные наглядные тесты/latex_parser_benchmark.py"
+import sys
+import os
+import glob
+import time
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml
+import sympy as sp
+from utils.latex_parser import parse_latex_fast, UnsupportedLatex
+
+graphic_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repeats = 50
+
+
+def import_time(statement):
+    # Импорт меряем в отдельном процессе, иначе второй замер попадет в уже прогретый кэш модулей
+    code = f"import time; s = time.perf_counter(); {statement}; print(time.perf_counter() - s)"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=graphic_dir)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+formulas = set()
+for path in glob.glob(os.path.join(graphic_dir, 'configs', '**', '*.yaml'), recursive=True):
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    for curve in config.get('curves', []):
+        formulas.update(curve.get('equations', []))
+        if 'formula' in curve:
+            formulas.add(curve['formula'])
+
+print(f"Импорт sympy.parsing.latex: {import_time('from sympy.parsing.latex import parse_latex') * 1000:.1f} мс")
+print(f"Импорт utils.latex_parser:  {import_time('from utils.latex_parser import parse_latex_fast') * 1000:.1f} мс")
+print()
+
+from sympy.parsing.latex import parse_latex as parse_latex_antlr
+
+total_fast = 0.0
+total_antlr = 0.0
+for formula in sorted(formulas):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = parse_latex_antlr(formula)
+    antlr_time = (time.perf_counter() - start) / repeats
+
+    try:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = parse_latex_fast(formula)
+        fast_time = (time.perf_counter() - start) / repeats
+    except UnsupportedLatex as error:
+        print(f"{formula}\n    вне подмножества ({error}), будет разобрано через sympy\n")
+        continue
+
+    same = sp.simplify(result - expected) == 0
+    total_fast += fast_time
+    total_antlr += antlr_time
+    print(f"{formula}\n    ANTLR {antlr_time * 1e6:8.1f} мкс | быстрый {fast_time * 1e6:8.1f} мкс | "
+          f"ускорение x{antlr_time / fast_time:.1f} | совпадает: {same}\n")
+
+print(f"Итого на поддерживаемых формулах: ANTLR {total_antlr * 1000:.2f} мс, быстрый {total_fast * 1000:.2f} мс")